@@ -0,0 +1,68 @@
+"""JSON编解码基准测试
+
+运行: python -m benchmarks.bench_json_codec
+"""
+import timeit
+from typing import Any, Callable, Dict
+from core.json_codec import JSONCodec, orjson
+
+def _payloads() -> Dict[str, Any]:
+    """典型的接口请求/响应数据"""
+    user = {
+        "id": 10086,
+        "username": "test_user_1700000000.123",
+        "email": "test_1700000000.123@example.com",
+        "age": 25,
+        "active": True,
+        "score": 98.5,
+        "tags": ["vip", "beta", "中文标签"],
+        "profile": {"city": "Shanghai", "zip": "200000", "extra": None},
+    }
+    return {
+        "small_request": {"name": "test", "age": 20},
+        "user": user,
+        "user_list_1k": {"total": 1000, "items": [dict(user, id=i) for i in range(1000)]},
+        "httpbin_echo": {
+            "args": {},
+            "headers": {f"X-Header-{i}": f"value-{i}" for i in range(20)},
+            "json": user,
+            "origin": "127.0.0.1",
+            "url": "https://httpbin.org/post",
+        },
+    }
+
+def _bench(func: Callable[[], Any], min_time: float = 0.2) -> float:
+    """返回单次调用耗时(微秒)"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    number = max(number, int(number * min_time / 0.2))
+    return min(timer.repeat(repeat=5, number=number)) / number * 1e6
+
+def main():
+    codecs = {"json": JSONCodec("json")}
+    if orjson is not None:
+        codecs["orjson"] = JSONCodec("orjson")
+    else:
+        print("orjson is not installed, only the stdlib backend is measured")
+
+    header = f"{'payload':<16}{'operation':<12}" + "".join(f"{name + ' (us)':>16}" for name in codecs)
+    if len(codecs) > 1:
+        header += f"{'speedup':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, payload in _payloads().items():
+        encoded = codecs["json"].dumps(payload)
+        operations = {
+            "dumps": lambda c: (lambda: c.dumps(payload)),
+            "loads": lambda c: (lambda: c.loads(encoded)),
+            "pretty": lambda c: (lambda: c.dumps_pretty(payload)),
+        }
+        for operation, factory in operations.items():
+            results = {backend: _bench(factory(c)) for backend, c in codecs.items()}
+            line = f"{name:<16}{operation:<12}" + "".join(f"{value:>16.2f}" for value in results.values())
+            if len(results) > 1:
+                line += f"{results['json'] / results['orjson']:>9.1f}x"
+            print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""日志开销基准测试
+
+对比同步输出（queue: false，调用线程中格式化并写控制台/文件）与队列模式（调用线程只入队）
+下每次请求日志（log_request + log_response）在调用线程中的耗时，以及队列模式下后台线程写完
+全部日志所需的时间。控制台输出重定向到空设备，文件写入临时目录，使用默认的max_body_bytes。
+
+运行: python -m benchmarks.bench_logging
+"""
+import os
+import tempfile
+import time
+from typing import Any, Dict
+from core.json_codec import codec
+from core.logger import Logger
+
+def _payloads() -> Dict[str, Any]:
+    user = {"id": 10086, "username": "test_user", "email": "test@example.com", "tags": ["vip", "beta"]}
+    return {
+        "small": {"args": {}, "headers": {"Accept": "application/json"}, "json": user},
+        "user_list_1k": {"total": 1000, "items": [dict(user, id=i) for i in range(1000)]},
+        # HTTPClient记录的原始响应体，超过max_body_bytes时截断
+        "raw_5mb": codec.dumps({"items": [dict(user, id=i) for i in range(60000)]}),
+    }
+
+TIMING = {
+    "dns_resolution": None, "tcp_connection": None, "ssl_handshake": None, "request_send": 0.05,
+    "server_processing": 1.2, "response_receive": 0.1, "total_time": 1.4, "connection_reused": True,
+}
+
+def _run(logger: Logger, payload: Any, iterations: int) -> Dict[str, float]:
+    logger.start_test_case("bench_logging")
+    start = time.perf_counter()
+    for i in range(iterations):
+        logger.log_request(method="GET", url="http://127.0.0.1/users", headers={"Accept": "application/json"},
+                           params={"page": i}, data=None)
+        logger.log_response(status_code=200, response_data=payload, timing=TIMING,
+                            content_type="application/json")
+    caller = time.perf_counter() - start
+    logger.end_test_case()
+    total = time.perf_counter() - start
+    return {"caller_us": caller / iterations * 1e6, "total_us": total / iterations * 1e6}
+
+def main():
+    with tempfile.TemporaryDirectory() as log_dir, open(os.devnull, "w") as devnull:
+        loggers = {
+            "sync": Logger(config={"queue": False}, log_dir=log_dir, stream=devnull),
+            "queue": Logger(config={"queue": True, "queue_size": 100000}, log_dir=log_dir, stream=devnull),
+        }
+        header = f"{'payload':<16}{'mode':<8}{'caller (us/req)':>18}{'incl. flush (us/req)':>24}"
+        print(header)
+        print("-" * len(header))
+        for name, payload in _payloads().items():
+            iterations = {"small": 2000, "user_list_1k": 100}.get(name, 20)
+            for mode, logger in loggers.items():
+                result = _run(logger, payload, iterations)
+                print(f"{name:<16}{mode:<8}{result['caller_us']:>18.1f}{result['total_us']:>24.1f}")
+        for logger in loggers.values():
+            logger.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Prometheus指标开销基准测试
+
+测量HTTPClient每次请求记录指标（计数器+总耗时直方图+各阶段耗时直方图）的开销，
+以及对Mock服务（独立进程）发送请求时开启/关闭指标的吞吐量。
+
+运行: python -m benchmarks.bench_metrics
+"""
+import asyncio
+import multiprocessing
+import time
+from benchmarks.bench_mock_server import _serve
+from clients import http_client
+from clients.connection_pool import connection_pool
+from clients.http_client import HTTPClient, RequestTiming
+from core.metrics import RequestMetrics
+
+def _observe_cost(config: dict, iterations: int = 100000) -> float:
+    """每次observe的耗时(微秒)，请求路径包含ID，覆盖接口模板归一化"""
+    request_metrics = RequestMetrics(config)
+    timing = RequestTiming(start_time=1.0, send_start=1.001, send_end=1.002,
+                           receive_start=1.010, receive_end=1.011, connection_reused=True)
+    start = time.perf_counter()
+    for i in range(iterations):
+        request_metrics.observe("GET", f"/users/{i % 100}", 200, timing)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+async def _throughput(url: str, requests: int, concurrency: int = 50) -> float:
+    client = HTTPClient(url, verbose=False, rate_limited=False)
+    specs = [{"method": "GET", "endpoint": f"/users/{i}"} for i in range(requests)]
+    start = time.perf_counter()
+    await client.request_many(specs, concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    await client.close()
+    await connection_pool.close()
+    return requests / elapsed
+
+def main(requests: int = 5000):
+    print(f"{'observe':<24}{'us/request':>12}")
+    for name, config in (("counter+total", {"enabled": True, "phases": False}),
+                         ("counter+total+phases", {"enabled": True})):
+        print(f"{name:<24}{_observe_cost(config):>12.2f}")
+
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(port_queue,), daemon=True)
+    process.start()
+    try:
+        url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+        print(f"\n{'metrics':<24}{'req/s (best of 3)':>20}")
+        best = {}
+        # 交替执行以抵消系统负载波动
+        for _ in range(3):
+            for name, config in (("disabled", {"enabled": False}), ("enabled", {"enabled": True})):
+                # 替换HTTPClient使用的模块级指标实例
+                http_client.request_metrics = RequestMetrics(config)
+                best[name] = max(best.get(name, 0.0), asyncio.run(_throughput(url, requests)))
+        for name, throughput in best.items():
+            print(f"{name:<24}{throughput:>20.0f}")
+    finally:
+        process.terminate()
+        process.join()
+
+if __name__ == "__main__":
+    main()
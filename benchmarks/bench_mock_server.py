@@ -0,0 +1,81 @@
+"""Mock服务吞吐量基准测试
+
+Mock服务运行在独立进程中，客户端使用多个keep-alive连接批量发送pipelined请求，
+测量服务端单核吞吐量；另外测量经过HTTPClient的端到端吞吐量作为对比。
+
+运行: python -m benchmarks.bench_mock_server
+"""
+import asyncio
+import multiprocessing
+import socket
+import time
+from clients.http_client import HTTPClient
+from utils.mock_server import MockServer
+
+def _serve(port_queue: multiprocessing.Queue):
+    async def _run():
+        server = MockServer()
+        server.add_route("GET", "/ping", json={"ok": True})
+        server.add_route("GET", "/users/{user_id}", handler=lambda r: {"id": r.match_info["user_id"]})
+        await server.start()
+        port_queue.put(server.port)
+        await asyncio.Event().wait()
+    asyncio.run(_run())
+
+async def _pipelined(port: int, path: str, connections: int, requests: int, depth: int = 32) -> float:
+    """原始socket客户端，每个连接每次发送depth个请求，返回每秒请求数"""
+    request = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode("latin-1")
+    per_connection = requests // connections
+
+    async def _client():
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.transport.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        remaining = per_connection
+        while remaining:
+            batch = min(depth, remaining)
+            writer.write(request * batch)
+            received, tail = 0, b""
+            while received < batch:
+                data = await reader.read(256 * 1024)
+                if not data:
+                    raise ConnectionError("mock server closed the connection")
+                # 保留上次末尾的几个字节，避免状态行被分块截断时漏计
+                received += (tail + data).count(b"HTTP/1.1 ")
+                tail = data[-8:]
+            remaining -= batch
+        writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(_client() for _ in range(connections)))
+    return per_connection * connections / (time.perf_counter() - start)
+
+async def _http_client(port: int, requests: int, concurrency: int) -> float:
+    """经过HTTPClient的吞吐量，返回每秒请求数"""
+    client = HTTPClient(f"http://127.0.0.1:{port}", verbose=False)
+    specs = ({"method": "GET", "endpoint": "/ping"} for _ in range(requests))
+    start = time.perf_counter()
+    results = await client.request_many(specs, concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    await client.close()
+    assert all(result.ok for result in results)
+    return requests / elapsed
+
+def main():
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(port_queue,), daemon=True)
+    process.start()
+    try:
+        port = port_queue.get(timeout=10)
+        print(f"{'scenario':<36}{'req/s':>12}")
+        print("-" * 48)
+        for path in ("/ping", "/users/42"):
+            rps = asyncio.run(_pipelined(port, path, connections=8, requests=200000))
+            print(f"{'pipelined ' + path:<36}{rps:>12,.0f}")
+        rps = asyncio.run(_http_client(port, requests=5000, concurrency=50))
+        print(f"{'HTTPClient /ping (concurrency 50)':<36}{rps:>12,.0f}")
+    finally:
+        process.terminate()
+        process.join()
+
+if __name__ == "__main__":
+    main()
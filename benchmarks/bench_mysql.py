@@ -0,0 +1,65 @@
+"""MySQL批量写入和流式读取基准测试
+
+写入：逐行execute_update（每行一次往返和一次提交） vs execute_many（按批合并为多行INSERT，每批提交一次）
+读取：execute_query（DictCursor，一次读入全部结果） vs iter_query（SSDictCursor，逐批读取），同时记录Python内存峰值
+
+使用当前环境配置中的database.mysql，在其中创建并删除临时表bench_rows；连接失败时跳过。
+
+运行: python -m benchmarks.bench_mysql [行数]
+"""
+import sys
+import time
+import tracemalloc
+from typing import Callable, Tuple
+from utils.db_handler import MySQLHandler
+from utils.mysql_pool import MySQLConnectionPool
+
+TABLE = "bench_rows"
+
+def _rows(count: int):
+    return ((i, f"user_{i}", f"user_{i}@example.com") for i in range(count))
+
+def _timed(call: Callable[[], int]) -> Tuple[int, float, float]:
+    """返回(行数, 耗时秒, Python内存峰值MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = call()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    tracemalloc.stop()
+    return rows, elapsed, peak
+
+def main(rows: int = 50000):
+    mysql = MySQLHandler(MySQLConnectionPool())
+    try:
+        mysql.execute_update(f"DROP TABLE IF EXISTS {TABLE}")
+    except Exception as e:
+        print(f"MySQL unavailable, skipped: {e}")
+        return
+    mysql.execute_update(f"CREATE TABLE {TABLE} (id INT PRIMARY KEY, username VARCHAR(64), email VARCHAR(128))")
+    insert = f"INSERT INTO {TABLE} (id, username, email) VALUES (%s, %s, %s)"
+    try:
+        print(f"{'write':<28}{'rows':>10}{'rows/s':>12}")
+        # 逐行写入较慢，只写入1/10的行数
+        single = rows // 10
+        count, elapsed, _ = _timed(lambda: sum(mysql.execute_update(insert, row) for row in _rows(single)))
+        print(f"{'execute_update per row':<28}{count:>10}{count / elapsed:>12.0f}")
+        mysql.execute_update(f"TRUNCATE TABLE {TABLE}")
+        for batch_size in (100, 1000, 5000):
+            count, elapsed, _ = _timed(lambda: mysql.execute_many(insert, _rows(rows), batch_size=batch_size))
+            print(f"{f'execute_many batch={batch_size}':<28}{count:>10}{count / elapsed:>12.0f}")
+            mysql.execute_update(f"TRUNCATE TABLE {TABLE}")
+
+        mysql.execute_many(insert, _rows(rows))
+        select = f"SELECT id, username, email FROM {TABLE}"
+        print(f"\n{'read':<28}{'rows':>10}{'rows/s':>12}{'peak MB':>10}")
+        for name, call in (("execute_query (buffered)", lambda: len(mysql.execute_query(select))),
+                           ("iter_query (streaming)", lambda: sum(1 for _ in mysql.iter_query(select)))):
+            count, elapsed, peak = _timed(call)
+            print(f"{name:<28}{count:>10}{count / elapsed:>12.0f}{peak:>10.1f}")
+    finally:
+        mysql.execute_update(f"DROP TABLE IF EXISTS {TABLE}")
+        mysql.pool.close()
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50000)
@@ -0,0 +1,82 @@
+"""同步调用方式基准测试
+
+对比同步用例中调用HTTPClient的几种方式（Mock服务运行在独立进程中）：
+- asyncio.run: 每次调用创建事件循环和客户端（原有写法）
+- SyncHTTPClient: 提交到共享的后台事件循环
+- async: 在同一个事件循环中直接await，作为参照
+
+运行: python -m benchmarks.bench_sync_client
+"""
+import asyncio
+import multiprocessing
+import statistics
+import time
+from typing import Callable, List
+from benchmarks.bench_mock_server import _serve
+from clients.connection_pool import connection_pool
+from clients.http_client import HTTPClient
+from clients.sync_client import BackgroundLoop, SyncHTTPClient
+
+def _measure(call: Callable[[], None], requests: int) -> List[float]:
+    """返回每次调用耗时(毫秒)，第一个值为冷启动耗时"""
+    latencies = []
+    for _ in range(requests + 1):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def _asyncio_run(url: str, requests: int) -> List[float]:
+    async def _once():
+        client = HTTPClient(url, verbose=False)
+        try:
+            await client.request("GET", "/ping")
+        finally:
+            await client.close()
+            await connection_pool.close()
+    return _measure(lambda: asyncio.run(_once()), requests)
+
+def _sync_client(url: str, requests: int) -> List[float]:
+    background = BackgroundLoop("bench-loop")
+    client = SyncHTTPClient(url, background=background, verbose=False)
+    try:
+        # 冷启动包含启动后台线程
+        return _measure(lambda: client.request("GET", "/ping"), requests)
+    finally:
+        client.close()
+        background.stop()
+
+def _native_async(url: str, requests: int) -> List[float]:
+    async def _run():
+        client = HTTPClient(url, verbose=False)
+        latencies = []
+        for _ in range(requests + 1):
+            start = time.perf_counter()
+            await client.request("GET", "/ping")
+            latencies.append((time.perf_counter() - start) * 1000)
+        await client.close()
+        await connection_pool.close()
+        return latencies
+    return asyncio.run(_run())
+
+def main(requests: int = 500):
+    port_queue = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_serve, args=(port_queue,), daemon=True)
+    process.start()
+    try:
+        url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+        header = f"{'approach':<18}{'first call (ms)':>18}{'p50 (ms)':>12}{'mean (ms)':>12}{'p99 (ms)':>12}"
+        print(header)
+        print("-" * len(header))
+        for name, bench in (("asyncio.run", _asyncio_run), ("SyncHTTPClient", _sync_client),
+                            ("async", _native_async)):
+            first, *rest = bench(url, requests)
+            rest.sort()
+            print(f"{name:<18}{first:>18.2f}{statistics.median(rest):>12.3f}"
+                  f"{statistics.mean(rest):>12.3f}{rest[int(len(rest) * 0.99) - 1]:>12.3f}")
+    finally:
+        process.terminate()
+        process.join()
+
+if __name__ == "__main__":
+    main()
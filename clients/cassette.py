@@ -0,0 +1,187 @@
+import base64
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from core.json_codec import codec
+from core.logger import logger
+
+# 录制/回放模式
+#   off:    不使用录制文件
+#   record: 所有请求访问网络并重新录制，文件中本次未访问的请求保留
+#   replay: 优先回放，未录制的请求访问网络并追加录制
+#   strict: 只回放，未录制的请求直接失败
+CASSETTE_MODES = ("off", "record", "replay", "strict")
+
+class CassetteMissError(LookupError):
+    """strict模式下请求没有匹配的录制记录"""
+
+def request_key(method: str, url: str, params: Optional[Dict] = None,
+                body: Any = None, headers: Optional[Dict] = None,
+                match_headers: Tuple[str, ...] = ()) -> str:
+    """生成归一化的请求键：方法 + 路径 + 排序后的查询参数 + 请求体摘要"""
+    parsed = urlsplit(url)
+    query = parse_qsl(parsed.query, keep_blank_values=True)
+    for name, value in (params or {}).items():
+        values = value if isinstance(value, (list, tuple)) else [value]
+        query.extend((str(name), str(item)) for item in values)
+    key = f"{method.upper()} {parsed.path or '/'}"
+    if query:
+        key += "?" + urlencode(sorted(query))
+    digest = _body_digest(body)
+    if digest:
+        key += f" body={digest}"
+    lowered = {k.lower(): v for k, v in (headers or {}).items()}
+    for name in match_headers:
+        key += f" {name.lower()}={lowered.get(name.lower(), '')}"
+    return key
+
+def _body_digest(body: Any) -> str:
+    if body is None or body == b"" or body == "":
+        return ""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    if isinstance(body, (bytes, bytearray)):
+        try:
+            # JSON请求体按键排序后再计算摘要，字段顺序不影响匹配
+            body = json.dumps(codec.loads(body), sort_keys=True, separators=(",", ":")).encode("utf-8")
+        except ValueError:
+            pass
+    elif isinstance(body, dict):
+        body = json.dumps(body, sort_keys=True, separators=(",", ":"), default=str).encode("utf-8")
+    else:
+        # 无法稳定序列化的请求体(如FormData)不参与匹配
+        return ""
+    return hashlib.sha1(body).hexdigest()[:16]
+
+class Cassette:
+    """请求/响应录制文件
+
+    文件格式为gzip压缩的JSON Lines，每行一次交互；加载后按请求键建立内存索引，
+    同一请求键录制了多次时按录制顺序依次回放，用完后重复最后一次。
+    """
+    def __init__(self, path: Union[str, Path], mode: str = "replay",
+                 match_headers: Tuple[str, ...] = ()):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.match_headers = tuple(match_headers)
+        self._interactions: List[Dict[str, Any]] = []
+        self._index: Dict[str, List[Dict[str, Any]]] = {}
+        self._play_counts: Dict[str, int] = {}
+        # record模式下本次运行重新录制过的请求键
+        self._rerecorded: Set[str] = set()
+        self._dirty = False
+        if mode != "off":
+            # record模式也加载已有记录，只替换本次重新录制的请求，用-k只运行部分用例时不会丢失其他用例的录制
+            self._load()
+
+    @property
+    def active(self) -> bool:
+        return self.mode != "off"
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode in ("replay", "strict")
+
+    @property
+    def recording(self) -> bool:
+        return self.mode in ("record", "replay")
+
+    def __len__(self) -> int:
+        return len(self._interactions)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        with gzip.open(self.path, "rt", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    self._add(json.loads(line))
+        logger.debug(f"Loaded {len(self._interactions)} interactions from cassette {self.path}")
+
+    def _add(self, interaction: Dict[str, Any]):
+        self._interactions.append(interaction)
+        self._index.setdefault(interaction["key"], []).append(interaction["response"])
+
+    def key_for(self, method: str, url: str, params: Optional[Dict] = None,
+                body: Any = None, headers: Optional[Dict] = None) -> str:
+        return request_key(method, url, params, body, headers, self.match_headers)
+
+    def lookup(self, key: str) -> Optional[Dict[str, Any]]:
+        """查找录制的响应，未找到时strict模式抛出CassetteMissError"""
+        responses = self._index.get(key)
+        if not responses:
+            if self.mode == "strict":
+                raise CassetteMissError(f"No recorded interaction for '{key}' in {self.path}")
+            return None
+        played = self._play_counts.get(key, 0)
+        self._play_counts[key] = played + 1
+        return responses[min(played, len(responses) - 1)]
+
+    def record(self, key: str, method: str, url: str, status: int, reason: str,
+               headers: List[Tuple[str, str]], body: bytes) -> None:
+        """记录一次交互，record模式下该请求键本次首次录制时替换文件中原有的记录"""
+        if self.mode == "record" and key not in self._rerecorded:
+            self._rerecorded.add(key)
+            if self._index.pop(key, None) is not None:
+                self._interactions = [interaction for interaction in self._interactions if interaction["key"] != key]
+        try:
+            stored_body, encoding = body.decode("utf-8"), "utf-8"
+        except UnicodeDecodeError:
+            stored_body, encoding = base64.b64encode(body).decode("ascii"), "base64"
+        self._add({
+            "key": key,
+            "request": {"method": method.upper(), "url": url},
+            "response": {
+                "status": status,
+                "reason": reason,
+                # 响应体已解压，去掉与原始编码相关的头
+                "headers": [[k, v] for k, v in headers
+                            if k.lower() not in ("content-encoding", "content-length", "transfer-encoding")],
+                "body": stored_body,
+                "body_encoding": encoding
+            }
+        })
+        self._dirty = True
+
+    @staticmethod
+    def response_body(response: Dict[str, Any]) -> bytes:
+        """还原录制的响应体"""
+        if response.get("body_encoding") == "base64":
+            return base64.b64decode(response["body"])
+        return response["body"].encode("utf-8")
+
+    def save(self):
+        """写入录制文件（仅在有新录制内容时）"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(self.path, "wt", encoding="utf-8") as f:
+            for interaction in self._interactions:
+                f.write(json.dumps(interaction, ensure_ascii=False, separators=(",", ":")))
+                f.write("\n")
+        self._dirty = False
+        logger.debug(f"Saved {len(self._interactions)} interactions to cassette {self.path}")
+
+class CassetteRegistry:
+    """按文件路径共享Cassette实例，会话结束时统一保存"""
+    def __init__(self):
+        self._cassettes: Dict[Path, Cassette] = {}
+
+    def get(self, path: Union[str, Path], mode: str) -> Cassette:
+        path = Path(path)
+        cassette = self._cassettes.get(path)
+        if cassette is None or cassette.mode != mode:
+            cassette = self._cassettes[path] = Cassette(path, mode)
+        return cassette
+
+    def save_all(self):
+        for cassette in self._cassettes.values():
+            cassette.save()
+
+# 创建全局录制文件注册表
+cassette_registry = CassetteRegistry()
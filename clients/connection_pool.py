@@ -0,0 +1,107 @@
+import asyncio
+import ssl
+import weakref
+import aiohttp
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Dict, Any, Optional
+from config.settings import settings
+from clients.dns_cache import dns_cache
+
+@dataclass
+class PoolStats:
+    """连接池复用统计"""
+    hits: int = 0
+    misses: int = 0
+
+    @property
+    def total(self) -> int:
+        """获取连接总次数"""
+        return self.hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """连接复用率"""
+        return self.hits / self.total if self.total else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为字典格式"""
+        return {
+            "pool_hits": self.hits,
+            "pool_misses": self.misses,
+            "hit_rate": round(self.hit_rate, 4)
+        }
+
+class ConnectionPool:
+    """会话级共享连接池，跨测试用例通过keep-alive复用TCP/TLS连接"""
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = settings.pool_config if config is None else config
+        self.stats = PoolStats()
+        # 事件循环 -> connector
+        self._connectors = weakref.WeakKeyDictionary()
+        self._trace_config = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.get("enabled", False))
+
+    @property
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """用于统计连接复用/新建次数的TraceConfig"""
+        if self._trace_config is None:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+            trace_config.on_connection_create_end.append(self._on_connection_create)
+            self._trace_config = trace_config
+        return self._trace_config
+
+    async def _on_connection_reuse(self, session: aiohttp.ClientSession,
+                                   ctx: SimpleNamespace, params: Any) -> None:
+        self.stats.hits += 1
+
+    async def _on_connection_create(self, session: aiohttp.ClientSession,
+                                    ctx: SimpleNamespace, params: Any) -> None:
+        self.stats.misses += 1
+
+    def get_connector(self) -> aiohttp.TCPConnector:
+        """获取当前事件循环上的共享connector
+
+        connector与事件循环绑定，每个事件循环（如pytest会话事件循环和同步客户端的后台事件循环）
+        各自持有一个connector，互不影响
+        """
+        loop = asyncio.get_running_loop()
+        connector = self._connectors.get(loop)
+        if connector is None or connector.closed:
+            # 清理已关闭事件循环上的connector
+            for stale in [l for l in self._connectors if l.is_closed()]:
+                del self._connectors[stale]
+            connector = self._connectors[loop] = aiohttp.TCPConnector(
+                limit=self.config.get("limit", 100),
+                limit_per_host=self.config.get("limit_per_host", 0),
+                keepalive_timeout=self.config.get("keepalive_timeout", 30),
+                enable_cleanup_closed=True,
+                ssl=ssl.create_default_context(),
+                **dns_cache.connector_kwargs()
+            )
+        return connector
+
+    async def close(self):
+        """关闭当前事件循环上的共享connector"""
+        connector = self._connectors.pop(asyncio.get_running_loop(), None)
+        if connector is not None and not connector.closed:
+            await connector.close()
+
+    def close_sync(self):
+        """在事件循环之外关闭所有connector（用于pytest会话结束）"""
+        for loop, connector in list(self._connectors.items()):
+            if connector.closed or loop.is_closed():
+                continue
+            if loop.is_running():
+                # 在其他线程中运行的事件循环（如同步客户端的后台事件循环）
+                asyncio.run_coroutine_threadsafe(connector.close(), loop).result(timeout=5)
+            else:
+                loop.run_until_complete(connector.close())
+        self._connectors.clear()
+
+# 创建全局连接池实例
+connection_pool = ConnectionPool()
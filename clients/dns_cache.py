@@ -0,0 +1,218 @@
+import asyncio
+import socket
+import time
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from urllib.parse import urlparse
+from aiohttp.abc import AbstractResolver
+from config.settings import settings
+from core.logger import logger
+
+try:
+    # dnspython随pymongo安装，仅用于获取DNS记录的TTL
+    import dns.asyncresolver
+    import dns.exception
+except ImportError:  # pragma: no cover
+    dns = None
+
+@dataclass
+class DNSCacheStats:
+    """DNS缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    errors: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """缓存命中率（合并到进行中查询的请求也算命中）"""
+        total = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / total if total else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为字典格式"""
+        return {
+            "dns_hits": self.hits,
+            "dns_misses": self.misses,
+            "dns_coalesced": self.coalesced,
+            "dns_errors": self.errors,
+            "hit_rate": round(self.hit_rate, 4)
+        }
+
+class _LookupCancelled(Exception):
+    """发起解析的请求被取消（如请求超时），合并到该解析的等待者需要自己重新解析"""
+
+class CachingResolver(AbstractResolver):
+    """进程级异步DNS缓存
+
+    - 缓存ttl秒；开启record_ttl时按DNS记录TTL过期(上限为ttl，下限为min_ttl)
+    - 同一host的并发查询只发起一次解析
+    - 解析失败的结果按negative_ttl短暂缓存
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = settings.dns_config if config is None else config
+        self.stats = DNSCacheStats()
+        self._cache: Dict[Tuple[str, int, int], Tuple[float, Any]] = {}
+        self._inflight: Dict[Tuple[str, int, int], asyncio.Future] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.get("cache", True))
+
+    @property
+    def ttl(self) -> float:
+        return float(self.config.get("ttl", 300))
+
+    @property
+    def min_ttl(self) -> float:
+        return float(self.config.get("min_ttl", 5))
+
+    @property
+    def negative_ttl(self) -> float:
+        return float(self.config.get("negative_ttl", 5))
+
+    @property
+    def record_ttl(self) -> bool:
+        """是否额外查询DNS记录的TTL，每次未命中多一次DNS往返，默认关闭"""
+        return bool(self.config.get("record_ttl", False))
+
+    @property
+    def ttl_timeout(self) -> float:
+        return float(self.config.get("ttl_timeout", 0.3))
+
+    async def resolve(self, host: str, port: int = 0,
+                      family: socket.AddressFamily = socket.AF_INET) -> List[Dict[str, Any]]:
+        """解析host，优先返回缓存结果"""
+        key = (host, port, family)
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, result = cached
+            if time.monotonic() < expires_at:
+                self.stats.hits += 1
+                if isinstance(result, Exception):
+                    raise result
+                return list(result)
+            # 并发的解析可能已经删除或替换了过期的记录
+            self._cache.pop(key, None)
+
+        loop = asyncio.get_running_loop()
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.get_loop() is loop:
+            self.stats.coalesced += 1
+            try:
+                return list(await asyncio.shield(inflight))
+            except _LookupCancelled:
+                return await self.resolve(host, port, family)
+
+        self.stats.misses += 1
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            hosts, ttl = await self._lookup(host, port, family)
+            self._cache[key] = (time.monotonic() + ttl, hosts)
+            future.set_result(hosts)
+            return list(hosts)
+        except Exception as e:
+            self.stats.errors += 1
+            self._cache[key] = (time.monotonic() + self.negative_ttl, e)
+            future.set_exception(e)
+            # 避免没有其他等待者时出现"exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if not future.done():
+                # 被取消（CancelledError不是Exception），通知合并到该解析的等待者
+                future.set_exception(_LookupCancelled(host))
+                future.exception()
+
+    async def _lookup(self, host: str, port: int,
+                      family: socket.AddressFamily) -> Tuple[List[Dict[str, Any]], float]:
+        """通过getaddrinfo解析地址(遵循hosts文件)，开启record_ttl时同时查询记录TTL"""
+        if not self.record_ttl:
+            return await self._getaddrinfo(host, port, family), self.ttl
+        hosts, ttl = await asyncio.gather(
+            self._getaddrinfo(host, port, family),
+            self._record_ttl(host, family, self.ttl_timeout)
+        )
+        if ttl is None:
+            ttl = self.ttl
+        return hosts, max(self.min_ttl, min(ttl, self.ttl))
+
+    @staticmethod
+    async def _getaddrinfo(host: str, port: int,
+                           family: socket.AddressFamily) -> List[Dict[str, Any]]:
+        """与aiohttp.ThreadedResolver相同的解析逻辑"""
+        loop = asyncio.get_running_loop()
+        infos = await loop.getaddrinfo(
+            host, port, type=socket.SOCK_STREAM, family=family, flags=socket.AI_ADDRCONFIG
+        )
+        hosts = []
+        for addr_family, _, proto, _, address in infos:
+            if addr_family == socket.AF_INET6:
+                if len(address) < 3:
+                    # Python未启用IPv6支持
+                    continue
+                if address[3]:
+                    # 带scope id的链路本地地址需要转换为"addr%scope"形式
+                    resolved_host, _port = await loop.getnameinfo(
+                        address, socket.NI_NUMERICHOST | socket.NI_NUMERICSERV
+                    )
+                    resolved_port = int(_port)
+                else:
+                    resolved_host, resolved_port = address[:2]
+            else:
+                resolved_host, resolved_port = address
+            hosts.append({
+                "hostname": host,
+                "host": resolved_host,
+                "port": resolved_port,
+                "family": addr_family,
+                "proto": proto,
+                "flags": socket.AI_NUMERICHOST | socket.AI_NUMERICSERV
+            })
+        if not hosts:
+            raise OSError(f"DNS lookup failed for {host}")
+        return hosts
+
+    @staticmethod
+    async def _record_ttl(host: str, family: socket.AddressFamily, timeout: float) -> Optional[float]:
+        """查询DNS记录的TTL，dnspython不可用、查询失败或超过timeout秒时返回None"""
+        if dns is None or host == "localhost" or "." not in host:
+            return None
+        rdtype = "AAAA" if family == socket.AF_INET6 else "A"
+        try:
+            answer = await dns.asyncresolver.resolve(host, rdtype, lifetime=timeout)
+            return float(answer.rrset.ttl)
+        except (dns.exception.DNSException, OSError):
+            return None
+
+    async def prewarm(self, urls: Iterable[str]) -> None:
+        """预先解析给定URL的host，失败只记录日志"""
+        for url in urls:
+            parsed = urlparse(url)
+            if not parsed.hostname:
+                continue
+            port = parsed.port or (443 if parsed.scheme == "https" else 80)
+            try:
+                await self.resolve(parsed.hostname, port, socket.AF_UNSPEC)
+            except OSError as e:
+                logger.warning(f"DNS prewarm failed for {parsed.hostname}: {str(e)}")
+
+    def connector_kwargs(self) -> Dict[str, Any]:
+        """创建TCPConnector时使用的参数，由本缓存替代aiohttp自带的DNS缓存"""
+        if not self.enabled:
+            return {}
+        return {"resolver": self, "use_dns_cache": False}
+
+    def clear(self):
+        """清空缓存"""
+        self._cache.clear()
+
+    async def close(self) -> None:
+        """进程级共享，不随connector关闭"""
+        pass
+
+# 创建全局DNS缓存实例
+dns_cache = CachingResolver()
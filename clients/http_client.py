@@ -1,16 +1,30 @@
 import aiohttp
 import asyncio
 import time
-import socket
 import ssl
-from typing import Dict, Any, Optional, Union, Tuple
+from types import SimpleNamespace
+from typing import Dict, Any, Optional, Union, List, Iterable, AsyncIterator
+from contextlib import asynccontextmanager, AsyncExitStack
 from core.logger import logger
-from dataclasses import dataclass
+from core.json_codec import codec
+from core.latency_baseline import latency_baseline
+from core.latency_budget import latency_budgets
+from core.endpoints import endpoint_template
+from core.metrics import request_metrics
+from core.tracing import tracing
+from clients.connection_pool import connection_pool
+from clients.dns_cache import dns_cache
+from clients.response import APIResponse, ReplayedResponse
+from clients.cassette import Cassette
+from clients.rate_limiter import rate_limiter
+from clients.retry import RetryPolicy, HedgePolicy, hedge_policy, parse_retry_after
+from config.settings import settings
+from dataclasses import dataclass, field
 from datetime import datetime
 
 @dataclass
 class RequestTiming:
-    """请求各阶段耗时"""
+    """请求各阶段耗时，由aiohttp trace钩子填充，未测量的阶段为0"""
     start_time: float = 0.0
     dns_start: float = 0.0
     dns_end: float = 0.0
@@ -22,111 +36,276 @@ class RequestTiming:
     send_end: float = 0.0
     receive_start: float = 0.0
     receive_end: float = 0.0
+    connection_reused: bool = False
+    # 限流排队等待时间(秒)，不计入total_time；未限流时为None
+    queue_wait: Optional[float] = None
+    # 重试与对冲信息，first_start为首次尝试的开始时间
+    first_start: float = 0.0
+    attempts: int = 1
+    retry_wait: float = 0.0
+    hedged: bool = False
+    hedge_won: bool = False
+
+    @staticmethod
+    def _elapsed(start: float, end: float) -> Optional[float]:
+        return end - start if start > 0 and end > 0 else None
 
     @property
-    def dns_time(self) -> float:
-        """DNS解析耗时"""
-        return self.dns_end - self.dns_start if self.dns_end > 0 else 0
+    def dns_time(self) -> Optional[float]:
+        """DNS解析耗时，命中缓存或复用连接时为None"""
+        return self._elapsed(self.dns_start, self.dns_end)
 
     @property
-    def connect_time(self) -> float:
-        """TCP连接耗时"""
-        return self.connect_end - self.connect_start if self.connect_end > 0 else 0
+    def connect_time(self) -> Optional[float]:
+        """建立连接耗时(HTTPS包含TLS握手)，复用连接时为None"""
+        return self._elapsed(self.connect_start, self.connect_end)
 
     @property
-    def ssl_time(self) -> float:
-        """SSL/TLS握手耗时"""
-        return self.ssl_end - self.ssl_start if self.ssl_end > 0 else 0
+    def ssl_time(self) -> Optional[float]:
+        """SSL/TLS握手耗时，aiohttp未单独暴露该阶段，计入connect_time"""
+        return self._elapsed(self.ssl_start, self.ssl_end)
 
     @property
-    def send_time(self) -> float:
+    def send_time(self) -> Optional[float]:
         """请求发送耗时"""
-        return self.send_end - self.send_start if self.send_end > 0 else 0
+        return self._elapsed(self.send_start, self.send_end)
+
+    @property
+    def server_time(self) -> Optional[float]:
+        """请求发送完成到收到响应头的耗时(服务端处理+网络往返)"""
+        return self._elapsed(self.send_end, self.receive_start)
 
     @property
-    def receive_time(self) -> float:
-        """响应接收耗时"""
-        return self.receive_end - self.receive_start if self.receive_end > 0 else 0
+    def receive_time(self) -> Optional[float]:
+        """响应体接收耗时"""
+        return self._elapsed(self.receive_start, self.receive_end)
 
     @property
-    def total_time(self) -> float:
+    def total_time(self) -> Optional[float]:
         """总耗时"""
-        return self.receive_end - self.start_time if self.receive_end > 0 else 0
+        return self._elapsed(self.start_time, self.receive_end)
+
+    @property
+    def end_to_end_time(self) -> Optional[float]:
+        """包含重试和退避等待在内的端到端耗时"""
+        return self._elapsed(self.first_start or self.start_time, self.receive_end)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式，耗时单位为毫秒，未测量的阶段为None"""
+        def _ms(value: Optional[float]) -> Optional[float]:
+            return round(value * 1000, 2) if value is not None else None
 
-    def to_dict(self) -> Dict[str, float]:
-        """转换为字典格式"""
         return {
-            "dns_resolution": round(self.dns_time * 1000, 2),  # 转换为毫秒
-            "tcp_connection": round(self.connect_time * 1000, 2),
-            "ssl_handshake": round(self.ssl_time * 1000, 2),
-            "request_send": round(self.send_time * 1000, 2),
-            "response_receive": round(self.receive_time * 1000, 2),
-            "total_time": round(self.total_time * 1000, 2)
+            "dns_resolution": _ms(self.dns_time),
+            "tcp_connection": _ms(self.connect_time),
+            "ssl_handshake": _ms(self.ssl_time),
+            "request_send": _ms(self.send_time),
+            "server_processing": _ms(self.server_time),
+            "response_receive": _ms(self.receive_time),
+            "total_time": _ms(self.total_time),
+            "end_to_end_time": _ms(self.end_to_end_time),
+            "connection_reused": self.connection_reused,
+            "queue_wait": _ms(self.queue_wait),
+            "attempts": self.attempts,
+            "retry_wait": _ms(self.retry_wait),
+            "hedged": self.hedged,
+            "hedge_won": self.hedge_won
         }
 
 class TimingTracker:
-    """请求耗时追踪器"""
+    """请求耗时追踪器，通过trace_request_ctx接收aiohttp的trace事件"""
+    _trace_config: Optional[aiohttp.TraceConfig] = None
+
     def __init__(self):
-        self.timing = RequestTiming(start_time=time.time())
+        self.timing = RequestTiming()
 
-    async def track_dns_resolution(self, host: str) -> Tuple[str, float]:
-        """追踪DNS解析耗时"""
-        self.timing.dns_start = time.time()
-        try:
-            # 异步DNS解析
-            loop = asyncio.get_event_loop()
-            ip = await loop.run_in_executor(
-                None, 
-                socket.gethostbyname, 
-                host
-            )
-            self.timing.dns_end = time.time()
-            return ip, self.timing.dns_time
-        except Exception as e:
-            logger.error(f"DNS resolution failed: {str(e)}")
-            self.timing.dns_end = time.time()
-            raise
+    @classmethod
+    def trace_config(cls) -> aiohttp.TraceConfig:
+        """所有session共用的TraceConfig，只记录时间戳，不产生额外网络开销"""
+        if cls._trace_config is None:
+            trace_config = aiohttp.TraceConfig()
+            trace_config.on_request_start.append(cls._on_request_start)
+            trace_config.on_dns_resolvehost_start.append(cls._mark("dns_start"))
+            trace_config.on_dns_resolvehost_end.append(cls._mark("dns_end"))
+            trace_config.on_connection_create_start.append(cls._mark("connect_start"))
+            trace_config.on_connection_create_end.append(cls._on_connection_ready)
+            trace_config.on_connection_reuseconn.append(cls._on_connection_reuse)
+            trace_config.on_request_headers_sent.append(cls._on_request_sent)
+            trace_config.on_request_chunk_sent.append(cls._on_request_sent)
+            trace_config.on_request_end.append(cls._mark("receive_start"))
+            cls._trace_config = trace_config
+        return cls._trace_config
+
+    @staticmethod
+    def _timing(ctx: SimpleNamespace) -> Optional[RequestTiming]:
+        tracker = ctx.trace_request_ctx
+        return tracker.timing if isinstance(tracker, TimingTracker) else None
+
+    @classmethod
+    def _mark(cls, field: str):
+        """生成记录指定阶段时间戳的钩子"""
+        async def _hook(session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any) -> None:
+            timing = cls._timing(ctx)
+            if timing is not None:
+                setattr(timing, field, time.perf_counter())
+        return _hook
+
+    @classmethod
+    async def _on_request_start(cls, session: aiohttp.ClientSession,
+                                ctx: SimpleNamespace, params: Any) -> None:
+        timing = cls._timing(ctx)
+        # 重定向时会再次触发，保留首次请求的开始时间
+        if timing is not None and timing.start_time == 0:
+            timing.start_time = time.perf_counter()
+
+    @classmethod
+    async def _on_connection_ready(cls, session: aiohttp.ClientSession,
+                                   ctx: SimpleNamespace, params: Any) -> None:
+        timing = cls._timing(ctx)
+        if timing is not None:
+            timing.connect_end = timing.send_start = time.perf_counter()
+
+    @classmethod
+    async def _on_connection_reuse(cls, session: aiohttp.ClientSession,
+                                   ctx: SimpleNamespace, params: Any) -> None:
+        timing = cls._timing(ctx)
+        if timing is not None:
+            timing.connection_reused = True
+            timing.send_start = time.perf_counter()
+
+    @classmethod
+    async def _on_request_sent(cls, session: aiohttp.ClientSession,
+                               ctx: SimpleNamespace, params: Any) -> None:
+        timing = cls._timing(ctx)
+        if timing is not None:
+            # 请求头和每个请求体分块发送后都会触发，取最后一次
+            timing.send_end = time.perf_counter()
+
+@dataclass
+class RequestSpec:
+    """请求描述，用于批量请求和压测"""
+    method: str
+    endpoint: str
+    params: Optional[Dict] = None
+    json: Optional[Union[Dict, List, bytes]] = None
+    headers: Optional[Dict] = None
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+
+    def to_kwargs(self) -> Dict[str, Any]:
+        """转换为HTTPClient.request的参数"""
+        return {
+            "method": self.method,
+            "endpoint": self.endpoint,
+            "params": self.params,
+            "json": self.json,
+            "headers": self.headers,
+            **self.kwargs
+        }
+
+    @classmethod
+    def from_value(cls, value: Union["RequestSpec", Dict[str, Any]]) -> "RequestSpec":
+        """从RequestSpec或request()参数字典构造"""
+        if isinstance(value, RequestSpec):
+            return value
+        value = dict(value)
+        return cls(
+            method=value.pop("method"),
+            endpoint=value.pop("endpoint"),
+            params=value.pop("params", None),
+            json=value.pop("json", None),
+            headers=value.pop("headers", None),
+            kwargs=value
+        )
+
+@dataclass
+class RequestResult:
+    """批量请求中单个请求的结果，失败时记录异常而不抛出"""
+    index: int
+    # 无法转换为RequestSpec时（如缺少method/endpoint）为None，转换异常记录在error中
+    spec: Optional[RequestSpec]
+    response: Optional[APIResponse] = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    @property
+    def timing(self) -> Optional["RequestTiming"]:
+        return getattr(self.response, "timing", None)
 
 class HTTPClient:
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        pooled: Optional[bool] = None,
+        verbose: bool = True,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge: Optional[HedgePolicy] = None,
+        cassette: Optional[Cassette] = None,
+        rate_limited: Optional[bool] = None
+    ):
         self.base_url = base_url
+        # 录制/回放文件，为None时直接访问网络
+        self.cassette = cassette
+        # 超时(api.timeout)与重试次数(api.retry_times)取自配置文件
+        self.timeout = aiohttp.ClientTimeout(total=settings.api_config.get("timeout"))
+        self.retry_policy = retry_policy or RetryPolicy.from_config(settings.api_config)
+        self.hedge_policy = hedge or hedge_policy
+        # verbose为False时不输出请求/响应日志（压测等高频场景）
+        self.verbose = verbose
+        # pooled为None时使用配置文件中的api.pool.enabled
+        self.pooled = connection_pool.enabled if pooled is None else pooled
+        # rate_limited为None时使用配置文件中的api.rate_limit.enabled
+        self.rate_limited = rate_limiter.enabled if rate_limited is None else rate_limited
         self._session = None
         self._connector = None
 
     async def _get_session(self) -> aiohttp.ClientSession:
+        if self.pooled:
+            return await self._get_pooled_session()
         if self._session is None or self._session.closed:
             # 创建带有TCP连接追踪的connector
             self._connector = aiohttp.TCPConnector(
                 enable_cleanup_closed=True,
                 force_close=True,
-                ssl=ssl.create_default_context()
+                ssl=ssl.create_default_context(),
+                **dns_cache.connector_kwargs()
+            )
+            self._session = aiohttp.ClientSession(
+                connector=self._connector,
+                timeout=self.timeout,
+                response_class=APIResponse,
+                trace_configs=[TimingTracker.trace_config()]
             )
-            self._session = aiohttp.ClientSession(connector=self._connector)
         return self._session
 
-    async def _parse_response(self, response: aiohttp.ClientResponse) -> Union[Dict, str]:
-        """解析响应内容"""
-        content_type = response.headers.get('Content-Type', '')
-        try:
-            if 'application/json' in content_type:
-                return await response.json()
-            elif 'text/html' in content_type:
-                return await response.text()
-            else:
-                return await response.text()
-        except Exception as e:
-            logger.error(f"Failed to parse response: {str(e)}")
-            return await response.text()
+    async def _get_pooled_session(self) -> aiohttp.ClientSession:
+        """使用会话级共享连接池的session，连接在测试用例之间复用"""
+        connector = connection_pool.get_connector()
+        if self._session is None or self._session.closed or self._connector is not connector:
+            self._connector = connector
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                connector_owner=False,
+                timeout=self.timeout,
+                response_class=APIResponse,
+                trace_configs=[TimingTracker.trace_config(), connection_pool.trace_config]
+            )
+        return self._session
 
-    async def request(
+    @asynccontextmanager
+    async def _open(
         self,
         method: str,
         endpoint: str,
         params: Optional[Dict] = None,
-        json: Optional[Dict] = None,
+        json: Optional[Union[Dict, List, bytes]] = None,
         headers: Optional[Dict] = None,
         **kwargs
-    ) -> aiohttp.ClientResponse:
+    ) -> AsyncIterator[Union[APIResponse, ReplayedResponse]]:
+        """发送请求，返回尚未读取响应体的响应对象，命中录制记录时返回回放响应"""
         url = f"{self.base_url}{endpoint}"
         session = await self._get_session()
         
@@ -138,63 +317,328 @@ class HTTPClient:
         
         # 创建耗时追踪器
         tracker = TimingTracker()
+        received = False
+        status = None
+        error = None
+        # 链路追踪开启时，每次请求一个span，作为当前用例span的子span
+        span = tracing.start_request_span(method, url)
         
         try:
-            # DNS解析
-            from urllib.parse import urlparse
-            host = urlparse(url).netloc
-            await tracker.track_dns_resolution(host)
+            # 记录请求信息，按接口采样决定是否记录请求/响应体
+            log_body = self.verbose and logger.sample_body(method, endpoint)
+            if self.verbose:
+                logger.log_request(
+                    method=method,
+                    url=url,
+                    # 日志在后台线程中格式化，传入副本，之后注入的traceparent不影响已记录的请求头
+                    headers=dict(merged_headers),
+                    params=params,
+                    data=json,
+                    log_body=log_body
+                )
             
-            # 记录请求信息
-            logger.log_request(
-                method=method,
-                url=url,
-                headers=merged_headers,
-                params=params,
-                data=json
-            )
+            # 请求体由统一的编解码器序列化，bytes视为已编码的JSON直接发送
+            if json is not None:
+                if "data" in kwargs:
+                    raise ValueError("data and json parameters can not be used at the same time")
+                kwargs["data"] = json if isinstance(json, (bytes, bytearray)) else codec.dumps(json)
             
-            # TCP连接和请求发送
-            tracker.timing.connect_start = time.time()
-            async with session.request(
-                method=method,
-                url=url,
-                params=params,
-                json=json,
-                headers=merged_headers,
-                **kwargs
-            ) as response:
-                tracker.timing.connect_end = time.time()
-                
-                # SSL/TLS握手时间（如果是HTTPS）
-                if url.startswith('https'):
-                    tracker.timing.ssl_start = tracker.timing.connect_end
-                    tracker.timing.ssl_end = time.time()
-                
-                # 接收响应
-                tracker.timing.receive_start = time.time()
-                response_data = await self._parse_response(response)
-                tracker.timing.receive_end = time.time()
-                
-                # 记录响应信息和耗时分析
-                logger.log_response(
-                    status_code=response.status,
-                    response_data=response_data,
-                    timing=tracker.timing.to_dict()
+            # 录制回放：命中录制记录时不访问网络
+            cassette_key = None
+            if self.cassette is not None and self.cassette.active:
+                cassette_key = self.cassette.key_for(
+                    method, url, params, kwargs.get("data"), merged_headers
                 )
+                recorded = self.cassette.lookup(cassette_key) if self.cassette.replaying else None
+                if recorded is not None:
+                    tracker.timing.start_time = tracker.timing.receive_start = time.perf_counter()
+                    received = True
+                    replayed = ReplayedResponse(
+                        method=method,
+                        url=url,
+                        status=recorded["status"],
+                        reason=recorded.get("reason", ""),
+                        headers=recorded["headers"],
+                        body=Cassette.response_body(recorded),
+                        timing=tracker.timing
+                    )
+                    replayed.log_body = log_body
+                    status = replayed.status
+                    yield replayed
+                    return
+            
+            async with AsyncExitStack() as stack:
+                # 按host限流，并发名额在响应体读取完毕后释放
+                limiter = rate_limiter.for_url(url) if self.rate_limited else None
+                if limiter is not None:
+                    tracker.timing.queue_wait = await stack.enter_async_context(limiter.slot())
                 
-                # 将解析后的数据附加到响应对象
-                setattr(response, 'data', response_data)
-                setattr(response, 'timing', tracker.timing)
-                return response
+                # 录制键计算之后再注入traceparent，避免影响回放匹配
+                tracing.inject(merged_headers, span)
+                # DNS解析、建立连接、发送请求的耗时由trace钩子记录
+                response = await stack.enter_async_context(session.request(
+                    method=method,
+                    url=url,
+                    params=params,
+                    headers=merged_headers,
+                    trace_request_ctx=tracker,
+                    **kwargs
+                ))
+                if limiter is not None:
+                    limiter.on_response(response.status, parse_retry_after(response.headers.get("Retry-After")))
+                response.timing = tracker.timing
+                response.cassette_key = cassette_key
+                response.log_body = log_body
+                received = True
+                status = response.status
+                yield response
                 
         except Exception as e:
-            logger.error(f"Request failed: {str(e)}", exc_info=True)
+            # 调用方处理响应时抛出的异常不属于请求失败
+            if not received:
+                error = e
+                if request_metrics.enabled:
+                    request_metrics.observe_error(method, endpoint, e)
+                if self.verbose:
+                    logger.error(f"Request failed: {str(e)}", exc_info=True)
             raise
         finally:
             # 确保记录总耗时
             if tracker.timing.receive_end == 0:
-                tracker.timing.receive_end = time.time()
+                tracker.timing.receive_end = time.perf_counter()
+            tracing.end_request_span(span, tracker.timing, status, error)
+
+    async def request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        json: Optional[Union[Dict, List, bytes]] = None,
+        headers: Optional[Dict] = None,
+        **kwargs
+    ) -> APIResponse:
+        """发送请求，幂等请求按重试策略退避重试，慢请求按对冲策略发送对冲请求
+
+        api.timeout是包括重试和退避等待在内的总时限，每次尝试只使用剩余的时间，
+        退避后会超出总时限时不再重试；调用方传入timeout时按其设置每次尝试的超时。
+        """
+        key = f"{method.upper()} {endpoint}"
+        # 对冲的延迟样本按接口模板聚合，/users/1与/users/2共用样本
+        hedge_key = f"{method.upper()} {endpoint_template(endpoint)}"
+        first_start = time.perf_counter()
+        deadline = None if "timeout" in kwargs or self.timeout.total is None else first_start + self.timeout.total
+        attempt = 0
+        retry_wait = 0.0
+        while True:
+            attempt += 1
+            if deadline is not None:
+                kwargs["timeout"] = aiohttp.ClientTimeout(total=max(deadline - time.perf_counter(), 0.001))
+            hedge_delay = self.hedge_policy.delay_for(method, hedge_key)
+            try:
+                if hedge_delay is None:
+                    response = await self._fetch(method, endpoint, params, json, headers, **kwargs)
+                else:
+                    response = await self._fetch_hedged(
+                        hedge_delay, method, endpoint, params, json, headers, **kwargs
+                    )
+            except self.retry_policy.retry_exceptions as e:
+                if not self.retry_policy.can_retry(method, attempt):
+                    raise
+                wait = self.retry_policy.backoff(attempt)
+                if deadline is not None and time.perf_counter() + wait >= deadline:
+                    raise
+                reason = type(e).__name__
+            else:
+                retry = response.status in self.retry_policy.retry_statuses \
+                    and self.retry_policy.can_retry(method, attempt)
+                if retry:
+                    wait = self.retry_policy.backoff(
+                        attempt, parse_retry_after(response.headers.get("Retry-After"))
+                    )
+                    if isinstance(response, ReplayedResponse):
+                        wait = 0.0
+                    retry = deadline is None or time.perf_counter() + wait < deadline
+                if not retry:
+                    timing = response.timing
+                    timing.first_start = first_start
+                    timing.attempts = attempt
+                    timing.retry_wait = retry_wait
+                    # 回放的响应耗时不代表真实延迟，不计入对冲样本
+                    if response.status < 500 and timing.total_time is not None \
+                            and not isinstance(response, ReplayedResponse):
+                        self.hedge_policy.record(hedge_key, timing.total_time)
+                    return response
+                reason = f"HTTP {response.status}"
+            if self.verbose:
+                logger.warning(
+                    f"{key} failed with {reason}, retry {attempt}/{self.retry_policy.max_retries} "
+                    f"in {wait * 1000:.0f}ms"
+                )
+            retry_wait += wait
+            await asyncio.sleep(wait)
+
+    async def _fetch_hedged(self, delay: float, method: str, endpoint: str, *args, **kwargs) -> APIResponse:
+        """请求在delay秒内未返回时发送对冲请求，返回先成功的响应"""
+        primary = asyncio.ensure_future(self._fetch(method, endpoint, *args, **kwargs))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        
+        if self.verbose:
+            logger.debug(f"{method.upper()} {endpoint} exceeded {delay * 1000:.0f}ms, sending hedged request")
+        hedge = asyncio.ensure_future(self._fetch(method, endpoint, *args, **kwargs))
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        response = task.result()
+                        response.timing.hedged = True
+                        response.timing.hedge_won = task is hedge
+                        return response
+            # 两个请求都失败时抛出原请求的异常
+            return primary.result()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _fetch(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        json: Optional[Union[Dict, List, bytes]] = None,
+        headers: Optional[Dict] = None,
+        **kwargs
+    ) -> APIResponse:
+        """发送单次请求并读取响应体"""
+        async with self._open(method, endpoint, params, json, headers, **kwargs) as response:
+            # 接收响应，解码延迟到首次访问response.data
+            try:
+                body = await response.read()
+            except Exception as e:
+                if self.verbose:
+                    logger.error(f"Failed to read response: {str(e)}", exc_info=True)
+                raise
+            response.timing.receive_end = time.perf_counter()
+            # 回放的响应耗时不代表真实延迟，不计入指标和延迟预算
+            if not isinstance(response, ReplayedResponse):
+                if request_metrics.enabled:
+                    request_metrics.observe(method, endpoint, response.status, response.timing)
+                if latency_budgets.enabled:
+                    latency_budgets.record(method, endpoint, response.timing)
+                if latency_baseline.enabled:
+                    latency_baseline.record(method, endpoint, response.timing)
+            
+            if response.cassette_key is not None and self.cassette.recording:
+                self.cassette.record(
+                    response.cassette_key, method, str(response.url), response.status,
+                    response.reason or "", list(response.headers.items()), body
+                )
+            
+            # 记录响应信息和耗时分析
+            if self.verbose:
+                # 原始响应体交给日志线程格式化，不在此处解码response.data
+                logger.log_response(
+                    status_code=response.status,
+                    response_data=body,
+                    timing=response.timing.to_dict(),
+                    content_type=response.headers.get("Content-Type", ""),
+                    log_body=response.log_body
+                )
+            return response
+
+    @asynccontextmanager
+    async def stream(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        json: Optional[Union[Dict, List, bytes]] = None,
+        headers: Optional[Dict] = None,
+        **kwargs
+    ) -> AsyncIterator[APIResponse]:
+        """流式请求，响应体通过iter_chunks/iter_ndjson/iter_json_array按需读取
+
+        async with client.stream("GET", "/export") as response:
+            async for item in response.iter_json_array():
+                ...
+        """
+        async with self._open(method, endpoint, params, json, headers, **kwargs) as response:
+            if self.verbose:
+                logger.log_response(
+                    status_code=response.status,
+                    response_data=f"<streamed, Content-Length: {response.content_length}>"
+                )
+            yield response
+
+    async def _run_spec(self, index: int, value: Union[RequestSpec, Dict[str, Any]]) -> RequestResult:
+        try:
+            spec = RequestSpec.from_value(value)
+        except Exception as e:
+            return RequestResult(index=index, spec=None, error=e)
+        result = RequestResult(index=index, spec=spec)
+        start = time.perf_counter()
+        try:
+            result.response = await self.request(**spec.to_kwargs())
+        except Exception as e:
+            result.error = e
+        result.elapsed = time.perf_counter() - start
+        return result
+
+    async def iter_many(
+        self,
+        specs: Iterable[Union[RequestSpec, Dict[str, Any]]],
+        concurrency: int = 10
+    ) -> AsyncIterator[RequestResult]:
+        """并发执行一批请求，按完成顺序逐个返回结果
+
+        最多concurrency个请求同时进行，specs按需读取，适合大批量请求
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        spec_iter = enumerate(specs)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def _worker():
+            try:
+                for index, spec in spec_iter:
+                    await results.put(await self._run_spec(index, spec))
+            except Exception as e:
+                # specs迭代时抛出的异常交给调用方
+                results.put_nowait(e)
+            finally:
+                # 无论正常结束还是出错都通知调用方该worker已结束，否则调用方一直等待
+                results.put_nowait(None)
+
+        workers = [asyncio.ensure_future(_worker()) for _ in range(concurrency)]
+        try:
+            finished = 0
+            while finished < len(workers):
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                elif isinstance(result, Exception):
+                    raise result
+                else:
+                    yield result
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def request_many(
+        self,
+        specs: Iterable[Union[RequestSpec, Dict[str, Any]]],
+        concurrency: int = 10
+    ) -> List[RequestResult]:
+        """并发执行一批请求，按输入顺序返回结果，单个请求的异常记录在结果中"""
+        results = [result async for result in self.iter_many(specs, concurrency)]
+        results.sort(key=lambda result: result.index)
+        return results
 
     async def close(self):
         """关闭会话"""
@@ -0,0 +1,193 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, Union, Callable, Awaitable
+from clients.http_client import HTTPClient, RequestSpec, RequestTiming
+from core.logger import logger
+from utils.latency_histogram import LatencyHistogram
+
+# 压测场景：接收HTTPClient的异步函数，返回响应对象（带timing时记录分阶段耗时）
+Scenario = Callable[[HTTPClient], Awaitable[Any]]
+
+# 参与统计的RequestTiming阶段
+TIMING_PHASES = {
+    "queue": "queue_wait",
+    "dns": "dns_time",
+    "connect": "connect_time",
+    "send": "send_time",
+    "server": "server_time",
+    "receive": "receive_time",
+    "total": "total_time",
+}
+
+@dataclass
+class LoadReport:
+    """压测结果"""
+    mode: str
+    target: float
+    duration: float = 0.0
+    scheduled: int = 0
+    completed: int = 0
+    dropped: int = 0
+    status_counts: Dict[int, int] = field(default_factory=dict)
+    errors: Dict[str, int] = field(default_factory=dict)
+    # 从计划发送时间开始计算的延迟，包含客户端排队时间（修正协调遗漏）
+    response_time: LatencyHistogram = field(default_factory=LatencyHistogram)
+    # 各阶段耗时
+    phases: Dict[str, LatencyHistogram] = field(default_factory=dict)
+
+    @property
+    def throughput(self) -> float:
+        """完成请求的吞吐量(req/s)"""
+        return self.completed / self.duration if self.duration else 0.0
+
+    @property
+    def error_count(self) -> int:
+        return sum(self.errors.values())
+
+    def record_phases(self, timing: RequestTiming) -> None:
+        """记录RequestTiming中已测量的阶段，未测量的阶段（如未限流时的queue）为None，不记录"""
+        for phase, attr in TIMING_PHASES.items():
+            value = getattr(timing, attr)
+            if value is not None:
+                self.phases.setdefault(phase, LatencyHistogram()).record(value * 1000)
+
+    def record_error(self, name: str) -> None:
+        self.errors[name] = self.errors.get(name, 0) + 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        """转换为字典格式，耗时单位为毫秒"""
+        return {
+            "mode": self.mode,
+            "target": self.target,
+            "duration": round(self.duration, 3),
+            "scheduled": self.scheduled,
+            "completed": self.completed,
+            "dropped": self.dropped,
+            "throughput": round(self.throughput, 2),
+            "status_counts": dict(sorted(self.status_counts.items())),
+            "errors": dict(self.errors),
+            "response_time": self.response_time.summary(),
+            "phases": {phase: hist.summary() for phase, hist in self.phases.items()}
+        }
+
+class LoadRunner:
+    """基于HTTPClient的压测执行器
+
+    - rate模式为开环调度：按目标速率计划发送时间，不等待前一个请求完成，
+      服务端变慢时不会降低实际施加的负载；延迟从计划发送时间开始计算
+    - concurrency模式为闭环调度：固定数量的worker循环执行
+    """
+    def __init__(
+        self,
+        client: HTTPClient,
+        target: Union[RequestSpec, Scenario],
+        rate: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        duration: float = 10.0,
+        arrival: str = "uniform",
+        max_in_flight: int = 10000,
+        quiet: bool = True
+    ):
+        if (rate is None) == (concurrency is None):
+            raise ValueError("Exactly one of rate or concurrency must be set")
+        if arrival not in ("uniform", "poisson"):
+            raise ValueError(f"Unsupported arrival distribution: {arrival}")
+        self.client = client
+        self.scenario = self._as_scenario(target)
+        self.rate = rate
+        self.concurrency = concurrency
+        self.duration = duration
+        self.arrival = arrival
+        self.max_in_flight = max_in_flight
+        self.quiet = quiet
+
+    @staticmethod
+    def _as_scenario(target: Union[RequestSpec, Scenario]) -> Scenario:
+        if isinstance(target, RequestSpec):
+            async def _request(client: HTTPClient) -> Any:
+                return await client.request(**target.to_kwargs())
+            return _request
+        return target
+
+    async def run(self) -> LoadReport:
+        """执行压测并返回结果"""
+        verbose = self.client.verbose
+        if self.quiet:
+            self.client.verbose = False
+        try:
+            if self.rate is not None:
+                report = await self._run_open_loop()
+            else:
+                report = await self._run_closed_loop()
+        finally:
+            self.client.verbose = verbose
+        logger.info("Load test finished", report=report.to_dict())
+        return report
+
+    async def _execute(self, report: LoadReport, intended_start: float) -> None:
+        """执行一次场景并记录结果"""
+        try:
+            response = await self.scenario(self.client)
+        except Exception as e:
+            report.record_error(type(e).__name__)
+        else:
+            status = getattr(response, "status", None)
+            if status is not None:
+                report.status_counts[status] = report.status_counts.get(status, 0) + 1
+                if status >= 400:
+                    report.record_error(f"HTTP {status}")
+            timing = getattr(response, "timing", None)
+            if isinstance(timing, RequestTiming):
+                report.record_phases(timing)
+        finally:
+            report.completed += 1
+            report.response_time.record((time.perf_counter() - intended_start) * 1000)
+
+    def _next_interval(self) -> float:
+        if self.arrival == "poisson":
+            return random.expovariate(self.rate)
+        return 1.0 / self.rate
+
+    async def _run_open_loop(self) -> LoadReport:
+        report = LoadReport(mode="rate", target=self.rate)
+        tasks = set()
+        start = time.perf_counter()
+        deadline = start + self.duration
+        next_send = start
+        while next_send < deadline:
+            now = time.perf_counter()
+            if next_send > now:
+                await asyncio.sleep(next_send - now)
+            # 休眠精度有限，一次性发出所有已到计划时间的请求
+            now = time.perf_counter()
+            while next_send <= now and next_send < deadline:
+                report.scheduled += 1
+                if len(tasks) >= self.max_in_flight:
+                    # 客户端自身饱和，记录为丢弃而不是悄悄降低负载
+                    report.dropped += 1
+                    report.record_error("client_overloaded")
+                else:
+                    task = asyncio.ensure_future(self._execute(report, next_send))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                next_send += self._next_interval()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        report.duration = time.perf_counter() - start
+        return report
+
+    async def _run_closed_loop(self) -> LoadReport:
+        report = LoadReport(mode="concurrency", target=self.concurrency)
+        start = time.perf_counter()
+        deadline = start + self.duration
+
+        async def _worker():
+            while time.perf_counter() < deadline:
+                report.scheduled += 1
+                await self._execute(report, time.perf_counter())
+
+        await asyncio.gather(*(_worker() for _ in range(self.concurrency)))
+        report.duration = time.perf_counter() - start
+        return report
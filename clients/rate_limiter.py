@@ -0,0 +1,235 @@
+import asyncio
+import math
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, AsyncIterator, Deque, Optional
+from urllib.parse import urlsplit
+from config.settings import settings
+from core.logger import logger
+
+# 触发限流自适应的状态码，503仅在带Retry-After时视为限流
+THROTTLE_STATUSES = frozenset({429})
+
+def worker_count() -> int:
+    """pytest-xdist的worker数，未使用xdist时为1"""
+    try:
+        return max(1, int(os.getenv("PYTEST_XDIST_WORKER_COUNT", "1")))
+    except ValueError:
+        return 1
+
+@dataclass
+class RateLimitStats:
+    """限流统计"""
+    requests: int = 0
+    queued: int = 0
+    throttled: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.requests += 1
+        if wait > 0.001:
+            self.queued += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    @property
+    def avg_wait(self) -> float:
+        """平均排队时间(秒)"""
+        return self.total_wait / self.requests if self.requests else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        """转换为字典格式，等待时间单位为毫秒"""
+        return {
+            "requests": self.requests,
+            "queued": self.queued,
+            "throttled": self.throttled,
+            "avg_wait": round(self.avg_wait * 1000, 2),
+            "max_wait": round(self.max_wait * 1000, 2)
+        }
+
+class HostLimiter:
+    """单个host的令牌桶限速 + 最大并发数限制
+
+    adaptive为True时按AIMD调整速率：收到429后速率乘以decrease_factor（冷却期内只降一次），
+    之后每秒的成功请求使速率增加increase_step，直到配置的上限。
+    减速以最近观测到的请求速率为基准；未配置rate时不限速，首次收到429后开始限速。
+    """
+    def __init__(
+        self,
+        host: str,
+        rate: Optional[float] = None,
+        burst: float = 1.0,
+        max_in_flight: Optional[int] = None,
+        adaptive: bool = True,
+        min_rate: float = 1.0,
+        decrease_factor: float = 0.7,
+        increase_step: float = 2.0,
+        cooldown: float = 1.0
+    ):
+        self.host = host
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_in_flight = max_in_flight
+        self.adaptive = adaptive
+        self.min_rate = min_rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.cooldown = cooldown
+        self.stats = RateLimitStats()
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._generation = 0
+        self._last_decrease = 0.0
+        self._recent: Deque[float] = deque(maxlen=100)
+        # 同一进程内多个事件循环（如同步客户端的后台线程）共享令牌桶，补充和消费令牌需加锁
+        self._lock = threading.Lock()
+        # 事件循环 -> Semaphore，并发数限制在每个事件循环内生效
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def from_config(cls, host: str, config: Dict[str, Any], workers: int = 1) -> "HostLimiter":
+        """从配置创建，速率、突发量和并发数按workers均分"""
+        rate = config.get("rate")
+        max_in_flight = config.get("max_in_flight")
+        min_rate = float(config.get("min_rate", 1.0))
+        return cls(
+            host=host,
+            rate=max(float(rate) / workers, min_rate / workers) if rate else None,
+            burst=float(config.get("burst", 1)) / workers,
+            max_in_flight=max(1, math.ceil(int(max_in_flight) / workers)) if max_in_flight else None,
+            adaptive=bool(config.get("adaptive", True)),
+            min_rate=min_rate / workers,
+            decrease_factor=float(config.get("decrease_factor", 0.7)),
+            increase_step=float(config.get("increase_step", 2.0)) / workers,
+            cooldown=float(config.get("cooldown", 1.0))
+        )
+
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        if self.max_in_flight is None:
+            return None
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_in_flight)
+        return semaphore
+
+    def _reserve(self, now: float) -> float:
+        """预约一个令牌，返回需要等待的秒数；令牌不足时记为欠额，按预约顺序依次放行"""
+        with self._lock:
+            self._recent.append(now)
+            if self.rate is None:
+                return max(0.0, self._updated - now)
+            if now > self._updated:
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1
+            return max(0.0, self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+    async def _wait_for_token(self) -> None:
+        while True:
+            generation = self._generation
+            wait = self._reserve(time.monotonic())
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+            if generation == self._generation:
+                return
+            # 等待期间触发了限流，之前的预约作废，重新排队
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[float]:
+        """获取请求许可，返回排队等待的秒数，响应处理完毕后释放并发名额"""
+        start = time.perf_counter()
+        semaphore = self._get_semaphore()
+        if semaphore is not None:
+            await semaphore.acquire()
+        try:
+            await self._wait_for_token()
+            waited = time.perf_counter() - start
+            self.stats.record_wait(waited)
+            yield waited
+        finally:
+            if semaphore is not None:
+                semaphore.release()
+
+    def _observed_rate(self, now: float) -> float:
+        """最近100次请求的平均速率(req/s)"""
+        if len(self._recent) < 2:
+            return self.min_rate
+        return len(self._recent) / max(now - self._recent[0], 1e-3)
+
+    def on_response(self, status: int, retry_after: Optional[float] = None) -> None:
+        """根据响应调整速率：限流时乘性减小并暂停到Retry-After，成功时加性增大"""
+        now = time.monotonic()
+        if status in THROTTLE_STATUSES or (status == 503 and retry_after is not None):
+            with self._lock:
+                self.stats.throttled += 1
+                if retry_after:
+                    # 暂停放行到Retry-After指定的时间，清空欠额，排队中的请求重新预约
+                    self._updated = max(self._updated, now + retry_after)
+                    self._tokens = 0.0
+                    self._generation += 1
+                decreased = self.adaptive and now - self._last_decrease >= self.cooldown
+                if decreased:
+                    # 以实际请求速率为基准，避免配置速率远高于服务端容量时需要多轮才能收敛
+                    current = self._observed_rate(now)
+                    if self.rate is not None:
+                        current = min(self.rate, current)
+                    self.rate = max(self.min_rate, current * self.decrease_factor)
+                    self._last_decrease = now
+            if decreased:
+                logger.warning(
+                    f"{self.host} throttled with HTTP {status}, rate limited to {self.rate:.1f} req/s"
+                    + (f", paused for {retry_after:.1f}s" if retry_after else "")
+                )
+        elif self.adaptive and status < 500 and self.rate is not None:
+            with self._lock:
+                if self.max_rate is None or self.rate < self.max_rate:
+                    self.rate = self.rate + self.increase_step / self.rate
+                    if self.max_rate is not None:
+                        self.rate = min(self.rate, self.max_rate)
+
+class RateLimiter:
+    """按host管理限流器，配置来自api.rate_limit（default为默认值，hosts按host覆盖）"""
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = settings.rate_limit_config if config is None else config
+        self._limiters: Dict[str, Optional[HostLimiter]] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.config.get("enabled", False))
+
+    def for_url(self, url: str) -> Optional[HostLimiter]:
+        """获取url所属host的限流器，该host未启用限流时返回None"""
+        parsed = urlsplit(url)
+        if parsed.netloc not in self._limiters:
+            self._limiters[parsed.netloc] = self._build(parsed.netloc, parsed.hostname or "")
+        return self._limiters[parsed.netloc]
+
+    def _build(self, netloc: str, hostname: str) -> Optional[HostLimiter]:
+        hosts = self.config.get("hosts") or {}
+        host_config = {**(self.config.get("default") or {}), **(hosts.get(netloc) or hosts.get(hostname) or {})}
+        if not host_config or host_config.get("enabled", True) is False:
+            return None
+        workers = worker_count() if self.config.get("split_across_workers", True) else 1
+        return HostLimiter.from_config(netloc, host_config, workers)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """各host的限流统计"""
+        return {
+            host: dict(limiter.stats.to_dict(), rate=round(limiter.rate, 2) if limiter.rate else None)
+            for host, limiter in self._limiters.items() if limiter is not None
+        }
+
+    def clear(self):
+        self._limiters.clear()
+
+# 创建全局限流器实例，同一进程内的HTTPClient共享限流状态
+rate_limiter = RateLimiter()
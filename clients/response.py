@@ -0,0 +1,218 @@
+import codecs
+import json
+import time
+import aiohttp
+from typing import Any, List, Optional, Tuple, AsyncIterator
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+from core.logger import logger
+from core.json_codec import codec
+
+_UNSET = object()
+_WHITESPACE = " \t\n\r"
+
+class JSONArrayStream:
+    """增量解析顶层JSON数组，每次feed返回已完整解析的元素"""
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._finished = False
+        self._need_comma = False
+
+    def _skip(self, pos: int, chars: str) -> int:
+        while pos < len(self._buffer) and self._buffer[pos] in chars:
+            pos += 1
+        return pos
+
+    def feed(self, text: str, final: bool = False) -> List[Any]:
+        """追加文本并返回新解析出的元素"""
+        self._buffer += text
+        items = []
+        pos = 0
+        while not self._finished:
+            pos = self._skip(pos, _WHITESPACE)
+            if pos >= len(self._buffer):
+                break
+            if not self._started:
+                if self._buffer[pos] != "[":
+                    raise ValueError("Response body is not a JSON array")
+                self._started = True
+                pos += 1
+                continue
+            if self._buffer[pos] == "]":
+                self._finished = True
+                pos += 1
+                break
+            if self._need_comma:
+                if self._buffer[pos] != ",":
+                    raise ValueError("Malformed JSON array in response body")
+                self._need_comma = False
+                pos += 1
+                continue
+            try:
+                item, end = self._decoder.raw_decode(self._buffer, pos)
+            except json.JSONDecodeError:
+                # 元素尚未接收完整
+                break
+            if end >= len(self._buffer) and not final:
+                # 数字等标量可能被分块截断，等待后续数据确认边界
+                break
+            items.append(item)
+            pos = end
+            self._need_comma = True
+        self._buffer = self._buffer[pos:]
+        if final and not self._finished:
+            raise ValueError("Incomplete JSON array in response body")
+        return items
+
+class ResponseBodyMixin:
+    """响应体的延迟解码与流式解析，子类提供_raw_body/get_encoding/iter_chunks"""
+    timing = None
+    cassette_key = None
+    # 是否在日志中记录响应体（按接口采样）
+    log_body = True
+    _data = _UNSET
+
+    @property
+    def data(self) -> Any:
+        """解码后的响应体，首次访问时解析并缓存"""
+        if self._data is _UNSET:
+            self._data = self._decode_body()
+        return self._data
+
+    def _raw_body(self) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def _decode_body(self) -> Any:
+        body = self._raw_body()
+        if body is None:
+            raise RuntimeError("Response body has not been read, use the streaming iterators instead")
+        encoding = self.get_encoding()
+        content_type = self.headers.get('Content-Type', '')
+        try:
+            if 'application/json' in content_type:
+                if encoding.lower().replace('_', '-') in ('utf-8', 'utf8'):
+                    # UTF-8响应体直接交给编解码器，省去一次解码拷贝
+                    return codec.loads(body)
+                return codec.loads(body.decode(encoding))
+            return body.decode(encoding, errors='replace')
+        except Exception as e:
+            logger.error(f"Failed to parse response: {str(e)}")
+            return body.decode(encoding, errors='replace')
+
+    def _mark_received(self) -> None:
+        if self.timing is not None and self.timing.receive_end == 0:
+            self.timing.receive_end = time.perf_counter()
+
+    async def _iter_text(self, chunk_size: int) -> AsyncIterator[str]:
+        # 增量解码，避免多字节字符被分块截断
+        decoder = codecs.getincrementaldecoder(self.get_encoding())(errors='replace')
+        async for chunk in self.iter_chunks(chunk_size):
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+    async def iter_ndjson(self, chunk_size: int = 64 * 1024) -> AsyncIterator[Any]:
+        """逐行解析NDJSON响应"""
+        pending = b""
+        async for chunk in self.iter_chunks(chunk_size):
+            lines = (pending + chunk).split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if line.strip():
+                    yield codec.loads(line)
+        if pending.strip():
+            yield codec.loads(pending)
+
+    async def iter_json_array(self, chunk_size: int = 64 * 1024) -> AsyncIterator[Any]:
+        """逐个解析顶层JSON数组的元素"""
+        stream = JSONArrayStream()
+        async for text in self._iter_text(chunk_size):
+            for item in stream.feed(text):
+                yield item
+        for item in stream.feed("", final=True):
+            yield item
+
+class APIResponse(ResponseBodyMixin, aiohttp.ClientResponse):
+    """HTTPClient使用的响应类
+
+    - data: 首次访问时才解码响应体
+    - iter_chunks/iter_ndjson/iter_json_array: 流式读取，内存占用与响应体大小无关
+    """
+    def _raw_body(self) -> Optional[bytes]:
+        return getattr(self, "_body", None)
+
+    def get_encoding(self) -> str:
+        try:
+            return super().get_encoding()
+        except RuntimeError:
+            return 'utf-8'
+
+    async def iter_chunks(self, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """按块读取原始响应体"""
+        async for chunk in self.content.iter_chunked(chunk_size):
+            yield chunk
+        self._mark_received()
+
+class ReplayedResponse(ResponseBodyMixin):
+    """从录制文件回放的响应，提供与APIResponse相同的常用接口"""
+    def __init__(self, method: str, url: str, status: int, reason: str,
+                 headers: List[Tuple[str, str]], body: bytes, timing: Any = None):
+        self.method = method
+        self.url = URL(url)
+        self.status = status
+        self.reason = reason
+        self.headers = CIMultiDictProxy(CIMultiDict(headers))
+        self.timing = timing
+        self._body = body
+
+    def _raw_body(self) -> Optional[bytes]:
+        return self._body
+
+    @property
+    def ok(self) -> bool:
+        return self.status < 400
+
+    @property
+    def content_length(self) -> Optional[int]:
+        return len(self._body)
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get('Content-Type', 'application/octet-stream').split(';')[0].strip()
+
+    def get_encoding(self) -> str:
+        content_type = self.headers.get('Content-Type', '')
+        for part in content_type.split(';')[1:]:
+            key, _, value = part.strip().partition('=')
+            if key.lower() == 'charset' and value:
+                return value.strip('"')
+        return 'utf-8'
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise aiohttp.ClientResponseError(
+                None, (), status=self.status, message=self.reason, headers=self.headers
+            )
+
+    async def read(self) -> bytes:
+        return self._body
+
+    async def text(self, encoding: Optional[str] = None) -> str:
+        return self._body.decode(encoding or self.get_encoding(), errors='replace')
+
+    async def json(self, *args: Any, **kwargs: Any) -> Any:
+        return codec.loads(self._body) if self._body else None
+
+    async def iter_chunks(self, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """按块返回已录制的响应体"""
+        for start in range(0, len(self._body), chunk_size):
+            yield self._body[start:start + chunk_size]
+        self._mark_received()
+
+    def release(self) -> None:
+        pass
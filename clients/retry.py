@@ -0,0 +1,114 @@
+import asyncio
+import random
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from dataclasses import dataclass, field
+from typing import Dict, Any, Deque, FrozenSet, Optional, Tuple, Type
+import aiohttp
+from config.settings import settings
+
+# 幂等方法，默认只重试这些方法
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE", "TRACE"})
+
+@dataclass
+class RetryPolicy:
+    """重试策略：指数退避 + full jitter，只重试幂等方法"""
+    max_retries: int = 0
+    backoff_base: float = 0.1
+    backoff_max: float = 5.0
+    retry_statuses: FrozenSet[int] = frozenset({429, 502, 503, 504})
+    retry_methods: FrozenSet[str] = IDEMPOTENT_METHODS
+    retry_exceptions: Tuple[Type[BaseException], ...] = (
+        aiohttp.ClientConnectionError,
+        asyncio.TimeoutError,
+    )
+
+    @classmethod
+    def from_config(cls, api_config: Dict[str, Any]) -> "RetryPolicy":
+        """从api配置创建，retry_times为最大重试次数"""
+        retry_config = api_config.get("retry", {})
+        return cls(
+            max_retries=int(api_config.get("retry_times", 0)),
+            backoff_base=float(retry_config.get("backoff_base", 0.1)),
+            backoff_max=float(retry_config.get("backoff_max", 5.0)),
+            retry_statuses=frozenset(retry_config.get("statuses", [429, 502, 503, 504])),
+            retry_methods=frozenset(m.upper() for m in retry_config.get("methods", IDEMPOTENT_METHODS)),
+        )
+
+    def can_retry(self, method: str, attempt: int) -> bool:
+        """attempt为已完成的尝试次数"""
+        return attempt <= self.max_retries and method.upper() in self.retry_methods
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """第attempt次重试前的等待时间(秒)，服务端给出Retry-After时优先使用"""
+        if retry_after is not None:
+            return min(max(retry_after, 0.0), self.backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+
+@dataclass
+class HedgePolicy:
+    """请求对冲策略
+
+    请求耗时超过该接口历史延迟的指定百分位仍未返回时，再发送一个相同请求，
+    取先返回的结果。样本不足min_samples时不对冲。
+    样本按"METHOD 接口模板"（core.endpoints.endpoint_template）聚合，数量不随路径中的ID增长。
+    """
+    enabled: bool = False
+    percentile: float = 95.0
+    min_delay: float = 0.05
+    max_delay: float = 2.0
+    min_samples: int = 20
+    window: int = 500
+    methods: FrozenSet[str] = frozenset({"GET"})
+    _samples: Dict[str, Deque[float]] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def from_config(cls, api_config: Dict[str, Any]) -> "HedgePolicy":
+        hedge_config = api_config.get("hedge", {})
+        return cls(
+            enabled=bool(hedge_config.get("enabled", False)),
+            percentile=float(hedge_config.get("percentile", 95)),
+            min_delay=float(hedge_config.get("min_delay", 0.05)),
+            max_delay=float(hedge_config.get("max_delay", 2.0)),
+            min_samples=int(hedge_config.get("min_samples", 20)),
+            window=int(hedge_config.get("window", 500)),
+            methods=frozenset(m.upper() for m in hedge_config.get("methods", ["GET"])),
+        )
+
+    def record(self, key: str, latency: float) -> None:
+        """记录一次成功请求的耗时(秒)"""
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    def delay_for(self, method: str, key: str) -> Optional[float]:
+        """返回发送对冲请求前的等待时间，None表示不对冲"""
+        if not self.enabled or method.upper() not in self.methods:
+            return None
+        samples = self._samples.get(key)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        value = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+        return min(max(value, self.min_delay), self.max_delay)
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After头，支持秒数和HTTP日期两种格式，返回等待秒数"""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+# 进程级对冲策略，延迟样本在所有HTTPClient之间共享
+hedge_policy = HedgePolicy.from_config(settings.api_config)
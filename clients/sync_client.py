@@ -0,0 +1,141 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Dict, Any, Awaitable, Iterable, List, Optional, TypeVar, Union
+from clients.http_client import HTTPClient, RequestSpec, RequestResult
+from clients.connection_pool import connection_pool
+from clients.response import APIResponse
+from core.logger import logger
+
+T = TypeVar("T")
+
+class BackgroundLoop:
+    """在后台线程中长期运行的事件循环
+
+    同步代码通过run()把协程提交到该事件循环执行，进程内所有同步客户端共用同一个事件循环，
+    因此共享连接池中的keep-alive连接和DNS缓存，不需要每次调用都创建事件循环。
+    """
+    def __init__(self, name: str = "sync-http-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """后台事件循环，首次访问时启动"""
+        if not self.running:
+            self.start()
+        return self._loop
+
+    def start(self) -> None:
+        with self._lock:
+            if self.running:
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+            thread = threading.Thread(target=self._run, args=(loop, ready), name=self.name, daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop, self._thread = loop, thread
+            logger.debug(f"Background event loop '{self.name}' started")
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event) -> None:
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        try:
+            loop.run_forever()
+        finally:
+            # 取消未完成的任务后关闭事件循环
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """在后台事件循环中执行协程并阻塞等待结果"""
+        loop = self.loop
+        if threading.current_thread() is self._thread:
+            raise RuntimeError("BackgroundLoop.run() can not be called from the background loop itself")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """关闭该事件循环上的共享连接并停止后台线程"""
+        with self._lock:
+            if not self.running:
+                return
+            loop, thread = self._loop, self._thread
+            try:
+                asyncio.run_coroutine_threadsafe(connection_pool.close(), loop).result(timeout)
+            except Exception as e:
+                logger.warning(f"Failed to close connection pool on background loop: {str(e)}")
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout)
+            self._loop, self._thread = None, None
+            logger.debug(f"Background event loop '{self.name}' stopped")
+
+class SyncHTTPClient:
+    """HTTPClient的同步封装，供同步测试用例使用
+
+    client = SyncHTTPClient(settings.base_url)
+    response = client.request("GET", "/get")
+    assert response.data["url"]
+    """
+    def __init__(self, base_url: str, background: Optional[BackgroundLoop] = None, **kwargs):
+        self._background = background or background_loop
+        # 其余参数与HTTPClient相同
+        self._client = HTTPClient(base_url, **kwargs)
+
+    @property
+    def base_url(self) -> str:
+        return self._client.base_url
+
+    @property
+    def async_client(self) -> HTTPClient:
+        """底层的异步客户端"""
+        return self._client
+
+    def request(
+        self,
+        method: str,
+        endpoint: str,
+        params: Optional[Dict] = None,
+        json: Optional[Union[Dict, List, bytes]] = None,
+        headers: Optional[Dict] = None,
+        **kwargs
+    ) -> APIResponse:
+        """发送请求并返回已读取响应体的响应对象"""
+        return self._background.run(self._client.request(method, endpoint, params, json, headers, **kwargs))
+
+    def request_many(
+        self,
+        specs: Iterable[Union[RequestSpec, Dict[str, Any]]],
+        concurrency: int = 10
+    ) -> List[RequestResult]:
+        """并发执行一批请求，按输入顺序返回结果"""
+        return self._background.run(self._client.request_many(specs, concurrency))
+
+    def close(self) -> None:
+        if self._background.running:
+            self._background.run(self._client.close())
+
+    def __enter__(self) -> "SyncHTTPClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+# 创建全局后台事件循环实例，会话结束时由conftest停止
+background_loop = BackgroundLoop()
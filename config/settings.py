@@ -49,6 +49,34 @@ class Settings:
     def api_config(self) -> Dict[str, Any]:
         return self._config["api"]
 
+    @property
+    def pool_config(self) -> Dict[str, Any]:
+        return self.api_config.get("pool", {})
+
+    @property
+    def dns_config(self) -> Dict[str, Any]:
+        return self.api_config.get("dns", {})
+
+    @property
+    def rate_limit_config(self) -> Dict[str, Any]:
+        return self.api_config.get("rate_limit", {})
+
+    @property
+    def logging_config(self) -> Dict[str, Any]:
+        return self._config.get("logging", {})
+
+    @property
+    def metrics_config(self) -> Dict[str, Any]:
+        return self._config.get("metrics", {})
+
+    @property
+    def tracing_config(self) -> Dict[str, Any]:
+        return self._config.get("tracing", {})
+
+    @property
+    def performance_config(self) -> Dict[str, Any]:
+        return self._config.get("performance", {})
+
     @property
     def db_config(self) -> Dict[str, Any]:
         return self._config["database"]
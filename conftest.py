@@ -7,6 +7,10 @@ from pathlib import Path
 # 获取项目根目录
 ROOT_DIR = Path(__file__).parent
 
+# 会话级延迟预算检查结果和基线对比报告
+LATENCY_VIOLATIONS = pytest.StashKey[list]()
+LATENCY_DIFF = pytest.StashKey[dict]()
+
 # 将项目根目录添加到 Python 路径
 sys.path.insert(0, str(ROOT_DIR))
 
@@ -28,6 +32,12 @@ def setup_logging():
 def pytest_configure(config):
     setup_logging()
     
+    # 命令行指定的延迟基线模式覆盖配置文件
+    baseline_mode = config.getoption("--latency-baseline", default=None)
+    if baseline_mode:
+        from core.latency_baseline import latency_baseline
+        latency_baseline.mode = baseline_mode
+    
     # 添加标记说明
     config.addinivalue_line(
         "markers",
@@ -49,6 +59,88 @@ def pytest_configure(config):
         "markers",
         "mongodb: marks tests that require MongoDB"
     )
+    config.addinivalue_line(
+        "markers",
+        "latency_budget(budgets=None): fail the test when latency percentiles of its requests exceed the budgets"
+    )
+    config.addinivalue_line(
+        "markers",
+        "db_isolation(*databases): roll back MySQL changes and delete inserted MongoDB documents after the test"
+    )
+
+# 按接口的延迟预算
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """标记了latency_budget的用例只按该用例内的请求检查百分位预算
+
+    @pytest.mark.latency_budget                                 使用配置文件中的performance.budgets
+    @pytest.mark.latency_budget({"total": {"p95": 300}})        应用于该用例的所有请求
+    """
+    marker = item.get_closest_marker("latency_budget")
+    if marker is None:
+        return (yield)
+    from core.latency_budget import latency_budgets
+    budgets = marker.args[0] if marker.args else marker.kwargs.get("budgets")
+    with latency_budgets.collect(budgets) as collector:
+        result = yield
+    violations = collector.check()
+    if violations:
+        pytest.fail("Latency budget exceeded:\n" + "\n".join(f"  {v}" for v in violations), pytrace=False)
+    return result
+
+def pytest_sessionfinish(session, exitstatus):
+    """会话级延迟预算检查和基线对比，pytest-xdist下由主进程合并各worker的数据后处理"""
+    from core.latency_baseline import latency_baseline
+    from core.latency_budget import latency_budgets
+    workeroutput = getattr(session.config, "workeroutput", None)
+    if workeroutput is not None:
+        workeroutput["latency_budgets"] = latency_budgets.session.to_dict()
+        workeroutput["latency_baseline"] = latency_baseline.recorder.to_dict()
+        return
+    session.config.stash[LATENCY_DIFF] = latency_baseline.finish()
+    if not latency_budgets.rules:
+        return
+    violations = latency_budgets.session.check()
+    session.config.stash[LATENCY_VIOLATIONS] = violations
+    if violations and latency_budgets.fail_session and session.exitstatus == pytest.ExitCode.OK:
+        session.exitstatus = pytest.ExitCode.TESTS_FAILED
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_testnodedown(node, error):
+    """合并pytest-xdist worker的延迟数据"""
+    from core.latency_baseline import latency_baseline
+    from core.latency_budget import latency_budgets
+    workeroutput = getattr(node, "workeroutput", {})
+    if workeroutput.get("latency_budgets"):
+        latency_budgets.session.merge_dict(workeroutput["latency_budgets"])
+    if workeroutput.get("latency_baseline"):
+        latency_baseline.recorder.merge_dict(workeroutput["latency_baseline"])
+
+def pytest_terminal_summary(terminalreporter, exitstatus, config):
+    """输出延迟预算报告和基线对比结果"""
+    from core.latency_budget import latency_budgets
+    if getattr(config, "workeroutput", None) is not None:
+        return
+    diff = config.stash.get(LATENCY_DIFF, None)
+    if diff is not None:
+        terminalreporter.section("latency baseline")
+        for endpoint in diff["regressions"] + diff["improvements"]:
+            entry = diff["endpoints"][endpoint]
+            terminalreporter.write_line(f"{entry['verdict'].upper():<12} {endpoint} (phase: {entry['dominant_phase']})",
+                                        red=entry["verdict"] == "regression", green=entry["verdict"] == "improvement")
+        terminalreporter.write_line(f"{len(diff['regressions'])} regressions, {len(diff['improvements'])} improvements "
+                                    f"against {diff['baseline']}, see {diff['report']}")
+    rows = latency_budgets.session.summary()
+    if not rows:
+        return
+    terminalreporter.section("latency budgets")
+    for row in rows:
+        line = (f"{'OK  ' if row['ok'] else 'FAIL'} {row['endpoint']:<32} {row['phase']:<8} {row['percentile']:<5} "
+                f"{row['actual_ms']:>9.1f}ms / {row['budget_ms']:.1f}ms  ({row['count']} requests)")
+        terminalreporter.write_line(line, red=not row["ok"], green=row["ok"])
+    violations = config.stash.get(LATENCY_VIOLATIONS, [])
+    if violations and latency_budgets.fail_session:
+        terminalreporter.write_line(f"{len(violations)} latency budget(s) exceeded, failing the session", red=True)
 
 # 配置异步测试
 def pytest_addoption(parser):
@@ -62,6 +154,26 @@ def pytest_addoption(parser):
         help='default event loop scope for async fixtures',
         default='function'
     )
+    
+    # 录制/回放
+    from clients.cassette import CASSETTE_MODES
+    parser.addoption(
+        '--cassette-mode',
+        choices=CASSETTE_MODES,
+        default=os.getenv('CASSETTE_MODE', 'off'),
+        help='HTTP record/replay mode: off, record, replay (record misses) or strict (fail on misses)'
+    )
+    parser.addoption(
+        '--latency-baseline',
+        choices=('off', 'compare', 'update'),
+        default=os.getenv('LATENCY_BASELINE'),
+        help='compare session latencies against the stored baseline, or update it (default: performance.baseline.mode)'
+    )
+    parser.addoption(
+        '--cassette-dir',
+        default='tests/cassettes',
+        help='directory of the recorded cassettes, one file per test module'
+    )
 
 # 创建测试会话范围的事件循环
 @pytest.fixture(scope="session")
@@ -72,6 +184,103 @@ def event_loop():
     yield loop
     loop.close()
 
+# 会话级共享HTTP连接池
+@pytest.fixture(scope="session", autouse=True)
+def http_connection_pool():
+    """会话结束时关闭共享连接池并输出连接复用统计"""
+    from clients.connection_pool import connection_pool
+    yield connection_pool
+    logging.info(f"HTTP connection pool stats: {connection_pool.stats.to_dict()}")
+    connection_pool.close_sync()
+
+# 会话级共享MySQL连接池
+@pytest.fixture(scope="session", autouse=True)
+def mysql_connection_pool():
+    """会话结束时关闭空闲连接并输出等待时间和利用率统计"""
+    from utils.mysql_pool import mysql_pool
+    yield mysql_pool
+    if mysql_pool.stats.checkouts:
+        logging.info(f"MySQL connection pool stats: {mysql_pool.stats_dict()}")
+    mysql_pool.close()
+
+# 异步数据库handler的线程池
+@pytest.fixture(scope="session", autouse=True)
+def db_executor():
+    """会话结束时等待进行中的数据库操作完成并停止线程"""
+    from utils.async_db_handler import db_executor
+    yield db_executor
+    db_executor.shutdown()
+
+# 同步客户端共用的后台事件循环
+@pytest.fixture(scope="session", autouse=True)
+def sync_http_loop(http_connection_pool):
+    """会话结束时关闭后台事件循环上的连接并停止后台线程"""
+    from clients.sync_client import background_loop
+    yield background_loop
+    background_loop.stop()
+
+# 会话结束时输出限流统计
+@pytest.fixture(scope="session", autouse=True)
+def http_rate_limiter():
+    from clients.rate_limiter import rate_limiter
+    yield rate_limiter
+    if rate_limiter.stats():
+        logging.info(f"HTTP rate limiter stats: {rate_limiter.stats()}")
+
+# Prometheus请求指标
+@pytest.fixture(scope="session", autouse=True)
+def http_metrics():
+    """按配置提供/metrics接口，会话结束时写入指标文本文件"""
+    from core.metrics import request_metrics
+    request_metrics.start_server()
+    yield request_metrics
+    path = request_metrics.write_textfile()
+    if path is not None:
+        logging.info(f"Prometheus metrics written to {path}")
+    request_metrics.stop_server()
+
+# OpenTelemetry链路追踪
+@pytest.fixture(scope="session", autouse=True)
+def http_tracing():
+    """会话结束时导出剩余span"""
+    from core.tracing import tracing
+    yield tracing
+    tracing.shutdown()
+
+# 会话开始时预解析API域名
+@pytest.fixture(scope="session", autouse=True)
+def dns_prewarm(pytestconfig):
+    """按配置预热进程级DNS缓存，会话结束时输出命中统计；回放录制文件时请求不访问网络，不预热"""
+    import asyncio
+    from clients.dns_cache import dns_cache
+    from config.settings import settings
+    replaying = pytestconfig.getoption("--cassette-mode", default="off") in ("replay", "strict")
+    if dns_cache.enabled and settings.dns_config.get("prewarm", False) and not replaying:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(dns_cache.prewarm([settings.base_url]))
+        finally:
+            loop.close()
+    yield dns_cache
+    logging.info(f"DNS cache stats: {dns_cache.stats.to_dict()}")
+
+# 会话结束时保存录制文件
+@pytest.fixture(scope="session", autouse=True)
+def http_cassettes():
+    from clients.cassette import cassette_registry
+    yield cassette_registry
+    cassette_registry.save_all()
+
+# 进程内Mock服务
+@pytest.fixture
+async def mock_server():
+    """启动注册了httpbin风格路由的Mock服务，用例可继续add_route添加存根"""
+    from utils.mock_server import MockServer
+    server = MockServer().add_httpbin_routes()
+    await server.start()
+    yield server
+    await server.stop()
+
 # 配置测试环境
 @pytest.fixture(autouse=True)
 def setup_test_env():
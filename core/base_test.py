@@ -1,28 +1,88 @@
 import pytest
+from contextlib import ExitStack
+from pathlib import Path
 from typing import Optional
 from clients.http_client import HTTPClient
+from clients.sync_client import SyncHTTPClient
+from clients.cassette import Cassette, cassette_registry
 from config.settings import settings
 from core.logger import logger
-from utils.db_handler import MySQLHandler, MongoHandler
+from core.tracing import tracing
+from utils.async_db_handler import AsyncMySQLHandler
+from utils.db_handler import MySQLHandler, MongoHandler, mongo_isolation
+from utils.mysql_pool import MySQLConnectionPool
 
 class BaseTest:
+    # self.mysql使用的连接池，为None时使用全局连接池；测试类可以替换为其他连接池
+    mysql_pool: Optional[MySQLConnectionPool] = None
+
     @pytest.fixture(autouse=True)
     def setup_test(self, request):
         """测试设置，自动管理日志"""
         # 设置日志
         test_name = f"{request.module.__name__}.{request.function.__name__}"
-        logger.start_test_case(test_name)
-        
-        # 设置客户端
-        self.http_client = HTTPClient(settings.base_url)
-        self.logger = logger
-        # self.mysql = MySQLHandler()
-        # self.mongo = MongoHandler()
+        case = logger.start_test_case(test_name)
         
+        try:
+            # 开启链路追踪时，用例内的请求和数据库操作记录为用例span的子span
+            with tracing.case_span(test_name, case.case_id):
+                # 设置客户端
+                cassette = self._get_cassette(request)
+                self.http_client = HTTPClient(settings.base_url, cassette=cassette)
+                # 同步用例使用，请求在共享的后台事件循环中执行
+                self.sync_http_client = sync_http_client = SyncHTTPClient(settings.base_url, cassette=cassette)
+                self.logger = logger
+                # MySQL连接从会话级连接池借出，创建handler不建立连接
+                self.mysql = MySQLHandler(self.mysql_pool)
+                # 异步用例使用，数据库操作在线程池中执行，不阻塞事件循环
+                self.async_mysql = AsyncMySQLHandler(self.mysql)
+                # self.mongo = MongoHandler()
+            
+                try:
+                    with self._db_isolation(request, case.case_id):
+                        yield
+                finally:
+                    # 回滚或清理数据出错时也关闭客户端
+                    sync_http_client.close()
+        finally:
+            # 测试清理代码
+            logger.end_test_case(case)
+
+    @pytest.fixture(autouse=True)
+    async def close_clients(self, setup_test):
+        """用例结束时关闭setup_test创建的HTTP客户端（用例替换了self.http_client时同样关闭原客户端）"""
+        http_client = self.http_client
         yield
-        
-        # 测试清理代码
-        logger.end_test_case()
+        await http_client.close()
+
+    def _db_isolation(self, request, case_id: str) -> ExitStack:
+        """标记了db_isolation的用例：MySQL操作在用例结束时回滚的事务中执行（已在事务中时使用SAVEPOINT），
+        插入MongoDB的文档在用例结束时按标记批量删除
+
+        @pytest.mark.db_isolation                 MySQL和MongoDB
+        @pytest.mark.db_isolation("mysql")        只隔离MySQL
+        """
+        stack = ExitStack()
+        marker = request.node.get_closest_marker("db_isolation")
+        if marker is None:
+            return stack
+        databases = marker.args or ("mysql", "mongodb")
+        with stack:
+            if "mysql" in databases:
+                stack.enter_context(self.mysql.transaction(rollback=True))
+            if "mongodb" in databases:
+                stack.enter_context(mongo_isolation(case_id))
+            return stack.pop_all()
+
+    @staticmethod
+    def _get_cassette(request) -> Optional[Cassette]:
+        """按--cassette-mode获取当前测试模块的录制文件"""
+        mode = request.config.getoption("--cassette-mode", default="off")
+        if mode == "off":
+            return None
+        cassette_dir = Path(request.config.rootpath) / request.config.getoption("--cassette-dir")
+        module_name = request.module.__name__.split(".")[-1]
+        return cassette_registry.get(cassette_dir / f"{module_name}.jsonl.gz", mode)
 
     def verify_response(self, response, expected_status: int = 200):
         """验证响应结果"""
@@ -0,0 +1,11 @@
+import re
+
+# 路径中视为资源ID的段：纯数字、UUID、16位以上的十六进制串
+_ID_SEGMENT = re.compile(
+    r"^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{16,})$"
+)
+
+def endpoint_template(endpoint: str) -> str:
+    """将请求路径归一化为接口模板，如/users/42?x=1 -> /users/{id}，避免标签基数随ID增长"""
+    path = endpoint.split("?", 1)[0]
+    return "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in path.split("/"))
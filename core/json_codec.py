@@ -0,0 +1,60 @@
+import json
+from typing import Any, Union
+from config.settings import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+class JSONCodec:
+    """JSON编解码器，HTTPClient和Logger共用
+
+    backend可选json/orjson/auto，默认使用标准库；orjson需显式开启，auto在安装了orjson时使用orjson。
+    orjson与标准库的差异：
+      超过64位的整数：序列化时回退到标准库，解析时转为float（丢失精度）
+      NaN/Infinity：序列化为null，解析时回退到标准库
+    """
+    BACKENDS = ("auto", "orjson", "json")
+
+    def __init__(self, backend: str = "json"):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unsupported JSON backend: {backend}")
+        if backend == "orjson" and orjson is None:
+            raise ImportError("JSON backend 'orjson' is configured but orjson is not installed")
+        self.backend = "orjson" if backend != "json" and orjson is not None else "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        """序列化为紧凑的UTF-8字节串，用作请求体"""
+        if self.backend == "orjson":
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+            except TypeError:
+                pass
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def dumps_str(self, obj: Any) -> str:
+        """序列化为字符串"""
+        return self.dumps(obj).decode("utf-8")
+
+    def dumps_pretty(self, obj: Any) -> str:
+        """序列化为缩进格式，用于日志输出"""
+        if self.backend == "orjson":
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode("utf-8")
+            except TypeError:
+                pass
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+    def loads(self, data: Union[bytes, bytearray, memoryview, str]) -> Any:
+        """反序列化，bytes按UTF-8解析"""
+        if self.backend == "orjson":
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # orjson不接受NaN/Infinity等标准库可以解析的内容，由标准库重新解析或给出错误
+                pass
+        return json.loads(data)
+
+# 创建全局JSON编解码器实例
+codec = JSONCodec(settings.api_config.get("json_codec", "json"))
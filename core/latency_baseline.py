@@ -0,0 +1,286 @@
+"""跨运行的延迟基线与回归对比
+
+会话内按(接口模板, 阶段)聚合所有请求的耗时直方图，会话结束时与保存的基线对比：
+两组样本的分布差异用双样本Kolmogorov-Smirnov检验判断是否显著，显著且p50/p99的相对变化
+超过min_change时标记为回归/改善，并指出变化最大的阶段。对比结果输出为JSON和HTML报告。
+
+python -m core.latency_baseline reports/baseline/latency_test_cn.json reports/latency_current.json
+"""
+import argparse
+import html
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from config.settings import settings
+from core.json_codec import codec
+from core.latency_budget import BUDGET_PHASES
+from core.endpoints import endpoint_template
+from utils.latency_histogram import LatencyHistogram
+
+BASELINE_MODES = ("off", "compare", "update")
+
+def ks_test(a: LatencyHistogram, b: LatencyHistogram) -> Tuple[float, float]:
+    """基于直方图的双样本KS检验，返回(D统计量, p值)
+
+    两个直方图的分桶相同（有效数字一致），在各桶上界处比较累积分布；
+    同一桶内的样本视为相等，得到的D不大于精确值，检验偏保守。
+    p值使用Kolmogorov分布的渐近公式（含Stephens小样本修正）。
+    """
+    if a.significant_digits != b.significant_digits:
+        raise ValueError("Cannot compare histograms with different precision")
+    if not a.count or not b.count:
+        return 0.0, 1.0
+    cdf_a = cdf_b = 0
+    d = 0.0
+    for index in sorted(set(a.counts) | set(b.counts)):
+        cdf_a += a.counts.get(index, 0)
+        cdf_b += b.counts.get(index, 0)
+        d = max(d, abs(cdf_a / a.count - cdf_b / b.count))
+    en = math.sqrt(a.count * b.count / (a.count + b.count))
+    lam = (en + 0.12 + 0.11 / en) * d
+    if lam < 0.2:
+        return d, 1.0
+    p = 2 * sum((-1) ** (k - 1) * math.exp(-2 * k * k * lam * lam) for k in range(1, 101))
+    return d, min(1.0, max(0.0, p))
+
+class LatencyRecorder:
+    """按(接口模板, 阶段)聚合耗时直方图，接口路径中的ID段归一化为{id}"""
+    def __init__(self):
+        self.histograms: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, method: str, endpoint: str, timing: Any) -> None:
+        """记录一次请求的耗时，timing为RequestTiming"""
+        key = f"{method.upper()} {endpoint_template(endpoint)}"
+        # 同步客户端的后台线程与会话事件循环可能同时记录，直方图的计数更新也需要在锁内
+        with self._lock:
+            phases = self.histograms.setdefault(key, {})
+            for phase, attr in BUDGET_PHASES.items():
+                value = getattr(timing, attr)
+                if value is None or (phase == "queue" and value == 0):
+                    continue
+                histogram = phases.get(phase)
+                if histogram is None:
+                    histogram = phases[phase] = LatencyHistogram()
+                histogram.record(value * 1000)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            endpoints = {
+                endpoint: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                for endpoint, phases in sorted(self.histograms.items())
+            }
+        return {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "env": os.getenv("TEST_ENV", "test"),
+            "region": os.getenv("TEST_REGION", "cn"),
+            "endpoints": endpoints
+        }
+
+    def merge_dict(self, data: Dict[str, Any]) -> None:
+        """合并to_dict的结果（pytest-xdist各worker的数据）"""
+        with self._lock:
+            for endpoint, phases in data.get("endpoints", {}).items():
+                target = self.histograms.setdefault(endpoint, {})
+                for phase, value in phases.items():
+                    histogram = LatencyHistogram.from_dict(value)
+                    target[phase] = target[phase].merge(histogram) if phase in target else histogram
+
+    @classmethod
+    def load(cls, path: Path) -> "LatencyRecorder":
+        recorder = cls()
+        recorder.merge_dict(codec.loads(Path(path).read_bytes()))
+        return recorder
+
+    def save(self, path: Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(codec.dumps_pretty(self.to_dict()), encoding="utf-8")
+        return path
+
+@dataclass
+class PhaseDiff:
+    """单个接口单个阶段的对比结果，耗时单位为毫秒"""
+    endpoint: str
+    phase: str
+    baseline_count: int
+    current_count: int
+    baseline_p50: float
+    current_p50: float
+    baseline_p99: float
+    current_p99: float
+    p50_change: float
+    p99_change: float
+    ks_statistic: float
+    p_value: float
+    # regression/improvement/unchanged/insufficient
+    verdict: str
+
+def _relative_change(baseline: float, current: float) -> float:
+    return (current - baseline) / baseline if baseline > 0 else 0.0
+
+def compare(baseline: LatencyRecorder, current: LatencyRecorder, alpha: float = 0.01,
+            min_change: float = 0.1, min_samples: int = 20, min_delta_ms: float = 1.0) -> Dict[str, Any]:
+    """对比两次运行，返回报告字典
+
+    分布差异显著(p < alpha)，且p50或p99的相对变化超过min_change、绝对变化超过min_delta_ms时
+    判定为回归或改善（忽略亚毫秒级阶段的微小波动）；每个接口的dominant_phase为变化最大的已标记阶段。
+    """
+    diffs: List[PhaseDiff] = []
+    for endpoint, phases in sorted(current.histograms.items()):
+        baseline_phases = baseline.histograms.get(endpoint, {})
+        for phase in BUDGET_PHASES:
+            cur, base = phases.get(phase), baseline_phases.get(phase)
+            if cur is None or base is None:
+                continue
+            d, p_value = ks_test(base, cur)
+            diff = PhaseDiff(
+                endpoint=endpoint, phase=phase, baseline_count=base.count, current_count=cur.count,
+                baseline_p50=base.percentile(50), current_p50=cur.percentile(50),
+                baseline_p99=base.percentile(99), current_p99=cur.percentile(99),
+                p50_change=0.0, p99_change=0.0, ks_statistic=round(d, 4), p_value=p_value, verdict="unchanged"
+            )
+            diff.p50_change = round(_relative_change(diff.baseline_p50, diff.current_p50), 4)
+            diff.p99_change = round(_relative_change(diff.baseline_p99, diff.current_p99), 4)
+            shifts = [(diff.p50_change, diff.current_p50 - diff.baseline_p50),
+                      (diff.p99_change, diff.current_p99 - diff.baseline_p99)]
+            if min(base.count, cur.count) < min_samples:
+                diff.verdict = "insufficient"
+            elif p_value < alpha:
+                if any(change > min_change and delta > min_delta_ms for change, delta in shifts):
+                    diff.verdict = "regression"
+                elif any(change < -min_change and delta < -min_delta_ms for change, delta in shifts):
+                    diff.verdict = "improvement"
+            diffs.append(diff)
+
+    endpoints = {}
+    for diff in diffs:
+        entry = endpoints.setdefault(diff.endpoint, {"verdict": "unchanged", "dominant_phase": None, "phases": []})
+        entry["phases"].append(asdict(diff))
+    for endpoint, entry in endpoints.items():
+        regressions = [d for d in diffs if d.endpoint == endpoint and d.verdict == "regression"]
+        improvements = [d for d in diffs if d.endpoint == endpoint and d.verdict == "improvement"]
+        # total之外变化最大的阶段说明时间花在了哪里
+        candidates = [d for d in regressions or improvements if d.phase != "total"] or regressions or improvements
+        if candidates:
+            entry["verdict"] = "regression" if regressions else "improvement"
+            entry["dominant_phase"] = max(
+                candidates, key=lambda d: abs(d.current_p99 - d.baseline_p99) + abs(d.current_p50 - d.baseline_p50)
+            ).phase
+    return {
+        "alpha": alpha,
+        "min_change": min_change,
+        "min_delta_ms": min_delta_ms,
+        "min_samples": min_samples,
+        "regressions": sorted(e for e, entry in endpoints.items() if entry["verdict"] == "regression"),
+        "improvements": sorted(e for e, entry in endpoints.items() if entry["verdict"] == "improvement"),
+        "new_endpoints": sorted(set(current.histograms) - set(baseline.histograms)),
+        "missing_endpoints": sorted(set(baseline.histograms) - set(current.histograms)),
+        "endpoints": endpoints,
+    }
+
+_VERDICT_COLORS = {"regression": "#f8d7da", "improvement": "#d4edda", "insufficient": "#eeeeee", "unchanged": "#ffffff"}
+
+def render_html(report: Dict[str, Any]) -> str:
+    """HTML格式的对比报告"""
+    rows = []
+    for endpoint, entry in report["endpoints"].items():
+        for phase in entry["phases"]:
+            color = _VERDICT_COLORS[phase["verdict"]]
+            bold = " style=\"font-weight:bold\"" if phase["phase"] == entry["dominant_phase"] else ""
+            rows.append(
+                f"<tr style=\"background:{color}\"><td>{html.escape(endpoint)}</td><td{bold}>{phase['phase']}</td>"
+                f"<td>{phase['baseline_p50']:.2f} &rarr; {phase['current_p50']:.2f} ({phase['p50_change']:+.1%})</td>"
+                f"<td>{phase['baseline_p99']:.2f} &rarr; {phase['current_p99']:.2f} ({phase['p99_change']:+.1%})</td>"
+                f"<td>{phase['baseline_count']} / {phase['current_count']}</td>"
+                f"<td>{phase['ks_statistic']:.3f}</td><td>{phase['p_value']:.2g}</td><td>{phase['verdict']}</td></tr>"
+            )
+    summary = (f"<p>{len(report['regressions'])} regressions, {len(report['improvements'])} improvements "
+               f"(KS test alpha={report['alpha']}, min change {report['min_change']:.0%} and "
+               f"{report['min_delta_ms']}ms, "
+               f"min samples {report['min_samples']})</p>")
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Latency diff</title>"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse}"
+        "td,th{border:1px solid #ccc;padding:4px 8px;text-align:left}</style></head><body>"
+        f"<h1>Latency diff</h1>{summary}<table><tr><th>endpoint</th><th>phase</th><th>p50 (ms)</th>"
+        "<th>p99 (ms)</th><th>samples</th><th>KS D</th><th>p-value</th><th>verdict</th></tr>"
+        + "".join(rows) + "</table></body></html>"
+    )
+
+def write_report(report: Dict[str, Any], report_dir: Path) -> Tuple[Path, Path]:
+    """写入latency_diff.json和latency_diff.html"""
+    report_dir = Path(report_dir)
+    report_dir.mkdir(parents=True, exist_ok=True)
+    json_path, html_path = report_dir / "latency_diff.json", report_dir / "latency_diff.html"
+    json_path.write_text(codec.dumps_pretty(report), encoding="utf-8")
+    html_path.write_text(render_html(report), encoding="utf-8")
+    return json_path, html_path
+
+class LatencyBaseline:
+    """会话级延迟基线，配置见performance.baseline
+
+    mode为compare时会话结束后与基线对比并输出报告，基线不存在时以本次结果作为基线；
+    mode为update时用本次结果覆盖基线。每次运行的结果另存为report_dir/latency_current.json。
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = (settings.performance_config.get("baseline") or {}) if config is None else config
+        self.mode = self.config.get("mode", "off")
+        if self.mode not in BASELINE_MODES:
+            raise ValueError(f"Unsupported latency baseline mode: {self.mode}")
+        self.report_dir = Path(self.config.get("report_dir", "reports"))
+        self.path = Path(str(self.config.get("path", "reports/baseline/latency_{env}_{region}.json")).format(
+            env=os.getenv("TEST_ENV", "test"), region=os.getenv("TEST_REGION", "cn")))
+        self.alpha = float(self.config.get("alpha", 0.01))
+        self.min_change = float(self.config.get("min_change", 0.1))
+        self.min_samples = int(self.config.get("min_samples", 20))
+        self.min_delta_ms = float(self.config.get("min_delta_ms", 1.0))
+        self.recorder = LatencyRecorder()
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def record(self, method: str, endpoint: str, timing: Any) -> None:
+        self.recorder.record(method, endpoint, timing)
+
+    def finish(self) -> Optional[Dict[str, Any]]:
+        """保存本次结果，按mode对比或更新基线，返回对比报告（未对比时为None）"""
+        if not self.enabled or not self.recorder.histograms:
+            return None
+        self.recorder.save(self.report_dir / "latency_current.json")
+        if self.mode == "update" or not self.path.exists():
+            self.recorder.save(self.path)
+            return None
+        report = compare(LatencyRecorder.load(self.path), self.recorder,
+                         self.alpha, self.min_change, self.min_samples, self.min_delta_ms)
+        report["baseline"] = str(self.path)
+        report["report"] = str(write_report(report, self.report_dir)[1])
+        return report
+
+# 创建全局延迟基线实例
+latency_baseline = LatencyBaseline()
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare two latency summaries and write a diff report")
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("-o", "--output", default="reports", help="report directory")
+    parser.add_argument("--alpha", type=float, default=0.01)
+    parser.add_argument("--min-change", type=float, default=0.1)
+    parser.add_argument("--min-samples", type=int, default=20)
+    parser.add_argument("--min-delta-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    report = compare(LatencyRecorder.load(Path(args.baseline)), LatencyRecorder.load(Path(args.current)),
+                     args.alpha, args.min_change, args.min_samples, args.min_delta_ms)
+    json_path, html_path = write_report(report, Path(args.output))
+    for endpoint in report["regressions"]:
+        print(f"REGRESSION {endpoint} (phase: {report['endpoints'][endpoint]['dominant_phase']})")
+    print(f"Report written to {json_path} and {html_path}")
+
+if __name__ == "__main__":
+    main()
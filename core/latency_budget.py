@@ -0,0 +1,178 @@
+import contextvars
+import fnmatch
+import re
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from config.settings import settings
+from utils.latency_histogram import LatencyHistogram
+
+# 预算中的耗时阶段 -> RequestTiming属性，单位为秒
+BUDGET_PHASES = {
+    "total": "total_time",
+    "queue": "queue_wait",
+    "dns": "dns_time",
+    "connect": "connect_time",
+    "send": "send_time",
+    "server": "server_time",
+    "receive": "receive_time",
+}
+
+_PERCENTILE_KEY = re.compile(r"^p(\d+)$")
+
+def parse_percentile(key: str) -> float:
+    """p50 -> 50，p999 -> 99.9"""
+    match = _PERCENTILE_KEY.match(key)
+    if not match:
+        raise ValueError(f"Invalid percentile '{key}', expected p50/p95/p99/p999")
+    digits = match.group(1)
+    return float(digits) if len(digits) <= 2 else float(f"{digits[:2]}.{digits[2:]}")
+
+@dataclass
+class BudgetViolation:
+    """超出预算的百分位"""
+    endpoint: str
+    phase: str
+    percentile: str
+    budget_ms: float
+    actual_ms: float
+    count: int
+
+    def __str__(self) -> str:
+        return (f"{self.endpoint} {self.phase} {self.percentile}: {self.actual_ms:.1f}ms "
+                f"> budget {self.budget_ms:.1f}ms ({self.count} requests)")
+
+class BudgetCollector:
+    """按预算规则聚合延迟，(接口通配符, 阶段) -> 直方图"""
+    def __init__(self, rules: Dict[str, Dict[str, Dict[str, float]]], min_samples: int = 1):
+        self.rules = rules
+        self.min_samples = min_samples
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self._matches: Dict[str, Optional[str]] = {}
+
+    def match(self, key: str) -> Optional[str]:
+        """返回第一个匹配"METHOD /path"的预算通配符"""
+        if key not in self._matches:
+            if len(self._matches) >= 10000:
+                self._matches.clear()
+            self._matches[key] = next((pattern for pattern in self.rules if fnmatch.fnmatchcase(key, pattern)), None)
+        return self._matches[key]
+
+    def record(self, key: str, timing: Any) -> None:
+        pattern = self.match(key)
+        if pattern is None:
+            return
+        for phase in self.rules[pattern]:
+            value = getattr(timing, BUDGET_PHASES[phase])
+            if value is not None:
+                histogram = self.histograms.get((pattern, phase))
+                if histogram is None:
+                    histogram = self.histograms[(pattern, phase)] = LatencyHistogram()
+                histogram.record(value * 1000)
+
+    def check(self) -> List[BudgetViolation]:
+        """检查各百分位是否超出预算，样本数不足min_samples的接口不判断"""
+        violations = []
+        for pattern, phases in self.rules.items():
+            for phase, budget in phases.items():
+                histogram = self.histograms.get((pattern, phase))
+                if histogram is None or histogram.count < self.min_samples:
+                    continue
+                for key, budget_ms in budget.items():
+                    actual = histogram.percentile(parse_percentile(key))
+                    if actual > budget_ms:
+                        violations.append(BudgetViolation(pattern, phase, key, budget_ms, actual, histogram.count))
+        return violations
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """各预算项的实际值，用于输出报告"""
+        rows = []
+        for (pattern, phase), histogram in self.histograms.items():
+            for key, budget_ms in self.rules[pattern][phase].items():
+                actual = histogram.percentile(parse_percentile(key))
+                rows.append({"endpoint": pattern, "phase": phase, "percentile": key, "budget_ms": budget_ms,
+                             "actual_ms": actual, "count": histogram.count, "ok": actual <= budget_ms})
+        return rows
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化直方图（pytest-xdist的worker传给主进程合并）"""
+        return {f"{pattern}\t{phase}": histogram.to_dict() for (pattern, phase), histogram in self.histograms.items()}
+
+    def merge_dict(self, data: Dict[str, Any]) -> None:
+        for name, value in data.items():
+            pattern, phase = name.rsplit("\t", 1)
+            if pattern in self.rules and phase in self.rules[pattern]:
+                histogram = LatencyHistogram.from_dict(value)
+                existing = self.histograms.get((pattern, phase))
+                self.histograms[(pattern, phase)] = existing.merge(histogram) if existing else histogram
+
+class LatencyBudgets:
+    """按接口的延迟预算
+
+    performance.budgets的键为"METHOD /path"形式的通配符（与logging.body_sampling相同，按声明顺序取第一个匹配），
+    值为各阶段(total/queue/dns/connect/send/server/receive)的百分位预算(ms)：
+
+        budgets:
+          "GET /users/*":
+            total: {p50: 200, p95: 500, p99: 1000}
+            server: {p95: 400}
+
+    HTTPClient收到的每个响应都记录到会话级聚合中（回放的响应除外），会话结束时由pytest钩子检查；
+    标记了@pytest.mark.latency_budget的用例另外只按该用例内的请求检查。
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = settings.performance_config if config is None else config
+        self.rules = self._parse_rules(self.config.get("budgets") or {})
+        self.min_samples = int(self.config.get("min_samples", 1))
+        # 会话结束时超出预算是否使整个会话失败，为false时只输出报告
+        self.fail_session = bool(self.config.get("fail_session", True))
+        self.session = BudgetCollector(self.rules, self.min_samples)
+        self._collectors: contextvars.ContextVar[Tuple[BudgetCollector, ...]] = \
+            contextvars.ContextVar("latency_budget_collectors", default=())
+
+    @staticmethod
+    def _parse_rules(budgets: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, float]]]:
+        rules = {}
+        for pattern, phases in budgets.items():
+            for phase, percentiles in phases.items():
+                if phase not in BUDGET_PHASES:
+                    raise ValueError(f"Unknown phase '{phase}' in latency budget '{pattern}'")
+                for key in percentiles:
+                    parse_percentile(key)
+            rules[pattern] = {phase: {key: float(value) for key, value in percentiles.items()}
+                              for phase, percentiles in phases.items()}
+        return rules
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rules) or bool(self._collectors.get())
+
+    def record(self, method: str, endpoint: str, timing: Any) -> None:
+        """记录一次请求的耗时，timing为RequestTiming"""
+        key = f"{method.upper()} {endpoint.split('?', 1)[0]}"
+        if self.rules:
+            self.session.record(key, timing)
+        for collector in self._collectors.get():
+            collector.record(key, timing)
+
+    @contextmanager
+    def collect(self, budgets: Optional[Dict[str, Any]] = None) -> Iterator[BudgetCollector]:
+        """在当前上下文中单独聚合请求耗时，budgets为None时使用配置文件中的预算
+
+        budgets也可以直接是各阶段的预算（如{"total": {"p95": 300}}），此时应用于所有请求
+        """
+        if budgets is None:
+            rules = self.rules
+        else:
+            if set(budgets) <= set(BUDGET_PHASES):
+                budgets = {"*": budgets}
+            rules = self._parse_rules(budgets)
+        collector = BudgetCollector(rules, min_samples=1)
+        token = self._collectors.set(self._collectors.get() + (collector,))
+        try:
+            yield collector
+        finally:
+            self._collectors.reset(token)
+
+# 创建全局延迟预算实例
+latency_budgets = LatencyBudgets()
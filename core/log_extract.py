@@ -0,0 +1,46 @@
+"""从JSONL日志（logging.sink: jsonl）中提取单个用例的日志，输出为与单用例日志文件相同的文本格式
+
+python -m core.log_extract --list
+python -m core.log_extract test_20240101_120000_1a2b3c4d
+python -m core.log_extract test_get_user -o test_get_user.log
+"""
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+from core.log_sink import iter_index, read_case, format_record
+
+def find_cases(log_dir: Path, key: str) -> List[Dict[str, Any]]:
+    """按case_id精确匹配，否则按测试名包含匹配"""
+    entries = list(iter_index(log_dir))
+    exact = [entry for entry in entries if entry["case_id"] == key]
+    return exact or [entry for entry in entries if key in entry["test_name"]]
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extract test case logs from the JSONL log sink")
+    parser.add_argument("case", nargs="?", help="case_id or a substring of the test name")
+    parser.add_argument("--log-dir", default="logs")
+    parser.add_argument("--list", action="store_true", help="list indexed test cases")
+    parser.add_argument("-o", "--output", help="write to file instead of stdout")
+    args = parser.parse_args(argv)
+    log_dir = Path(args.log_dir)
+
+    if args.list or not args.case:
+        for entry in iter_index(log_dir):
+            print(f"{entry['case_id']}  {entry['test_name']}  ({entry['count']} lines, {entry['file']})")
+        return
+
+    # 未写入索引的用例（如进程异常退出）按case_id扫描JSONL文件
+    entries = find_cases(log_dir, args.case) or [{"case_id": args.case}]
+    lines = [format_record(record) for entry in entries for record in read_case(log_dir, entry["case_id"])]
+    if not lines:
+        sys.exit(f"No logs found for '{args.case}' in {log_dir}")
+
+    text = "\n".join(lines) + "\n"
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        sys.stdout.write(text)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import logging
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, BinaryIO, Iterator, List, Optional, Union
+from core.json_codec import codec
+
+FILE_FORMAT = '%(asctime)s [%(levelname)s] [%(case_id)s] %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+def worker_id() -> str:
+    """pytest-xdist的worker名(gw0/gw1...)，未使用xdist时为main"""
+    return os.getenv("PYTEST_XDIST_WORKER", "main")
+
+class CaseFileRouter(logging.Handler):
+    """按case_id把日志写入对应测试用例的日志文件，每个用例一个文件"""
+    def __init__(self, log_dir: Path):
+        super().__init__(logging.DEBUG)
+        self.setFormatter(logging.Formatter(FILE_FORMAT, datefmt=DATE_FORMAT))
+        self.log_dir = Path(log_dir)
+        self._paths: Dict[str, Path] = {}
+        self._handlers: Dict[str, logging.FileHandler] = {}
+        self._route_lock = threading.Lock()
+
+    def open_case(self, case_id: str, test_name: str) -> Path:
+        """注册用例，返回该用例的日志文件"""
+        path = self.log_dir / f"{case_id}_{test_name}.log"
+        with self._route_lock:
+            self._paths[case_id] = path
+        return path
+
+    def close_case(self, case_id: str) -> None:
+        with self._route_lock:
+            self._paths.pop(case_id, None)
+            handler = self._handlers.pop(case_id, None)
+        if handler is not None:
+            handler.close()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        case_id = getattr(record, "case_id", None)
+        with self._route_lock:
+            path = self._paths.get(case_id)
+            if path is None:
+                return
+            handler = self._handlers.get(case_id)
+            if handler is None:
+                handler = self._handlers[case_id] = logging.FileHandler(path, encoding="utf-8")
+                handler.setFormatter(self.formatter)
+        handler.emit(record)
+
+    def close(self) -> None:
+        with self._route_lock:
+            handlers = list(self._handlers.values())
+            self._handlers.clear()
+            self._paths.clear()
+        for handler in handlers:
+            handler.close()
+        super().close()
+
+class JSONLCaseSink(logging.Handler):
+    """所有用例写入同一个追加写的JSONL文件（每个worker一个）
+
+    每行一条日志：{"time", "level", "case_id", "message"}；用例结束时在索引文件中追加一行
+    {"case_id", "test_name", "file", "start", "end", "count"}，start/end为该用例日志在JSONL文件中的
+    字节偏移范围，提取单个用例时只需读取该范围。
+    """
+    def __init__(self, log_dir: Path, worker: Optional[str] = None):
+        super().__init__(logging.DEBUG)
+        worker = worker or worker_id()
+        self.log_dir = Path(log_dir)
+        self.path = self.log_dir / f"cases_{worker}.jsonl"
+        self.index_path = self.log_dir / f"cases_{worker}.idx.jsonl"
+        self._file: Optional[BinaryIO] = None
+        self._offset = 0
+        self._cases: Dict[str, Dict[str, Any]] = {}
+        self._sink_lock = threading.Lock()
+
+    def _open(self) -> BinaryIO:
+        if self._file is None:
+            self._file = open(self.path, "ab")
+            self._offset = self._file.seek(0, os.SEEK_END)
+        return self._file
+
+    def open_case(self, case_id: str, test_name: str) -> Path:
+        """注册用例，返回共享的JSONL文件"""
+        with self._sink_lock:
+            self._cases[case_id] = {"case_id": case_id, "test_name": test_name, "file": self.path.name,
+                                    "start": None, "end": None, "count": 0}
+        return self.path
+
+    def emit(self, record: logging.LogRecord) -> None:
+        case_id = getattr(record, "case_id", None)
+        line = codec.dumps({
+            "time": record.created,
+            "level": record.levelname,
+            "case_id": case_id,
+            "message": record.getMessage()
+        }) + b"\n"
+        with self._sink_lock:
+            f = self._open()
+            start = self._offset
+            f.write(line)
+            self._offset += len(line)
+            entry = self._cases.get(case_id)
+            if entry is not None:
+                if entry["start"] is None:
+                    entry["start"] = start
+                entry["end"] = self._offset
+                entry["count"] += 1
+
+    def close_case(self, case_id: str) -> None:
+        """写入该用例的索引"""
+        with self._sink_lock:
+            entry = self._cases.pop(case_id, None)
+            if self._file is not None:
+                self._file.flush()
+            if entry is None or not entry["count"]:
+                return
+            with open(self.index_path, "ab") as index:
+                index.write(codec.dumps(entry) + b"\n")
+
+    def flush(self) -> None:
+        with self._sink_lock:
+            if self._file is not None:
+                self._file.flush()
+
+    def close(self) -> None:
+        with self._sink_lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+        super().close()
+
+def iter_index(log_dir: Union[str, Path]) -> Iterator[Dict[str, Any]]:
+    """遍历日志目录下所有worker的用例索引"""
+    for index_path in sorted(Path(log_dir).glob("cases_*.idx.jsonl")):
+        with open(index_path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    yield codec.loads(line)
+
+def read_case(log_dir: Union[str, Path], case_id: str) -> List[Dict[str, Any]]:
+    """读取单个用例的日志，有索引时只读取索引记录的字节范围，否则扫描全部JSONL文件"""
+    log_dir = Path(log_dir)
+    entry = next((item for item in iter_index(log_dir) if item["case_id"] == case_id), None)
+    if entry is not None:
+        with open(log_dir / entry["file"], "rb") as f:
+            f.seek(entry["start"])
+            lines = f.read(entry["end"] - entry["start"]).splitlines()
+    else:
+        lines = []
+        for path in sorted(log_dir.glob("cases_*.jsonl")):
+            if not path.name.endswith(".idx.jsonl"):
+                with open(path, "rb") as f:
+                    lines.extend(f)
+    # 并发执行的用例日志会交错，按case_id过滤
+    records = (codec.loads(line) for line in lines if line.strip())
+    return [record for record in records if record.get("case_id") == case_id]
+
+def format_record(record: Dict[str, Any]) -> str:
+    """转换为与单用例日志文件相同的文本格式"""
+    asctime = datetime.fromtimestamp(record["time"]).strftime(DATE_FORMAT)
+    return f"{asctime} [{record['level']}] [{record['case_id']}] {record['message']}"
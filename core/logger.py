@@ -1,30 +1,228 @@
+import atexit
+import contextvars
+import fnmatch
+import itertools
 import logging
+import logging.handlers
+import queue
 import structlog
+import sys
+import threading
+import time
 import uuid
 import os
-import json
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterator, Optional, TextIO, Tuple, Union
 from pathlib import Path
+from config.settings import settings
+from core.endpoints import endpoint_template
+from core.json_codec import codec
+from core.log_sink import CaseFileRouter, JSONLCaseSink, DATE_FORMAT
+
+CONSOLE_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+
+# 单次请求各阶段的默认告警阈值(ms)，可通过logging.warn_thresholds覆盖
+DEFAULT_WARN_THRESHOLDS = {
+    "dns_resolution": 100,
+    "tcp_connection": 200,
+    "ssl_handshake": 300,
+    "total_time": 1000,
+}
+
+WARN_LABELS = {
+    "dns_resolution": "DNS resolution time",
+    "tcp_connection": "TCP connection time",
+    "ssl_handshake": "SSL handshake time",
+    "request_send": "Request send time",
+    "server_processing": "Server processing time",
+    "response_receive": "Response receive time",
+    "total_time": "Total request time",
+    "queue_wait": "Rate limit queue wait",
+}
+
+@dataclass
+class CaseContext:
+    """当前测试用例的日志上下文"""
+    case_id: str
+    test_name: str
+    log_file: Optional[Path] = None
+    # 用例开始时队列已丢弃的日志数
+    dropped_at_start: int = 0
+    _token: Optional[contextvars.Token] = field(default=None, repr=False, compare=False)
+
+# 用例上下文保存在contextvars中，asyncio任务创建时复制当前上下文，
+# 同一事件循环中并发执行的用例各自的日志、耗时和性能告警归属于各自的用例
+_case_context: contextvars.ContextVar[Optional[CaseContext]] = contextvars.ContextVar("case_context", default=None)
+
+def current_case() -> Optional[CaseContext]:
+    """获取当前任务所属的测试用例"""
+    return _case_context.get()
+
+class LogMessage:
+    """延迟格式化的日志消息，输出时（后台线程中）才格式化，结果缓存供多个handler共用"""
+    __slots__ = ("message", "fields", "formatter", "_text")
+
+    def __init__(self, message: str, fields: Dict[str, Any], formatter: Callable[[str, Dict[str, Any]], str]):
+        self.message = message
+        self.fields = fields
+        self.formatter = formatter
+        self._text = None
+
+    def __str__(self) -> str:
+        if self._text is None:
+            self._text = self.formatter(self.message, self.fields)
+        return self._text
+
+class LogBody:
+    """延迟格式化的请求/响应体
+
+    原始字节超过max_bytes时只输出前max_bytes字节，不再解析JSON；
+    未超过时JSON按缩进格式输出。格式化在后台日志线程中进行。
+    """
+    __slots__ = ("data", "content_type", "encoding")
+
+    def __init__(self, data: Any, content_type: str = "", encoding: str = "utf-8"):
+        self.data = data
+        self.content_type = content_type or ""
+        self.encoding = encoding
+
+    def render(self, max_bytes: int = 0) -> str:
+        data = self.data
+        if isinstance(data, (bytes, bytearray)):
+            if max_bytes and len(data) > max_bytes:
+                text = bytes(data[:max_bytes]).decode(self.encoding, errors="replace")
+                return f"{text}... <truncated, {len(data)} bytes total>"
+            if "json" in self.content_type or not self.content_type:
+                try:
+                    return codec.dumps_pretty(codec.loads(data))
+                except ValueError:
+                    pass
+            return bytes(data).decode(self.encoding, errors="replace")
+        try:
+            text = codec.dumps_pretty(data)
+        except Exception:
+            text = str(data)
+        if max_bytes and len(text) > max_bytes:
+            return f"{text[:max_bytes]}... <truncated, {len(text)} chars total>"
+        return text
+
+class LogRecord(logging.LogRecord):
+    """精简的日志记录，只填充本框架日志格式用到的字段，构造开销远小于logging.LogRecord"""
+    def __init__(self, name: str, level: int, msg: Any, case_id: Optional[str] = None):
+        self.name = name
+        self.msg = msg
+        self.args = None
+        self.levelno = level
+        self.levelname = logging.getLevelName(level)
+        self.created = time.time()
+        self.msecs = (self.created - int(self.created)) * 1000
+        self.relativeCreated = 0.0
+        self.pathname = self.filename = self.module = ""
+        self.lineno = 0
+        self.funcName = None
+        self.exc_info = self.exc_text = self.stack_info = None
+        self.thread = self.threadName = self.process = self.processName = None
+        self.case_id = case_id
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """有界日志队列，调用线程只负责入队
+
+    队列满时按drop_policy处理：
+      drop_new: 直接丢弃新日志（默认）
+      drop_old: 丢弃最早的日志，保留新日志
+      block:    阻塞调用线程最多block_timeout秒等待后台线程腾出空间，仍然满时丢弃；
+                在事件循环线程中记录日志时会阻塞整个事件循环
+    """
+    DROP_POLICIES = ("block", "drop_new", "drop_old")
+
+    def __init__(self, queue_size: int = 10000, drop_policy: str = "drop_new", block_timeout: float = 1.0):
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Unsupported log drop policy: {drop_policy}")
+        super().__init__(queue.Queue(queue_size))
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        self.block_timeout = block_timeout
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 不在调用线程中格式化，由后台线程输出时格式化
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        try:
+            if self.drop_policy == "block":
+                self.queue.put(record, timeout=self.block_timeout)
+                return
+            if self.drop_policy == "drop_old":
+                try:
+                    self.queue.get_nowait()
+                except queue.Empty:
+                    pass
+                self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+        self.dropped += 1
+
+class LogListener(logging.handlers.QueueListener):
+    """后台日志线程，负责格式化和写控制台/文件"""
+    def enqueue_sentinel(self) -> None:
+        # 队列满时等待后台线程腾出空间，不丢弃停止标记
+        self.queue.put(self._sentinel)
+
+    def handle(self, record: logging.LogRecord) -> None:
+        flush_event = getattr(record, "flush_event", None)
+        if flush_event is not None:
+            # flush标记之前的日志均已输出
+            flush_event.set()
+            return
+        super().handle(record)
+
+class ConsoleHandler(logging.StreamHandler):
+    """未指定stream时输出到当前的sys.stdout（pytest捕获输出时会替换sys.stdout）"""
+    def __init__(self, stream: Optional[TextIO] = None):
+        super().__init__(stream)
+        self._fixed_stream = stream
+
+    @property
+    def stream(self) -> TextIO:
+        return self._fixed_stream or sys.stdout
+
+    @stream.setter
+    def stream(self, value: TextIO) -> None:
+        self._fixed_stream = value
 
 class Logger:
-    def __init__(self):
+    def __init__(self, config: Optional[Dict[str, Any]] = None, log_dir: str = "logs",
+                 stream: Optional[TextIO] = None):
+        self.config = settings.logging_config if config is None else config
+        self.log_dir = Path(log_dir)
         self._logger = self._setup_logger()
-        self.case_id = None
-        self.log_file = None
+        # 低于该级别的日志在调用线程中直接丢弃，不做任何格式化
+        self.level = logging.getLevelName(str(self.config.get("level", "DEBUG")).upper())
+        # 请求/响应体超过该字节数时截断，0为不截断
+        self.max_body_bytes = int(self.config.get("max_body_bytes", 64 * 1024))
+        # 单次请求的告警阈值(ms)，键为RequestTiming.to_dict()中的字段
+        self.warn_thresholds = {key: float(value) for key, value in
+                                {**DEFAULT_WARN_THRESHOLDS, **(self.config.get("warn_thresholds") or {})}.items()
+                                if value is not None}
+        sampling = self.config.get("body_sampling") or {}
+        self._sample_default = int(sampling.get("default", 1))
+        self._sample_rules = dict(sampling.get("endpoints") or {})
+        self._sample_rates: Dict[str, Tuple[str, int]] = {}
+        self._sample_counters: Dict[str, Any] = {}
+        self._setup_pipeline(stream)
 
     def _setup_logger(self):
         """设置日志配置"""
         # 创建logs目录
-        log_dir = Path("logs")
-        log_dir.mkdir(exist_ok=True)
-
-        # 配置基础日志
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format='%(asctime)s [%(levelname)s] [%(case_id)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
+        self.log_dir.mkdir(exist_ok=True)
 
         # 配置structlog
         structlog.configure(
@@ -44,65 +242,203 @@ class Logger:
         )
         return structlog.get_logger()
 
-    def start_test_case(self, test_name: str):
-        """开始新的测试用例，生成唯一case_id和日志文件"""
-        self.case_id = f"test_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
-        log_filename = f"{self.case_id}_{test_name}.log"
-        self.log_file = Path("logs") / log_filename
-
-        # 配置文件处理器
-        file_handler = logging.FileHandler(self.log_file)
-        file_handler.setLevel(logging.DEBUG)
-        formatter = logging.Formatter(
-            '%(asctime)s [%(levelname)s] [%(case_id)s] %(message)s',
-            datefmt='%Y-%m-%d %H:%M:%S'
-        )
-        file_handler.setFormatter(formatter)
+    def _setup_pipeline(self, stream: Optional[TextIO]):
+        """配置日志输出：控制台 + 用例日志
+
+        sink为files（默认）时每个用例一个日志文件；为jsonl时所有用例写入每个worker一个的JSONL文件，
+        按用例建立偏移量索引，使用python -m core.log_extract提取单个用例的日志。
+        queue为true（默认）时调用线程只把日志放入有界队列，格式化和I/O由后台线程完成，
+        不占用事件循环线程，也不影响RequestTiming中记录的耗时
+        """
+        console = ConsoleHandler(stream)
+        console.setFormatter(logging.Formatter(CONSOLE_FORMAT, datefmt=DATE_FORMAT))
+        sink = self.config.get("sink", "files")
+        if sink == "files":
+            self._router = CaseFileRouter(self.log_dir)
+        elif sink == "jsonl":
+            self._router = JSONLCaseSink(self.log_dir)
+        else:
+            raise ValueError(f"Unsupported log sink: {sink}")
+
+        # 独立的logger，不经过root logger的handler
+        self._pylogger = logging.Logger("api_test", logging.DEBUG)
+        self._pylogger.propagate = False
+        self._queue_handler = None
+        self._listener = None
+        if self.config.get("queue", True):
+            self._queue_handler = BoundedQueueHandler(
+                queue_size=int(self.config.get("queue_size", 10000)),
+                drop_policy=self.config.get("drop_policy", "drop_new"),
+                block_timeout=float(self.config.get("block_timeout", 1.0))
+            )
+            self._listener = LogListener(self._queue_handler.queue, console, self._router)
+            self._listener.start()
+            self._pylogger.addHandler(self._queue_handler)
+            atexit.register(self.shutdown)
+        else:
+            self._pylogger.addHandler(console)
+            self._pylogger.addHandler(self._router)
+
+    @property
+    def dropped(self) -> int:
+        """队列满时丢弃的日志条数"""
+        return self._queue_handler.dropped if self._queue_handler is not None else 0
 
-        # 获取根日志记录器并添加文件处理器
-        root_logger = logging.getLogger()
-        root_logger.addHandler(file_handler)
-        root_logger.setLevel(logging.DEBUG)
+    def flush(self, timeout: float = 5.0) -> bool:
+        """等待队列中已有的日志全部输出并写入文件，返回是否在超时前完成"""
+        done = True
+        if self._listener is not None and self._listener._thread is not None:
+            deadline = time.monotonic() + timeout
+            marker = LogRecord(self._pylogger.name, logging.DEBUG, "")
+            marker.flush_event = threading.Event()
+            # flush标记不受丢弃策略限制，队列满时等待后台线程腾出空间
+            try:
+                self._queue_handler.queue.put(marker, timeout=timeout)
+            except queue.Full:
+                done = False
+            else:
+                done = marker.flush_event.wait(max(deadline - time.monotonic(), 0))
+        self._router.flush()
+        return done
+
+    def shutdown(self) -> None:
+        """输出剩余日志并停止后台线程"""
+        if self._listener is not None and self._listener._thread is not None:
+            self._listener.stop()
+        self._router.close()
+
+    def is_enabled_for(self, level: Union[str, int]) -> bool:
+        """该级别的日志是否会被输出"""
+        if isinstance(level, str):
+            level = logging.getLevelName(level.upper())
+        return level >= self.level
+
+    def sample_body(self, method: str, endpoint: str) -> bool:
+        """按接口采样，返回本次请求是否记录请求/响应体
+
+        logging.body_sampling.endpoints的键为"METHOD /path"形式的通配符，值N表示每N次记录1次；
+        路径按接口模板匹配和计数（/users/42 -> /users/{id}），缓存不随路径中的ID增长
+        """
+        key = f"{method.upper()} {endpoint_template(endpoint)}"
+        rule = self._sample_rates.get(key)
+        if rule is None:
+            if len(self._sample_rates) >= 10000:
+                self._sample_rates.clear()
+            # 匹配同一通配符的接口共用一个计数器
+            rule = next(((pattern, int(value)) for pattern, value in self._sample_rules.items()
+                         if fnmatch.fnmatchcase(key, pattern)), (key, self._sample_default))
+            self._sample_rates[key] = rule
+        counter_key, rate = rule
+        if rate <= 1:
+            return True
+        counter = self._sample_counters.get(counter_key)
+        if counter is None:
+            counter = self._sample_counters.setdefault(counter_key, itertools.count())
+        return next(counter) % rate == 0
+
+    @property
+    def case_id(self) -> Optional[str]:
+        """当前任务所属用例的case_id"""
+        case = _case_context.get()
+        return case.case_id if case is not None else None
+
+    @property
+    def log_file(self) -> Optional[Path]:
+        """当前任务所属用例的日志文件"""
+        case = _case_context.get()
+        return case.log_file if case is not None else None
+
+    def start_test_case(self, test_name: str) -> CaseContext:
+        """开始新的测试用例，生成唯一case_id和日志文件，并设置为当前上下文的用例"""
+        case_id = f"test_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{str(uuid.uuid4())[:8]}"
+        case = CaseContext(case_id=case_id, test_name=test_name, dropped_at_start=self.dropped)
+
+        # 该用例的日志由sink写入对应文件
+        case.log_file = self._router.open_case(case_id, test_name)
+        case._token = _case_context.set(case)
 
         # 记录测试开始
         self.info(f"开始测试: {test_name}")
         self._write_separator("test start")
+        return case
+
+    def end_test_case(self, case: Optional[CaseContext] = None):
+        """结束测试用例的日志记录，等待该用例的日志全部写入文件"""
+        case = case or _case_context.get()
+        if case is None:
+            return
+        # 先等待队列排空，避免结束标记和丢弃提示本身被丢弃
+        self.flush()
+        self._write_separator("test end", case.case_id)
+        dropped = self.dropped - case.dropped_at_start
+        if dropped:
+            self._emit(logging.WARNING, f"{dropped} log records were dropped because the log queue was full",
+                       case.case_id)
+        if not self.flush():
+            sys.stderr.write(f"Timed out flushing logs of {case.case_id}\n")
+        self._router.close_case(case.case_id)
+        if _case_context.get() is case:
+            try:
+                _case_context.reset(case._token)
+            except ValueError:
+                # 在其他上下文中结束（如pytest在不同任务中执行fixture的setup和teardown）
+                _case_context.set(None)
 
-    def end_test_case(self):
-        """结束测试用例的日志记录"""
-        if self.log_file and self.log_file.exists():
-            self._write_separator("test end")
-            # 关闭并移除文件处理器
-            root_logger = logging.getLogger()
-            for handler in root_logger.handlers[:]:
-                if isinstance(handler, logging.FileHandler) and handler.baseFilename == str(self.log_file):
-                    handler.close()
-                    root_logger.removeHandler(handler)
-
-    def _write_separator(self, title: str):
+    @contextmanager
+    def case_context(self, test_name: str) -> Iterator[CaseContext]:
+        """在当前任务中执行一个测试用例，用于同一事件循环中并发执行多个用例
+
+        async def run_case(name):
+            with logger.case_context(name):
+                await client.request("GET", "/get")
+
+        await asyncio.gather(*(run_case(name) for name in names))
+        """
+        case = self.start_test_case(test_name)
+        try:
+            yield case
+        finally:
+            self.end_test_case(case)
+
+    def _write_separator(self, title: str, case_id: Optional[str] = None):
         """写入分隔符"""
         separator = "=" * 50
-        message = f"\n{separator} {title} {separator}"
-        print(message)  # 控制台输出
-        logging.debug(message)  # 文件输出
+        self._emit(logging.DEBUG, f"\n{separator} {title} {separator}", case_id)
 
     def _format_dict(self, data: Dict) -> str:
         """格式化字典数据"""
+        if isinstance(data, LogBody):
+            return data.render(self.max_body_bytes)
+        if isinstance(data, (bytes, bytearray)):
+            # 预编码的请求体
+            return data.decode("utf-8", errors="replace")
         try:
-            return json.dumps(data, indent=2, ensure_ascii=False)
+            return codec.dumps_pretty(data)
         except Exception:
             return str(data)
 
-    def _log_with_format(self, level: str, message: str, **kwargs: Any) -> None:
+    def _format_message(self, message: str, fields: Dict[str, Any]) -> str:
         """统一的日志记录格式"""
-        formatted_message = f"{message}"
-        if kwargs:
-            formatted_data = "\n".join(f"{k}: {self._format_dict(v)}" for k, v in kwargs.items())
-            formatted_message = f"{message}\n{formatted_data}"
-        
-        # 同时输出到控制台和文件
-        print(f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')} [{level}] {formatted_message}")
-        getattr(logging, level.lower())(formatted_message, extra={"case_id": self.case_id})
+        if not fields:
+            return message
+        formatted_data = "\n".join(f"{k}: {self._format_dict(v)}" for k, v in fields.items())
+        return f"{message}\n{formatted_data}"
+
+    def _emit(self, level: int, msg: Any, case_id: Optional[str] = None) -> None:
+        if level < self.level:
+            return
+        if case_id is None:
+            case = _case_context.get()
+            case_id = case.case_id if case is not None else None
+        # 直接构造精简的LogRecord，避免logging查找调用栈等开销
+        self._pylogger.handle(LogRecord(self._pylogger.name, level, msg, case_id))
+
+    def _log_with_format(self, level: str, message: str, **kwargs: Any) -> None:
+        """记录日志，kwargs在输出时才格式化，调用方不应在记录后修改其中的对象"""
+        levelno = logging.getLevelName(level)
+        if levelno < self.level:
+            return
+        self._emit(levelno, LogMessage(message, kwargs, self._format_message) if kwargs else message)
 
     def info(self, message: str, **kwargs: Any) -> None:
         self._log_with_format("INFO", message, **kwargs)
@@ -126,7 +462,11 @@ class Logger:
         headers: Dict = None,
         params: Dict = None,
         data: Dict = None,
+        log_body: bool = True,
     ) -> None:
+        """记录请求信息，log_body为False时只记录请求体大小"""
+        if not self.is_enabled_for(logging.DEBUG):
+            return
         self._write_separator("request data")
         self.debug(
             "API Request Details",
@@ -134,7 +474,7 @@ class Logger:
             url=url,
             headers=headers or {},
             params=params or {},
-            data=data or {}
+            data=self._body_field(data or {}, log_body)
         )
 
     def log_response(
@@ -142,52 +482,67 @@ class Logger:
         status_code: int,
         response_data: Any,
         timing: Dict[str, float] = None,
+        content_type: str = "",
+        log_body: bool = True,
     ) -> None:
-        """记录响应信息和性能分析"""
-        self._write_separator("response data")
-        
-        # 记录基本响应信息
-        self.debug(
-            "API Response Details",
-            status_code=status_code,
-            response=response_data
-        )
+        """记录响应信息和性能分析
+
+        response_data可以是原始响应体bytes，在后台线程中按content_type格式化；
+        未采样的响应只记录响应体大小，错误响应(>=400)总是记录响应体
+        """
+        if self.is_enabled_for(logging.DEBUG):
+            self._write_separator("response data")
+            
+            # 记录基本响应信息
+            self.debug(
+                "API Response Details",
+                status_code=status_code,
+                response=self._body_field(response_data, log_body or status_code >= 400, content_type)
+            )
         
         # 记录性能分析
         if timing:
-            self._write_separator("performance analysis")
-            self.debug(
-                "Request Timing Breakdown",
-                **{
-                    "DNS Resolution": f"{timing['dns_resolution']}ms",
-                    "TCP Connection": f"{timing['tcp_connection']}ms",
-                    "SSL/TLS Handshake": f"{timing['ssl_handshake']}ms",
-                    "Request Send": f"{timing['request_send']}ms",
-                    "Response Receive": f"{timing['response_receive']}ms",
-                    "Total Time": f"{timing['total_time']}ms"
-                }
-            )
+            if self.is_enabled_for(logging.DEBUG):
+                self._write_separator("performance analysis")
+                self.debug(
+                    "Request Timing Breakdown",
+                    **{
+                        "DNS Resolution": self._format_ms(timing.get('dns_resolution')),
+                        "TCP Connection": self._format_ms(timing.get('tcp_connection')),
+                        "SSL/TLS Handshake": self._format_ms(timing.get('ssl_handshake')),
+                        "Request Send": self._format_ms(timing.get('request_send')),
+                        "Server Processing": self._format_ms(timing.get('server_processing')),
+                        "Response Receive": self._format_ms(timing.get('response_receive')),
+                        "Total Time": self._format_ms(timing.get('total_time')),
+                        "Connection Reused": timing.get('connection_reused', False),
+                        "Queue Wait": self._format_ms(timing.get('queue_wait'))
+                    }
+                )
             
             # 性能警告
             self._analyze_performance(timing)
 
-    def _analyze_performance(self, timing: Dict[str, float]) -> None:
-        """分析性能并给出警告"""
-        # DNS解析时间超过100ms警告
-        if timing['dns_resolution'] > 100:
-            self.warning(f"DNS resolution time ({timing['dns_resolution']}ms) is high")
-        
-        # TCP连接时间超过200ms警告
-        if timing['tcp_connection'] > 200:
-            self.warning(f"TCP connection time ({timing['tcp_connection']}ms) is high")
-        
-        # SSL握手时间超过300ms警告
-        if timing['ssl_handshake'] > 300:
-            self.warning(f"SSL handshake time ({timing['ssl_handshake']}ms) is high")
-        
-        # 总响应时间超过1000ms警告
-        if timing['total_time'] > 1000:
-            self.warning(f"Total request time ({timing['total_time']}ms) exceeds 1 second")
+    @staticmethod
+    def _body_field(data: Any, log_body: bool, content_type: str = "") -> Any:
+        if log_body:
+            return LogBody(data, content_type)
+        size = len(data) if isinstance(data, (bytes, bytearray, str)) else None
+        return f"<not sampled, {size} bytes>" if size is not None else "<not sampled>"
+
+    @staticmethod
+    def _format_ms(value: Any) -> str:
+        """格式化耗时，未测量的阶段显示为n/a"""
+        return "n/a" if value is None else f"{value}ms"
+
+    def _analyze_performance(self, timing: Dict[str, Any]) -> None:
+        """单次请求的耗时超过logging.warn_thresholds时给出警告，未测量的阶段(None)不参与判断
+
+        按接口的百分位预算见performance.budgets（core.latency_budget）
+        """
+        for key, threshold in self.warn_thresholds.items():
+            value = timing.get(key)
+            if value is not None and value > threshold:
+                self.warning(f"{WARN_LABELS.get(key, key)} ({value}ms) exceeds {threshold}ms")
 
 # 创建全局logger实例
 logger = Logger() 
\ No newline at end of file
@@ -0,0 +1,156 @@
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from config.settings import settings
+from core.endpoints import endpoint_template
+from core.log_sink import worker_id
+from core.logger import logger
+
+try:
+    import prometheus_client
+    from prometheus_client import CollectorRegistry, Counter, Histogram
+except ImportError:
+    prometheus_client = None
+
+# 指标中的耗时阶段 -> RequestTiming属性，单位为秒
+TIMING_PHASES = {
+    "queue": "queue_wait",
+    "dns": "dns_time",
+    "connect": "connect_time",
+    "send": "send_time",
+    "server": "server_time",
+    "receive": "receive_time",
+}
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# endpoint -> 接口模板缓存的最大条目数，超过后清空重建
+_CACHE_SIZE = 10000
+
+def status_class(status: int) -> str:
+    """状态码分类，如2xx/4xx/5xx"""
+    return f"{status // 100}xx"
+
+class RequestMetrics:
+    """HTTP请求的Prometheus指标
+
+    api_requests_total            请求数，标签method/endpoint/status_class，吞吐量为其rate()
+    api_request_duration_seconds  请求总耗时直方图，标签method/endpoint/status_class
+    api_request_phase_seconds     各阶段耗时直方图，标签method/endpoint/phase
+    api_request_errors_total      未收到响应的请求数（超时、连接失败等），标签method/endpoint/error
+
+    指标注册在独立的registry中，通过start_server()提供/metrics接口，或write_textfile()写入文本文件
+    （供node_exporter textfile collector或CI收集）。按(method, 接口模板, status)缓存绑定了标签的指标，
+    每次请求只做计数和直方图累加。
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = settings.metrics_config if config is None else config
+        self.enabled = bool(self.config.get("enabled", False))
+        if self.enabled and prometheus_client is None:
+            raise ImportError("metrics.enabled is true but prometheus-client is not installed")
+        # 接口模板数上限，超出的接口归为other
+        self.max_endpoints = int(self.config.get("max_endpoints", 200))
+        # 为false时不记录各阶段耗时，每次请求只更新一个计数器和一个直方图
+        self.record_phases = bool(self.config.get("phases", True))
+        self.registry = None
+        self._templates: Dict[str, str] = {}
+        self._known_templates: set = set()
+        self._bound: Dict[Tuple[str, str, int], Tuple[Any, Any, List[Tuple[str, Any]]]] = {}
+        self._server = None
+        if self.enabled:
+            self._create_metrics(tuple(self.config.get("buckets") or DEFAULT_BUCKETS))
+
+    def _create_metrics(self, buckets: Tuple[float, ...]) -> None:
+        self.registry = CollectorRegistry()
+        labels = ("method", "endpoint", "status_class")
+        self.requests = Counter("api_requests", "HTTP requests sent", labels, registry=self.registry)
+        self.duration = Histogram("api_request_duration_seconds", "HTTP request total time", labels,
+                                  buckets=buckets, registry=self.registry)
+        self.phases = Histogram("api_request_phase_seconds", "HTTP request time by phase",
+                                ("method", "endpoint", "phase"), buckets=buckets, registry=self.registry)
+        self.errors = Counter("api_request_errors", "HTTP requests failed without a response",
+                              ("method", "endpoint", "error"), registry=self.registry)
+
+    def _template(self, endpoint: str) -> str:
+        template = self._templates.get(endpoint)
+        if template is not None:
+            return template
+        template = endpoint_template(endpoint)
+        if template not in self._known_templates:
+            if len(self._known_templates) >= self.max_endpoints:
+                template = "other"
+            else:
+                self._known_templates.add(template)
+        if len(self._templates) >= _CACHE_SIZE:
+            self._templates.clear()
+        self._templates[endpoint] = template
+        return template
+
+    def _bind(self, method: str, template: str, status: int) -> Tuple[Any, Any, List[Tuple[str, Any]]]:
+        label = method.upper()
+        status_label = status_class(status)
+        bound = self._bound[(method, template, status)] = (
+            self.requests.labels(label, template, status_label),
+            self.duration.labels(label, template, status_label),
+            [(attr, self.phases.labels(label, template, phase)) for phase, attr in TIMING_PHASES.items()]
+            if self.record_phases else []
+        )
+        return bound
+
+    def observe(self, method: str, endpoint: str, status: int, timing: Any) -> None:
+        """记录一次收到响应的请求，timing为RequestTiming"""
+        template = self._template(endpoint)
+        bound = self._bound.get((method, template, status))
+        if bound is None:
+            bound = self._bind(method, template, status)
+        requests, duration, phases = bound
+        requests.inc()
+        total = timing.total_time
+        if total is not None:
+            duration.observe(total)
+        for attr, histogram in phases:
+            value = getattr(timing, attr)
+            if value is not None:
+                histogram.observe(value)
+
+    def observe_error(self, method: str, endpoint: str, error: BaseException) -> None:
+        """记录一次未收到响应的请求"""
+        self.errors.labels(method.upper(), self._template(endpoint), type(error).__name__).inc()
+
+    def start_server(self, port: Optional[int] = None, addr: Optional[str] = None) -> Optional[int]:
+        """在后台线程中提供/metrics接口，pytest-xdist下端口按worker序号递增，返回实际端口"""
+        if not self.enabled or self._server is not None:
+            return None
+        port = int(self.config.get("port", 0) if port is None else port)
+        if port <= 0:
+            return None
+        worker = worker_id()
+        if worker.startswith("gw"):
+            port += int(worker[2:])
+        self._server, _ = prometheus_client.start_http_server(
+            port, addr or self.config.get("addr", "127.0.0.1"), registry=self.registry
+        )
+        logger.info(f"Prometheus metrics served on http://{self._server.server_address[0]}:{port}/metrics")
+        return port
+
+    def stop_server(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def write_textfile(self, path: Optional[str] = None) -> Optional[Path]:
+        """以Prometheus文本格式写入文件，路径中的{worker}替换为pytest-xdist的worker名"""
+        path = path or self.config.get("textfile")
+        if not self.enabled or not path:
+            return None
+        path = Path(str(path).format(worker=worker_id()))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        prometheus_client.write_to_textfile(str(path), self.registry)
+        return path
+
+    def render(self) -> bytes:
+        """当前指标的Prometheus文本格式"""
+        return prometheus_client.generate_latest(self.registry) if self.enabled else b""
+
+# 创建全局指标实例
+request_metrics = RequestMetrics()
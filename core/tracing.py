@@ -0,0 +1,203 @@
+import threading
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Any, ContextManager, Optional, Sequence
+from config.settings import settings
+from core.json_codec import codec
+from core.log_sink import worker_id
+
+try:
+    from opentelemetry import trace
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+    from opentelemetry.trace import SpanKind, Status, StatusCode
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+except ImportError:
+    trace = None
+    SpanExporter = object
+
+# 请求耗时阶段 -> (RequestTiming耗时属性, 阶段结束时间戳属性)，作为请求span的事件
+TIMING_EVENTS = {
+    "queue": ("queue_wait", "start_time"),
+    "dns": ("dns_time", "dns_end"),
+    "connect": ("connect_time", "connect_end"),
+    "send": ("send_time", "send_end"),
+    "server": ("server_time", "receive_start"),
+    "receive": ("receive_time", "receive_end"),
+}
+
+def _any_value(value: Any) -> Dict[str, Any]:
+    """转换为OTLP/JSON的AnyValue"""
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_any_value(item) for item in value]}}
+    return {"stringValue": str(value)}
+
+def _attributes(attributes: Optional[Dict[str, Any]]) -> list:
+    return [{"key": key, "value": _any_value(value)} for key, value in (attributes or {}).items()]
+
+class JSONFileSpanExporter(SpanExporter):
+    """以OTLP/JSON格式追加写入文件，每次导出一行，与OpenTelemetry Collector的file exporter格式相同，
+    可由Collector的otlpjsonfile receiver导入Jaeger/Tempo等后端查看"""
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _span(span: "ReadableSpan") -> Dict[str, Any]:
+        context = span.get_span_context()
+        return {
+            "traceId": f"{context.trace_id:032x}",
+            "spanId": f"{context.span_id:016x}",
+            "parentSpanId": f"{span.parent.span_id:016x}" if span.parent else "",
+            "name": span.name,
+            # OTLP的SpanKind从1开始（SPAN_KIND_INTERNAL）
+            "kind": span.kind.value + 1,
+            "startTimeUnixNano": str(span.start_time),
+            "endTimeUnixNano": str(span.end_time),
+            "attributes": _attributes(span.attributes),
+            "events": [
+                {"timeUnixNano": str(event.timestamp), "name": event.name, "attributes": _attributes(event.attributes)}
+                for event in span.events
+            ],
+            "status": {"code": span.status.status_code.value, "message": span.status.description or ""},
+        }
+
+    def export(self, spans: Sequence["ReadableSpan"]) -> "SpanExportResult":
+        resource_spans = {}
+        for span in spans:
+            scope = span.instrumentation_scope
+            resource = resource_spans.setdefault(id(span.resource), (span.resource, {}))
+            resource[1].setdefault(scope.name if scope else "", []).append(self._span(span))
+        payload = {"resourceSpans": [
+            {
+                "resource": {"attributes": _attributes(resource.attributes)},
+                "scopeSpans": [{"scope": {"name": name}, "spans": items} for name, items in scopes.items()],
+            }
+            for resource, scopes in resource_spans.values()
+        ]}
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "ab") as f:
+                    f.write(codec.dumps(payload) + b"\n")
+        except OSError:
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+class Tracing:
+    """OpenTelemetry链路追踪：每个测试用例一个span，其下每次HTTP请求、每次数据库操作各一个子span
+
+    HTTP请求的各阶段耗时作为请求span的事件，请求头中注入W3C traceparent，被测服务接入链路追踪时
+    可以与服务端span关联。span导出到本地OTLP/JSON文件（每个worker一个），不需要Collector。
+    未开启时各方法返回空的上下文管理器，不产生额外开销。
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = settings.tracing_config if config is None else config
+        self.enabled = bool(self.config.get("enabled", False))
+        if self.enabled and trace is None:
+            raise ImportError("tracing.enabled is true but opentelemetry-sdk is not installed")
+        self.service_name = self.config.get("service_name", "api-test")
+        self._provider = None
+        self._tracer = None
+        self._lock = threading.Lock()
+
+    @property
+    def tracer(self) -> "trace.Tracer":
+        """首次使用时创建TracerProvider和导出文件"""
+        if self._tracer is None:
+            with self._lock:
+                if self._tracer is None:
+                    path = Path(str(self.config.get("file", "reports/traces_{worker}.jsonl")).format(worker=worker_id()))
+                    provider = TracerProvider(resource=Resource.create({"service.name": self.service_name}))
+                    provider.add_span_processor(BatchSpanProcessor(JSONFileSpanExporter(path)))
+                    self._provider = provider
+                    self._tracer = provider.get_tracer("api_test")
+        return self._tracer
+
+    def case_span(self, test_name: str, case_id: Optional[str] = None) -> ContextManager[Optional["trace.Span"]]:
+        """测试用例span，设置为当前上下文的span，用例内的请求和数据库操作作为其子span"""
+        if not self.enabled:
+            return nullcontext()
+        return self.tracer.start_as_current_span(
+            f"test {test_name}", attributes={"test.name": test_name, "test.case_id": case_id or ""}
+        )
+
+    def start_request_span(self, method: str, url: str) -> Optional["trace.Span"]:
+        """开始HTTP请求span，由end_request_span结束"""
+        if not self.enabled:
+            return None
+        return self.tracer.start_span(f"HTTP {method.upper()}", kind=SpanKind.CLIENT, attributes={
+            "http.request.method": method.upper(),
+            "url.full": url,
+        })
+
+    @staticmethod
+    def inject(headers: Dict[str, str], span: Optional["trace.Span"]) -> None:
+        """在请求头中注入traceparent"""
+        if span is not None:
+            TraceContextTextMapPropagator().inject(headers, context=trace.set_span_in_context(span))
+
+    @staticmethod
+    def end_request_span(span: Optional["trace.Span"], timing: Any, status: Optional[int] = None,
+                         error: Optional[BaseException] = None) -> None:
+        """记录状态码和各阶段耗时后结束span，timing为RequestTiming"""
+        if span is None:
+            return
+        # perf_counter时间戳转换为纳秒级Unix时间
+        offset = time.time() - time.perf_counter()
+        for name, (duration_attr, end_attr) in TIMING_EVENTS.items():
+            duration = getattr(timing, duration_attr)
+            end = getattr(timing, end_attr)
+            if duration is not None and end > 0:
+                span.add_event(name, {"duration_ms": round(duration * 1000, 3)},
+                               timestamp=int((offset + end) * 1e9))
+        span.set_attribute("http.connection_reused", timing.connection_reused)
+        if status is not None:
+            span.set_attribute("http.response.status_code", status)
+            if status >= 400:
+                span.set_status(Status(StatusCode.ERROR))
+        if error is not None:
+            span.record_exception(error)
+            span.set_status(Status(StatusCode.ERROR, f"{type(error).__name__}: {error}"))
+        end_time = int((offset + timing.receive_end) * 1e9) if timing.receive_end > 0 else None
+        span.end(end_time=end_time)
+
+    def db_span(self, system: str, operation: str, statement: Optional[str] = None,
+                collection: Optional[str] = None, database: Optional[str] = None
+                ) -> ContextManager[Optional["trace.Span"]]:
+        """数据库操作span，异常由OpenTelemetry记录并标记为错误"""
+        if not self.enabled:
+            return nullcontext()
+        attributes = {"db.system": system, "db.operation.name": operation}
+        if database:
+            attributes["db.namespace"] = database
+        if collection:
+            attributes["db.collection.name"] = collection
+        if statement:
+            attributes["db.query.text"] = statement
+        name = f"{operation} {collection or database or system}"
+        return self.tracer.start_as_current_span(name, kind=SpanKind.CLIENT, attributes=attributes)
+
+    def flush(self, timeout_ms: int = 30000) -> None:
+        if self._provider is not None:
+            self._provider.force_flush(timeout_ms)
+
+    def shutdown(self) -> None:
+        """导出剩余span"""
+        if self._provider is not None:
+            self._provider.shutdown()
+            self._provider = self._tracer = None
+
+# 创建全局链路追踪实例
+tracing = Tracing()
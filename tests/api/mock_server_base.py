@@ -0,0 +1,15 @@
+import pytest
+from core.base_test import BaseTest
+from clients.http_client import HTTPClient
+from clients.retry import RetryPolicy
+
+class MockServerTest(BaseTest):
+    """使用进程内Mock服务的离线用例基类"""
+
+    @pytest.fixture(autouse=True)
+    async def use_mock_server(self, mock_server):
+        """将HTTP客户端指向Mock服务"""
+        self.server = mock_server
+        self.http_client = HTTPClient(mock_server.url, retry_policy=RetryPolicy(max_retries=2, backoff_base=0.01))
+        yield
+        await self.http_client.close()
@@ -0,0 +1,40 @@
+import pytest
+from clients.cassette import Cassette, CassetteMissError
+from clients.http_client import HTTPClient
+from tests.api.mock_server_base import MockServerTest
+
+class TestCassette(MockServerTest):
+    """请求录制和回放"""
+
+    async def test_cassette_record_and_replay(self, tmp_path):
+        """测试录制、回放、strict模式未命中，以及record模式只替换本次重新录制的请求"""
+        path = tmp_path / "cassette.jsonl.gz"
+        self.server.add_route("GET", "/version", json={"version": 1})
+        self.server.add_route("POST", "/orders", json={"order": 1})
+
+        async def _request(mode, **kwargs):
+            client = HTTPClient(self.server.url, cassette=Cassette(path, mode))
+            try:
+                return await client.request(**kwargs), client.cassette
+            finally:
+                client.cassette.save()
+                await client.close()
+
+        await _request("record", method="GET", endpoint="/version", params={"b": 2, "a": 1})
+        await _request("record", method="POST", endpoint="/orders", json={"x": 1, "y": 2})
+
+        # 参数和JSON字段的顺序不影响匹配
+        self.server.add_route("GET", "/version", json={"version": 2})
+        response, cassette = await _request("strict", method="GET", endpoint="/version?a=1&b=2")
+        assert response.data == {"version": 1} and len(cassette) == 2
+        response, _ = await _request("strict", method="POST", endpoint="/orders", json={"y": 2, "x": 1})
+        assert response.data == {"order": 1}
+        with pytest.raises(CassetteMissError):
+            await _request("strict", method="GET", endpoint="/version", params={"a": 3})
+
+        # 只重新录制/version，/orders的记录保留
+        await _request("record", method="GET", endpoint="/version", params={"a": 1, "b": 2})
+        response, cassette = await _request("replay", method="GET", endpoint="/version", params={"a": 1, "b": 2})
+        assert response.data == {"version": 2} and len(cassette) == 2
+        response, _ = await _request("replay", method="POST", endpoint="/orders", json={"x": 1, "y": 2})
+        assert response.data == {"order": 1}
@@ -0,0 +1,30 @@
+import asyncio
+from clients.connection_pool import connection_pool
+from clients.http_client import HTTPClient
+from tests.api.mock_server_base import MockServerTest
+
+class TestConnectionPool(MockServerTest):
+    """共享连接池的连接复用"""
+
+    async def test_connection_reuse(self):
+        """测试keep-alive连接复用"""
+        await self.http_client.request(method="GET", endpoint="/get")
+        response = await self.http_client.request(method="GET", endpoint="/get")
+        assert response.timing.connection_reused
+
+    async def test_clients_share_pooled_connector(self):
+        """测试同一事件循环中的多个客户端共用一个connector，后创建的客户端复用已建立的连接"""
+        first, second = HTTPClient(self.server.url, pooled=True), HTTPClient(self.server.url, pooled=True)
+        try:
+            await first.request(method="GET", endpoint="/get")
+            before = connection_pool.stats.hits
+            response = await second.request(method="GET", endpoint="/get")
+        finally:
+            await first.close()
+            await second.close()
+        assert response.timing.connection_reused
+        assert connection_pool.stats.hits > before
+        assert first._connector is second._connector is connection_pool.get_connector()
+        assert connection_pool._connectors[asyncio.get_running_loop()] is first._connector
+        # 客户端关闭时不关闭共享的connector
+        assert not first._connector.closed
@@ -0,0 +1,89 @@
+import asyncio
+import pytest
+from clients.dns_cache import CachingResolver
+
+class FakeResolver(CachingResolver):
+    """不访问网络的解析器，记录每次实际解析；fail为True时解析失败"""
+    def __init__(self, config, record_ttl: float = 60, delay: float = 0.0):
+        super().__init__(config)
+        self.lookups = []
+        self.record_ttl_value = record_ttl
+        self.delay = delay
+        self.fail = False
+
+    async def _lookup(self, host, port, family):
+        self.lookups.append(host)
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise OSError(f"DNS lookup failed for {host}")
+        return [{"hostname": host, "host": "127.0.0.1", "port": port}], self.record_ttl_value
+
+class TestDNSCache:
+    """DNS缓存的过期、失败缓存、解析合并和命中统计"""
+
+    async def test_ttl_expiry(self):
+        """测试缓存按TTL过期，过期后重新解析"""
+        resolver = FakeResolver({"cache": True}, record_ttl=0.05)
+        await resolver.resolve("api.example.com", 80)
+        await resolver.resolve("api.example.com", 80)
+        assert len(resolver.lookups) == 1
+        await asyncio.sleep(0.06)
+        await resolver.resolve("api.example.com", 80)
+        assert len(resolver.lookups) == 2
+        assert (resolver.stats.hits, resolver.stats.misses) == (1, 2)
+
+    async def test_negative_caching(self):
+        """测试解析失败的结果按negative_ttl缓存，过期前不重新解析"""
+        resolver = FakeResolver({"cache": True, "negative_ttl": 0.05})
+        resolver.fail = True
+        for _ in range(2):
+            with pytest.raises(OSError):
+                await resolver.resolve("missing.example.com", 80)
+        assert len(resolver.lookups) == 1
+        assert (resolver.stats.errors, resolver.stats.hits) == (1, 1)
+
+        resolver.fail = False
+        await asyncio.sleep(0.06)
+        hosts = await resolver.resolve("missing.example.com", 80)
+        assert hosts[0]["host"] == "127.0.0.1" and len(resolver.lookups) == 2
+
+    async def test_inflight_coalescing(self):
+        """测试同一host的并发解析只发起一次查询，不同端口分别解析"""
+        resolver = FakeResolver({"cache": True}, delay=0.02)
+        results = await asyncio.gather(*(resolver.resolve("api.example.com", 80) for _ in range(5)),
+                                       resolver.resolve("api.example.com", 443))
+        assert [hosts[0]["port"] for hosts in results] == [80] * 5 + [443]
+        assert len(resolver.lookups) == 2 and resolver.stats.coalesced == 4
+
+    async def test_stats(self):
+        """测试命中统计和命中率，合并到进行中查询的请求也算命中"""
+        resolver = FakeResolver({"cache": True}, delay=0.01)
+        await asyncio.gather(resolver.resolve("a.example.com", 80), resolver.resolve("a.example.com", 80))
+        await resolver.resolve("a.example.com", 80)
+        await resolver.resolve("b.example.com", 80)
+        assert resolver.stats.to_dict() == {
+            "dns_hits": 1, "dns_misses": 2, "dns_coalesced": 1, "dns_errors": 0, "hit_rate": 0.5
+        }
+        resolver.clear()
+        await resolver.resolve("a.example.com", 80)
+        assert resolver.stats.misses == 3
+
+    async def test_dns_waiters_survive_cancelled_lookup(self):
+        """测试发起解析的请求被取消时，合并到该解析的请求自己重新解析而不是一直等待"""
+        lookups = []
+
+        class SlowResolver(CachingResolver):
+            async def _lookup(self, host, port, family):
+                lookups.append(host)
+                await asyncio.sleep(0.2)
+                return [{"hostname": host, "host": "127.0.0.1", "port": port}], 60
+
+        resolver = SlowResolver({"cache": True})
+        owner = asyncio.ensure_future(resolver.resolve("api.example.com", 80))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.ensure_future(resolver.resolve("api.example.com", 80))
+        await asyncio.sleep(0.01)
+        owner.cancel()
+        hosts = await asyncio.wait_for(waiter, timeout=2)
+        assert hosts[0]["host"] == "127.0.0.1"
+        assert len(lookups) == 2 and resolver.stats.coalesced == 1
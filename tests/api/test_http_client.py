@@ -0,0 +1,124 @@
+import asyncio
+import time
+import aiohttp
+import pytest
+from clients.http_client import HTTPClient
+from clients.retry import RetryPolicy, HedgePolicy
+from utils.mock_server import Latency, MockResponse
+from tests.api.mock_server_base import MockServerTest
+
+class TestHTTPClient(MockServerTest):
+    """异步HTTP客户端的重试、对冲、批量请求和流式响应"""
+
+    async def test_retry_on_injected_error(self):
+        """测试错误注入后按策略重试"""
+        attempts = []
+
+        def _flaky(request):
+            attempts.append(request)
+            return MockResponse(status=503 if len(attempts) < 3 else 200, body={"ok": True})
+
+        self.server.add_route("GET", "/flaky", handler=_flaky)
+        response = await self.http_client.request(method="GET", endpoint="/flaky")
+        self.verify_response(response, 200)
+        assert response.timing.attempts == 3
+
+    async def test_retry_stops_at_overall_timeout(self):
+        """测试api.timeout限制包括重试在内的总耗时"""
+        self.server.add_route("GET", "/unavailable", status=503, latency=Latency.fixed(200))
+        client = HTTPClient(self.server.url, retry_policy=RetryPolicy(max_retries=5, backoff_base=0.01))
+        client.timeout = aiohttp.ClientTimeout(total=0.3)
+        start = time.perf_counter()
+        try:
+            with pytest.raises(asyncio.TimeoutError):
+                await client.request(method="GET", endpoint="/unavailable")
+        finally:
+            await client.close()
+        assert time.perf_counter() - start < 0.45
+
+    async def test_throttled_request_waits_for_retry_after(self):
+        """测试429响应后按Retry-After暂停并重试"""
+        attempts = []
+
+        def _throttled(request):
+            attempts.append(request)
+            if len(attempts) == 1:
+                return MockResponse(status=429, headers={"Retry-After": "0.2"})
+            return {"ok": True}
+
+        self.server.add_route("GET", "/throttled", handler=_throttled)
+        response = await self.http_client.request(method="GET", endpoint="/throttled")
+        self.verify_response(response, 200)
+        assert response.timing.attempts == 2
+        assert response.timing.retry_wait + (response.timing.queue_wait or 0.0) >= 0.2
+
+    async def test_hedged_request(self):
+        """测试请求超过同一接口模板的历史延迟时发送对冲请求"""
+        delays = iter([0.005] * 5 + [0.5])
+        self.server.add_route("GET", "/items/{item_id}", json={"ok": True}, latency=lambda: next(delays, 0.005))
+        policy = HedgePolicy(enabled=True, min_samples=5, min_delay=0.02)
+        client = HTTPClient(self.server.url, hedge=policy)
+        try:
+            for i in range(5):
+                response = await client.request(method="GET", endpoint=f"/items/{i}")
+                assert not response.timing.hedged
+            start = time.perf_counter()
+            response = await client.request(method="GET", endpoint="/items/99")
+        finally:
+            await client.close()
+        assert response.timing.hedged and response.timing.hedge_won
+        assert time.perf_counter() - start < 0.3
+        assert list(policy._samples) == ["GET /items/{id}"]
+
+    async def test_request_many_with_latency(self):
+        """测试并发批量请求按输入顺序返回"""
+        self.server.add_route("GET", "/items/{item_id}", latency=Latency.uniform(1, 10),
+                              handler=lambda r: {"id": r.match_info["item_id"]})
+        specs = [{"method": "GET", "endpoint": f"/items/{i}"} for i in range(50)]
+        results = await self.http_client.request_many(specs, concurrency=10)
+        assert all(result.ok for result in results)
+        assert [result.response.data["id"] for result in results] == [str(i) for i in range(50)]
+
+    async def test_request_many_with_malformed_spec(self):
+        """测试无法转换的请求描述记录为失败结果，specs迭代异常交给调用方，均不会一直等待"""
+        specs = [{"endpoint": "/get"}, {"method": "GET", "endpoint": "/get"}]
+        results = await asyncio.wait_for(self.http_client.request_many(specs, concurrency=2), timeout=5)
+        assert isinstance(results[0].error, KeyError) and results[0].spec is None
+        assert results[1].ok
+
+        def _broken_specs():
+            yield {"method": "GET", "endpoint": "/get"}
+            raise RuntimeError("spec source failed")
+
+        with pytest.raises(RuntimeError, match="spec source failed"):
+            await asyncio.wait_for(self.http_client.request_many(_broken_specs(), concurrency=2), timeout=5)
+
+    async def test_stream_chunked_json_array(self):
+        """测试流式解析分块传输的大JSON数组"""
+        items = [{"id": i, "name": f"item_{i}"} for i in range(20000)]
+        self.server.add_route("GET", "/export", json=items, chunked=True, chunk_size=4096)
+        async with self.http_client.stream("GET", "/export") as response:
+            count = 0
+            async for item in response.iter_json_array():
+                assert item["id"] == count
+                count += 1
+        assert count == len(items)
+
+    async def test_concurrent_case_context(self):
+        """测试同一事件循环中并发执行的用例日志归属于各自的用例"""
+        self.server.add_route("GET", "/cases/{n}", latency=Latency.uniform(1, 20),
+                              handler=lambda r: {"n": r.match_info["n"]})
+        outer_case_id = self.logger.case_id
+
+        async def _run_case(n):
+            with self.logger.case_context(f"concurrent_case_{n}") as case:
+                for _ in range(3):
+                    await self.http_client.request(method="GET", endpoint=f"/cases/{n}")
+                return case
+
+        cases = await asyncio.gather(*(_run_case(n) for n in range(5)))
+        assert self.logger.case_id == outer_case_id
+        for n, case in enumerate(cases):
+            text = case.log_file.read_text(encoding="utf-8")
+            assert text.count(f"/cases/{n}") == 3
+            assert not any(f"/cases/{other}" in text for other in range(5) if other != n)
@@ -0,0 +1,37 @@
+import math
+import pytest
+from core.json_codec import JSONCodec, orjson
+
+BIG_INT = 2 ** 70
+
+class TestJSONCodec:
+    """JSON编解码器两种后端的边界情况"""
+
+    def test_default_backend_is_stdlib(self):
+        """测试默认使用标准库，超过64位的整数和NaN可以往返"""
+        codec = JSONCodec()
+        assert codec.backend == "json"
+        assert codec.loads(codec.dumps({"n": BIG_INT})) == {"n": BIG_INT}
+        assert codec.dumps({"名": 1}) == '{"名":1}'.encode("utf-8")
+        assert math.isnan(codec.loads(codec.dumps(float("nan"))))
+        with pytest.raises(ValueError):
+            codec.loads(b"{invalid")
+
+    @pytest.mark.skipif(orjson is None, reason="orjson is not installed")
+    def test_orjson_backend_edge_cases(self):
+        """测试orjson后端超过64位的整数、NaN和非字符串键的处理"""
+        codec = JSONCodec("orjson")
+        assert codec.backend == "orjson"
+        # 序列化时回退到标准库，结果与标准库相同
+        assert codec.dumps({"n": BIG_INT}) == JSONCodec("json").dumps({"n": BIG_INT})
+        # 解析时转为float
+        assert codec.loads(str(BIG_INT)) == float(BIG_INT)
+        assert codec.dumps(float("nan")) == b"null"
+        assert math.isnan(codec.loads(b"NaN"))
+        assert codec.loads(codec.dumps({1: "a"})) == {"1": "a"}
+        with pytest.raises(ValueError):
+            codec.loads(b"{invalid")
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            JSONCodec("simdjson")
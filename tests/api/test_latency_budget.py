@@ -0,0 +1,48 @@
+import pytest
+from core.latency_baseline import LatencyRecorder, compare
+from core.latency_budget import latency_budgets
+from utils.mock_server import Latency
+from tests.api.mock_server_base import MockServerTest
+
+class TestLatencyBudget(MockServerTest):
+    """延迟预算检查和基线对比"""
+
+    @pytest.mark.latency_budget({"total": {"p50": 1000, "p99": 2000}})
+    async def test_latency_budget_marker(self):
+        """测试标记的用例按该用例内请求的百分位检查预算"""
+        self.server.add_route("GET", "/fast", json={"ok": True}, latency=Latency.fixed(5))
+        for _ in range(10):
+            await self.http_client.request(method="GET", endpoint="/fast")
+        # 标记的预算应用于该用例的所有请求
+        collector = latency_budgets._collectors.get()[-1]
+        assert collector.rules == {"*": {"total": {"p50": 1000.0, "p99": 2000.0}}}
+        assert collector.histograms[("*", "total")].count == 10
+        assert collector.check() == []
+
+    async def test_latency_budget_violation(self):
+        """测试百分位超出预算时报告对应的接口和阶段"""
+        self.server.add_route("GET", "/slow", json={"ok": True}, latency=Latency.fixed(30))
+        with latency_budgets.collect({"GET /slow": {"total": {"p50": 10}, "server": {"p95": 1000}}}) as collector:
+            for _ in range(5):
+                await self.http_client.request(method="GET", endpoint="/slow")
+            await self.http_client.request(method="GET", endpoint="/get")
+        violations = collector.check()
+        assert [(v.endpoint, v.phase, v.percentile) for v in violations] == [("GET /slow", "total", "p50")]
+        assert violations[0].actual_ms >= 30 and violations[0].count == 5
+
+    async def test_latency_baseline_regression(self):
+        """测试与基线对比时标记变慢的接口和变化的阶段"""
+        route = self.server.add_route("GET", "/reports/{report_id}", json={"ok": True})
+
+        async def _run(server_ms):
+            route.latency = Latency.normal(server_ms, server_ms * 0.1)
+            recorder = LatencyRecorder()
+            for i in range(30):
+                response = await self.http_client.request(method="GET", endpoint=f"/reports/{i}")
+                recorder.record("GET", f"/reports/{i}", response.timing)
+            return recorder
+
+        baseline, current = await _run(5), await _run(25)
+        report = compare(baseline, current, min_samples=20)
+        assert report["regressions"] == ["GET /reports/{id}"]
+        assert report["endpoints"]["GET /reports/{id}"]["dominant_phase"] == "server"
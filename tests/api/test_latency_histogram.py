@@ -0,0 +1,41 @@
+import math
+import random
+import pytest
+from utils.latency_histogram import LatencyHistogram
+
+class TestLatencyHistogram:
+    """延迟直方图的百分位精度、合并和序列化"""
+
+    def test_percentile_within_precision(self):
+        """测试百分位与精确值的相对误差不超过有效数字精度"""
+        rng = random.Random(42)
+        values = [rng.lognormvariate(3, 1) for _ in range(10000)]
+        histogram = LatencyHistogram(significant_digits=2)
+        histogram.record_many(values)
+        ordered = sorted(values)
+        for percentile in (50, 90, 99, 99.9):
+            exact = ordered[math.ceil(len(ordered) * percentile / 100) - 1]
+            assert abs(histogram.percentile(percentile) - exact) <= exact * 0.01 + 0.001
+        assert histogram.count == 10000
+        assert histogram.percentile(100) == histogram.summary()["max"] == round(max(values) * 1000) / 1000
+        assert histogram.mean == pytest.approx(sum(values) / len(values), rel=1e-3)
+
+    def test_small_values_are_exact(self):
+        """测试小于子桶数的微秒值精确记录，空直方图返回0"""
+        assert LatencyHistogram().percentile(99) == 0.0
+        histogram = LatencyHistogram()
+        histogram.record_many([0.001, 0.002, 0.003, 0.004])
+        assert [histogram.percentile(p) for p in (25, 50, 75, 100)] == [0.001, 0.002, 0.003, 0.004]
+        assert histogram.summary()["min"] == 0.001
+
+    def test_merge_and_serialize(self):
+        """测试合并后与一次性记录全部值的结果相同，to_dict/from_dict可往返"""
+        first, second, combined = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for i in range(1, 1001):
+            (first if i % 2 else second).record(i / 10)
+            combined.record(i / 10)
+        merged = first.merge(LatencyHistogram.from_dict(second.to_dict()))
+        assert merged.to_dict() == combined.to_dict()
+        assert merged.summary() == combined.summary()
+        with pytest.raises(ValueError):
+            merged.merge(LatencyHistogram(significant_digits=3))
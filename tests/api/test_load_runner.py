@@ -0,0 +1,27 @@
+from clients.http_client import RequestSpec
+from clients.load_runner import LoadRunner
+from utils.mock_server import Latency
+from tests.api.mock_server_base import MockServerTest
+
+class TestLoadRunner(MockServerTest):
+    """开环和闭环压测"""
+
+    async def test_load_runner_rate(self):
+        """测试开环压测按目标速率发送请求，未限流时不记录排队耗时"""
+        self.server.add_route("GET", "/load", json={"ok": True}, latency=Latency.fixed(20))
+        runner = LoadRunner(self.http_client, RequestSpec("GET", "/load"), rate=100, duration=0.5)
+        report = await runner.run()
+        assert 49 <= report.scheduled <= 51
+        assert report.completed == report.scheduled and report.dropped == 0 and not report.errors
+        assert report.status_counts == {200: report.completed}
+        assert report.response_time.count == report.completed and report.response_time.percentile(50) >= 20
+        # 未限流时没有排队耗时
+        assert "queue" not in report.phases and report.phases["server"].count == report.completed
+
+    async def test_load_runner_concurrency(self):
+        """测试闭环压测的并发数限制吞吐量"""
+        self.server.add_route("GET", "/load", json={"ok": True}, latency=Latency.fixed(20))
+        report = await LoadRunner(self.http_client, RequestSpec("GET", "/load"), concurrency=2, duration=0.3).run()
+        # 每个worker每秒最多约50个请求
+        assert 10 <= report.completed <= 32 and not report.errors
+        assert report.throughput <= 110
@@ -0,0 +1,154 @@
+import io
+import threading
+import time
+import pytest
+from core import log_extract
+from core.log_sink import iter_index, read_case
+from core.logger import Logger, LogBody
+
+def _logger(tmp_path, stream=None, **config) -> Logger:
+    """同步输出的Logger，日志写入tmp_path"""
+    return Logger({"queue": False, **config}, log_dir=str(tmp_path), stream=stream or io.StringIO())
+
+class TestLogger:
+    """日志格式化、采样和级别过滤"""
+
+    def test_body_truncation(self, tmp_path):
+        """测试超过max_body_bytes的请求/响应体被截断"""
+        assert LogBody(b"x" * 100).render(10) == "x" * 10 + "... <truncated, 100 bytes total>"
+        assert LogBody({"a": "y" * 100}).render(20).endswith("... <truncated, 113 chars total>")
+        assert LogBody(b'{"a": 1}', "application/json").render(10) == '{\n  "a": 1\n}'
+
+        logger = _logger(tmp_path, max_body_bytes=16)
+        with logger.case_context("test_truncation") as case:
+            logger.log_response(status_code=200, response_data=b"z" * 1000, content_type="text/plain")
+        text = case.log_file.read_text(encoding="utf-8")
+        assert "z" * 16 + "... <truncated, 1000 bytes total>" in text and "z" * 17 not in text
+        logger.shutdown()
+
+    def test_body_sampling_by_endpoint_template(self, tmp_path):
+        """测试按接口模板采样，路径中的ID不增加采样状态"""
+        logger = _logger(tmp_path, body_sampling={"default": 1, "endpoints": {"GET /users/*": 3}})
+        assert [logger.sample_body("GET", f"/users/{i}?page=1") for i in range(6)] == [True, False, False] * 2
+        assert all(logger.sample_body("POST", f"/users/{i}") for i in range(3))
+        assert set(logger._sample_rates) == {"GET /users/{id}", "POST /users/{id}"}
+        logger.shutdown()
+
+    def test_level_gating(self, tmp_path):
+        """测试低于logging.level的日志不输出也不格式化"""
+        stream = io.StringIO()
+        logger = _logger(tmp_path, stream=stream, level="INFO")
+        formatted = []
+
+        class _Field:
+            def __str__(self):
+                formatted.append(True)
+                return "field"
+
+        logger.debug("debug message", field=_Field())
+        logger.log_request(method="GET", url="http://example.com", headers={"X-Field": _Field()})
+        logger.info("info message")
+        assert not logger.is_enabled_for("DEBUG") and logger.is_enabled_for("WARNING")
+        assert "info message" in stream.getvalue() and "debug message" not in stream.getvalue()
+        assert "API Request Details" not in stream.getvalue() and not formatted
+        logger.shutdown()
+
+class _BlockingStream(io.StringIO):
+    """released之前写入阻塞，模拟后台日志线程处理不过来"""
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def write(self, text: str) -> int:
+        self.released.wait(5)
+        return super().write(text)
+
+class TestLogQueue:
+    """后台日志队列满时的丢弃策略和flush"""
+
+    def _fill(self, tmp_path, drop_policy: str, count: int, **config):
+        stream = _BlockingStream()
+        logger = Logger({"queue": True, "queue_size": 3, "drop_policy": drop_policy, **config},
+                        log_dir=str(tmp_path), stream=stream)
+        # 第一条日志被后台线程取出后阻塞在写入，之后的日志留在队列中
+        logger.info("message 0")
+        while not logger._queue_handler.queue.empty():
+            time.sleep(0.001)
+        for i in range(1, count):
+            logger.info(f"message {i}")
+        return logger, stream
+
+    @pytest.mark.parametrize("drop_policy, kept", [("drop_new", [0, 1, 2, 3]), ("drop_old", [0, 7, 8, 9])])
+    def test_drop_when_full(self, tmp_path, drop_policy, kept):
+        """测试队列满时按策略丢弃，flush后剩余日志全部输出"""
+        logger, stream = self._fill(tmp_path, drop_policy, 10)
+        assert logger.dropped == 6
+        stream.released.set()
+        assert logger.flush()
+        assert [int(line.rsplit(" ", 1)[1]) for line in stream.getvalue().splitlines()] == kept
+        logger.shutdown()
+
+    def test_block_waits_once_then_drops(self, tmp_path):
+        """测试block策略最多等待block_timeout秒，不忙等"""
+        logger, stream = self._fill(tmp_path, "block", 4, block_timeout=0.1)
+        start = time.perf_counter()
+        logger.info("message 4")
+        assert 0.09 <= time.perf_counter() - start < 0.5 and logger.dropped == 1
+        # flush在超时内等不到空间时返回False
+        assert not logger.flush(timeout=0.05)
+        stream.released.set()
+        assert logger.flush()
+        logger.shutdown()
+
+class TestJSONLSink:
+    """JSONL日志、用例偏移量索引和提取命令"""
+
+    @pytest.fixture
+    def jsonl_logs(self, tmp_path):
+        """两个交错执行的用例和一个未结束（未写索引）的用例"""
+        logger = _logger(tmp_path, sink="jsonl")
+        first = logger.start_test_case("test_module.test_first")
+        logger.info("first 1")
+        second = logger.start_test_case("test_module.test_second")
+        logger.info("second 1")
+        logger.end_test_case(second)
+        logger.info("first 2")
+        logger.end_test_case(first)
+        unfinished = logger.start_test_case("test_module.test_unfinished")
+        logger.info("unfinished 1")
+        logger.flush()
+        yield tmp_path, first.case_id, second.case_id, unfinished.case_id
+        logger.shutdown()
+
+    def test_offset_index(self, jsonl_logs):
+        """测试索引记录用例在JSONL文件中的字节范围，读取时过滤交错的其他用例"""
+        log_dir, first, second, unfinished = jsonl_logs
+        index = {entry["case_id"]: entry for entry in iter_index(log_dir)}
+        assert set(index) == {first, second}
+        assert index[first]["start"] < index[second]["start"] < index[second]["end"] < index[first]["end"]
+        assert index[second]["test_name"] == "test_module.test_second"
+
+        messages = [record["message"] for record in read_case(log_dir, first)]
+        assert "first 1" in messages and "first 2" in messages and "second 1" not in messages
+        assert len(messages) == index[first]["count"]
+        # 未写入索引的用例扫描JSONL文件
+        assert "unfinished 1" in [record["message"] for record in read_case(log_dir, unfinished)]
+        assert read_case(log_dir, "test_00000000_000000_00000000") == []
+
+    def test_extract_cli(self, jsonl_logs, capsys, tmp_path):
+        """测试提取命令按case_id或测试名输出单个用例的日志"""
+        log_dir, first, second, _ = jsonl_logs
+        log_extract.main(["--list", "--log-dir", str(log_dir)])
+        listed = capsys.readouterr().out.splitlines()
+        assert [line.split()[0] for line in listed] == [second, first]
+
+        output = tmp_path / "second.log"
+        log_extract.main([second, "--log-dir", str(log_dir), "-o", str(output)])
+        lines = output.read_text(encoding="utf-8").splitlines()
+        assert all(f"[{second}]" in line for line in lines if line.startswith("20"))
+        assert any(line.endswith("[INFO] [" + second + "] second 1") for line in lines)
+
+        log_extract.main(["test_first", "--log-dir", str(log_dir)])
+        assert "first 2" in capsys.readouterr().out
+        with pytest.raises(SystemExit):
+            log_extract.main(["test_missing", "--log-dir", str(log_dir)])
@@ -0,0 +1,44 @@
+import json
+import pytest
+from core.metrics import request_metrics
+from core.tracing import Tracing
+from tests.api.mock_server_base import MockServerTest
+
+class TestRequestMetrics(MockServerTest):
+    """请求指标和链路追踪"""
+
+    async def test_request_metrics(self):
+        """测试请求指标按接口模板和状态码分类聚合"""
+        if not request_metrics.enabled:
+            pytest.skip("metrics disabled")
+        self.server.add_route("GET", "/orders/{order_id}", handler=lambda r: {"id": r.match_info["order_id"]})
+        labels = {"method": "GET", "endpoint": "/orders/{id}", "status_class": "2xx"}
+        before = request_metrics.registry.get_sample_value("api_requests_total", labels) or 0
+        for order_id in range(3):
+            await self.http_client.request(method="GET", endpoint=f"/orders/{order_id}")
+        assert request_metrics.registry.get_sample_value("api_requests_total", labels) == before + 3
+        assert request_metrics.registry.get_sample_value(
+            "api_request_phase_seconds_count", {"method": "GET", "endpoint": "/orders/{id}", "phase": "server"}
+        ) >= 3
+
+    async def test_request_tracing(self, tmp_path, monkeypatch):
+        """测试请求span作为用例span的子span导出，请求头中携带traceparent"""
+        trace_file = tmp_path / "traces.jsonl"
+        tracing = Tracing({"enabled": True, "file": str(trace_file)})
+        monkeypatch.setattr("clients.http_client.tracing", tracing)
+        with tracing.case_span("test_request_tracing", self.logger.case_id):
+            response = await self.http_client.request(method="GET", endpoint="/headers")
+        tracing.shutdown()
+
+        traceparent = {k.lower(): v for k, v in response.data["headers"].items()}["traceparent"]
+        spans = {
+            span["name"]: span
+            for line in trace_file.read_text().splitlines()
+            for resource in json.loads(line)["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for span in scope["spans"]
+        }
+        case_span, request_span = spans["test test_request_tracing"], spans["HTTP GET"]
+        assert request_span["parentSpanId"] == case_span["spanId"]
+        assert traceparent.split("-")[1:3] == [request_span["traceId"], request_span["spanId"]]
+        assert {"send", "server", "receive"} <= {event["name"] for event in request_span["events"]}
@@ -0,0 +1,61 @@
+import asyncio
+import pytest
+from tests.api.mock_server_base import MockServerTest
+
+class TestMockServer(MockServerTest):
+    """Mock服务的路由存根、httpbin内置路由和请求解析"""
+
+    async def test_route_stub(self):
+        """测试带路径参数的路由存根"""
+        self.server.add_route("GET", "/users/{user_id}", handler=lambda r: {"id": int(r.match_info["user_id"])})
+        response = await self.http_client.request(method="GET", endpoint="/users/42")
+        self.verify_response(response, 200)
+        assert response.data == {"id": 42}
+
+    async def test_override_builtin_route(self):
+        """测试后注册的路由覆盖httpbin内置路由"""
+        self.server.add_route("GET", "/get", json={"stubbed": True})
+        self.server.add_route("GET", "/status/{code}", json={"stubbed": "status"})
+        assert (await self.http_client.request(method="GET", endpoint="/get")).data == {"stubbed": True}
+        assert (await self.http_client.request(method="GET", endpoint="/status/404")).data == {"stubbed": "status"}
+
+    async def test_route_registration_order(self):
+        """测试按注册顺序匹配：后注册的*路由和带占位符的路由覆盖先注册的静态路由"""
+        self.server.add_route("*", "/get", json={"stubbed": "any"})
+        assert (await self.http_client.request(method="GET", endpoint="/get")).data == {"stubbed": "any"}
+
+        self.server.add_route("GET", "/users/1", json={"static": True})
+        assert (await self.http_client.request(method="GET", endpoint="/users/1")).data == {"static": True}
+        self.server.add_route("GET", "/users/{id}", handler=lambda r: {"pattern": r.match_info["id"]})
+        assert (await self.http_client.request(method="GET", endpoint="/users/1")).data == {"pattern": "1"}
+        # 再注册的静态路由又覆盖带占位符的路由
+        self.server.add_route("GET", "/users/1", json={"static": "again"})
+        assert (await self.http_client.request(method="GET", endpoint="/users/1")).data == {"static": "again"}
+        assert (await self.http_client.request(method="GET", endpoint="/users/2")).data == {"pattern": "2"}
+
+    async def test_bad_requests_do_not_drop_connection(self):
+        """测试同步handler出错时返回500，Content-Length无效时返回400"""
+        response = await self.http_client.request(method="GET", endpoint="/status/abc")
+        self.verify_response(response, 500)
+
+        reader, writer = await asyncio.open_connection(self.server.host, self.server.port)
+        writer.write(b"POST /post HTTP/1.1\r\nHost: mock\r\nContent-Length: abc\r\n\r\n")
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        writer.close()
+        assert status_line.startswith(b"HTTP/1.1 400")
+
+    async def test_post_echo(self):
+        """测试POST请求体回显"""
+        payload = {"name": "test", "age": 20}
+        response = await self.http_client.request(method="POST", endpoint="/post", json=payload)
+        self.verify_response(response, 200)
+        assert response.data["json"] == payload
+
+    @pytest.mark.parametrize("encoding", ["gzip", "deflate"])
+    async def test_compressed_response(self, encoding):
+        """测试压缩响应自动解压"""
+        response = await self.http_client.request(method="GET", endpoint=f"/{encoding}")
+        self.verify_response(response, 200)
+        assert response.headers["Content-Encoding"] == encoding
+        assert response.data[f"{encoding}ped" if encoding == "gzip" else "deflated"] is True
@@ -0,0 +1,79 @@
+import asyncio
+import time
+import pytest
+from clients.http_client import HTTPClient
+from clients.rate_limiter import RateLimiter
+from utils.mock_server import MockResponse
+from tests.api.mock_server_base import MockServerTest
+
+class TestRateLimiter(MockServerTest):
+    """按host的令牌桶限速、并发数限制和429后的自适应降速"""
+
+    @pytest.fixture
+    async def limited_client(self, monkeypatch):
+        """使用测试限流配置的HTTP客户端，返回(client, 该host的限流器)"""
+        limiter = RateLimiter({"enabled": True, "split_across_workers": False, "default": {}})
+        monkeypatch.setattr("clients.http_client.rate_limiter", limiter)
+        client = HTTPClient(self.server.url, rate_limited=True)
+        yield client, limiter
+        await client.close()
+
+    def _configure(self, limiter: RateLimiter, **config):
+        limiter.config["default"] = config
+        limiter.clear()
+        return limiter.for_url(self.server.url)
+
+    async def test_rate_spacing(self, limited_client):
+        """测试超过突发量的请求按速率间隔放行，并记录排队耗时"""
+        client, limiter = limited_client
+        host_limiter = self._configure(limiter, rate=20, burst=1, adaptive=False)
+        start = time.perf_counter()
+        responses = await asyncio.gather(*(client.request(method="GET", endpoint="/get") for _ in range(5)))
+        # 第一个请求立即放行，之后每50ms放行一个
+        assert time.perf_counter() - start >= 0.19
+        waits = sorted(response.timing.queue_wait for response in responses)
+        assert all(wait is not None for wait in waits)
+        assert waits[0] < 0.03 and waits[-1] >= 0.19
+        assert host_limiter.stats.requests == 5 and host_limiter.stats.queued == 4
+
+    async def test_max_in_flight(self, limited_client):
+        """测试同时进行的请求数不超过max_in_flight"""
+        client, limiter = limited_client
+        self._configure(limiter, max_in_flight=2)
+        in_flight, peak = 0, 0
+
+        async def _slow(request):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.03)
+            in_flight -= 1
+            return {"ok": True}
+
+        self.server.add_route("GET", "/slow", handler=_slow)
+        responses = await asyncio.gather(*(client.request(method="GET", endpoint="/slow") for _ in range(6)))
+        assert all(response.status == 200 for response in responses)
+        assert peak == 2
+
+    async def test_rate_decrease_after_throttle(self, limited_client):
+        """测试收到429后按观测速率乘性降速，并暂停到Retry-After"""
+        client, limiter = limited_client
+        host_limiter = self._configure(limiter, rate=50, burst=1, min_rate=1)
+        for _ in range(10):
+            await client.request(method="GET", endpoint="/get")
+        assert host_limiter.rate == 50
+
+        attempts = []
+
+        def _throttled(request):
+            attempts.append(request)
+            if len(attempts) == 1:
+                return MockResponse(status=429, headers={"Retry-After": "0.1"})
+            return {"ok": True}
+
+        self.server.add_route("GET", "/throttled", handler=_throttled)
+        response = await client.request(method="GET", endpoint="/throttled")
+        self.verify_response(response, 200)
+        assert len(attempts) == 2 and host_limiter.stats.throttled == 1
+        # 降为观测速率(不超过50)的0.7倍，成功的重试只小幅回升
+        assert 1 < host_limiter.rate <= 50 * 0.7 + 1
@@ -0,0 +1,81 @@
+import asyncio
+import concurrent.futures
+import pytest
+from core.base_test import BaseTest
+from clients.sync_client import BackgroundLoop, SyncHTTPClient
+from utils.mock_server import Latency, MockServer
+
+@pytest.fixture(scope="module")
+def sync_server():
+    """在独立的后台事件循环中运行Mock服务，同步用例阻塞时服务仍可响应"""
+    server_loop = BackgroundLoop("mock-server-loop")
+    server = MockServer().add_httpbin_routes()
+    server_loop.run(server.start())
+    yield server
+    server_loop.run(server.stop())
+    server_loop.stop()
+
+class TestSyncHTTPClient(BaseTest):
+    """同步客户端在后台事件循环中执行请求"""
+
+    @pytest.fixture
+    def client(self, sync_server):
+        self.server = sync_server
+        self.background = BackgroundLoop("test-sync-loop")
+        client = SyncHTTPClient(sync_server.url, background=self.background)
+        yield client
+        client.close()
+        self.background.stop()
+
+    def test_request(self, client):
+        """测试同步请求返回已读取响应体的响应"""
+        response = client.request("GET", "/get", params={"a": "1"})
+        self.verify_response(response, 200)
+        assert response.data["args"] == {"a": "1"}
+        response = client.request("POST", "/post", json={"name": "test"})
+        assert response.data["json"] == {"name": "test"}
+
+    def test_request_many(self, client):
+        """测试同步批量请求按输入顺序返回"""
+        self.server.add_route("GET", "/sync-items/{item_id}", latency=Latency.uniform(1, 10),
+                              handler=lambda r: {"id": r.match_info["item_id"]})
+        specs = [{"method": "GET", "endpoint": f"/sync-items/{i}"} for i in range(20)]
+        results = client.request_many(specs, concurrency=5)
+        assert [result.response.data["id"] for result in results] == [str(i) for i in range(20)]
+
+    def test_run_timeout(self, client):
+        """测试run()超时时抛出TimeoutError并取消后台事件循环中的协程"""
+        cancelled = concurrent.futures.Future()
+
+        async def _slow():
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.set_result(True)
+                raise
+
+        with pytest.raises(concurrent.futures.TimeoutError):
+            self.background.run(_slow(), timeout=0.05)
+        assert cancelled.result(timeout=2)
+
+    def test_close_and_stop(self, client):
+        """测试close()关闭底层会话，stop()停止后台线程，再次使用时重新启动"""
+        client.request("GET", "/get")
+        client.close()
+        assert client.async_client._session.closed
+        self.background.stop()
+        assert not self.background.running
+        # 后台事件循环停止后close()不再提交协程
+        client.close()
+        response = client.request("GET", "/get")
+        self.verify_response(response, 200)
+        assert self.background.running
+
+    def test_case_context_in_background_loop(self, client):
+        """测试后台事件循环中的请求日志归属于调用线程当前的用例"""
+        self.server.add_route("GET", "/sync-cases/{n}", handler=lambda r: {"n": r.match_info["n"]})
+        with self.logger.case_context("sync_case") as case:
+            client.request("GET", "/sync-cases/1")
+        client.request("GET", "/sync-cases/2")
+        text = case.log_file.read_text(encoding="utf-8")
+        assert "/sync-cases/1" in text and "/sync-cases/2" not in text
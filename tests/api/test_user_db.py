@@ -1,8 +1,92 @@
+import asyncio
 import pytest
+import time
+from concurrent.futures import ThreadPoolExecutor
 from core.base_test import BaseTest
 from datetime import datetime
+from config.settings import settings
+from pymongo.errors import BulkWriteError
+from utils.async_db_handler import AsyncMongoHandler, AsyncMySQLHandler, DBExecutor
+from utils.db_handler import MongoHandler, MySQLHandler, mongo_isolation
+from utils.mysql_pool import MySQLConnectionPool, PoolTimeout
 from utils.env_manager import test_env, prod_env, global_test
 
+class FakeMySQLConnection:
+    """记录执行的语句和提交/回滚，用于不连接数据库的测试"""
+    server_status = 0
+
+    def __init__(self, delay: float = 0.0):
+        self.log = []
+        self.delay = delay
+        # 同时使用该连接的线程数，PyMySQL连接并发使用会破坏协议状态
+        self.active = self.max_active = 0
+
+    def cursor(self, cursor_class=None):
+        connection = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc_info):
+                pass
+
+            def execute(self, query, params=()):
+                connection.active += 1
+                connection.max_active = max(connection.max_active, connection.active)
+                time.sleep(connection.delay)
+                connection.log.append(query)
+                connection.active -= 1
+                return 1
+
+            def fetchall(self):
+                return [{"id": 1}]
+
+            def executemany(self, query, rows):
+                connection.log.append(f"{query} x{len(rows)}")
+                return len(rows)
+
+        return Cursor()
+
+    def begin(self):
+        self.log.append("BEGIN")
+
+    def commit(self):
+        self.log.append("COMMIT")
+
+    def rollback(self):
+        self.log.append("ROLLBACK")
+
+    def close(self):
+        pass
+
+class FakeMongoCollection:
+    """记录插入的文档、删除条件和建立的索引"""
+    def __init__(self):
+        self.documents, self.deletes, self.indexes = [], [], []
+
+    def insert_one(self, document):
+        self.documents.append(document)
+        return type("Result", (), {"inserted_id": document.get("_id")})()
+
+    def bulk_write(self, requests, ordered=True):
+        self.documents.extend(request._doc for request in requests)
+        return type("Result", (), {"bulk_api_result": {"nInserted": len(requests)}})()
+
+    def delete_many(self, filter_query):
+        self.deletes.append(filter_query)
+        return type("Result", (), {"deleted_count": 0})()
+
+    def create_index(self, keys, **kwargs):
+        self.indexes.append((keys, kwargs))
+
+def fake_mongo(**collections) -> MongoHandler:
+    """使用内存中集合的MongoHandler"""
+    class FakeDatabase(dict):
+        name = "test_db"
+
+    return MongoHandler(client={settings.db_config["mongodb"]["database"]: FakeDatabase(**collections)})
+
 class TestUserDatabase(BaseTest):
     def setup_method(self):
         """测试方法级别的设置"""
@@ -37,6 +121,7 @@ class TestUserDatabase(BaseTest):
         assert results is not None
 
     @pytest.mark.mysql
+    @pytest.mark.db_isolation("mysql")
     def test_mysql_user_operations(self):
         """测试MySQL用户CRUD操作"""
         # 创建用户
@@ -64,12 +149,8 @@ class TestUserDatabase(BaseTest):
         )
         assert affected_rows == 1
 
-        # 删除用户
-        delete_query = "DELETE FROM users WHERE username = %s"
-        affected_rows = self.mysql.execute_update(delete_query, (self.test_user["username"],))
-        assert affected_rows == 1
-
     @pytest.mark.mongodb
+    @pytest.mark.db_isolation("mongodb")
     def test_mongodb_user_operations(self):
         """测试MongoDB用户CRUD操作"""
         collection = "users"
@@ -102,8 +183,15 @@ class TestUserDatabase(BaseTest):
         )
         assert deleted_count == 1
 
+    @pytest.fixture(scope="class")
+    async def async_mongo(self):
+        """类内用例共用的异步MongoDB handler，类结束时关闭MongoClient"""
+        mongo = AsyncMongoHandler()
+        yield mongo
+        await mongo.close()
+
     @pytest.mark.integration
-    async def test_user_api_with_db_verification(self):
+    async def test_user_api_with_db_verification(self, async_mongo):
         """测试用户API与数据库集成验证"""
         # 通过API创建用户
         response = await self.http_client.request(
@@ -113,10 +201,218 @@ class TestUserDatabase(BaseTest):
         )
         self.verify_response(response, 201)
         
-        # 验证数据库中的数据
-        users = self.mongo.find(
+        # 验证数据库中的数据，查询在线程池中执行，不阻塞事件循环
+        users = await async_mongo.find(
             "users",
             {"username": self.test_user["username"]}
         )
         assert len(users) == 1
-        assert users[0]["email"] == self.test_user["email"] 
\ No newline at end of file
+        assert users[0]["email"] == self.test_user["email"] 
+
+    def test_mysql_pool_checkout(self):
+        """测试连接池的连接复用、等待超时和失效连接重建"""
+        class FakeConnection:
+            server_status = 0
+            alive = True
+
+            def ping(self, reconnect=False):
+                if not self.alive:
+                    raise ConnectionError("gone away")
+
+            def close(self):
+                pass
+
+        pool = MySQLConnectionPool({"pool_size": 2, "health_check_interval": 0}, connect=FakeConnection)
+
+        def _borrow(_):
+            with pool.connection():
+                time.sleep(0.01)
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(_borrow, range(16)))
+        stats = pool.stats_dict()
+        assert stats["checkouts"] == 16 and stats["created"] == 2
+        assert stats["peak_in_use"] == 2 and stats["waits"] > 0 and stats["in_use"] == 0
+
+        first, second = pool.acquire(), pool.acquire()
+        with pytest.raises(PoolTimeout):
+            pool.acquire(timeout=0.05)
+        first.alive = False
+        pool.release(first)
+        pool.release(second)
+        # 健康检查失败的连接被关闭重建
+        with pool.connection() as connection, pool.connection() as other:
+            assert first not in (connection, other)
+        assert pool.stats.recycled == 1
+
+    def test_mongodb_bulk_insert_chunks(self):
+        """测试批量插入按批发送，无序模式下合并各批次的写入错误"""
+        class FakeCollection:
+            def __init__(self):
+                self.documents, self.batches = {}, []
+
+            def bulk_write(self, requests, ordered=True):
+                self.batches.append(len(requests))
+                errors = []
+                for index, request in enumerate(requests):
+                    document = request._doc
+                    if document["_id"] in self.documents:
+                        errors.append({"index": index, "code": 11000, "errmsg": "duplicate key"})
+                    else:
+                        self.documents[document["_id"]] = document
+                details = {"nInserted": len(requests) - len(errors), "writeErrors": errors}
+                if errors:
+                    raise BulkWriteError(details)
+                return type("Result", (), {"bulk_api_result": details})()
+
+        class FakeDatabase(dict):
+            name = "test_db"
+
+        collection = FakeCollection()
+        database = FakeDatabase(users=collection)
+        mongo = MongoHandler(client={settings.db_config["mongodb"]["database"]: database})
+
+        inserted = mongo.insert_many("users", ({"_id": i} for i in range(2500)), chunk_size=1000)
+        assert inserted == 2500 and collection.batches == [1000, 1000, 500]
+
+        with pytest.raises(BulkWriteError) as exc_info:
+            mongo.insert_many("users", ({"_id": i} for i in (3000, 5, 3001, 2400, 3002)),
+                              ordered=False, chunk_size=2)
+        assert [error["index"] for error in exc_info.value.details["writeErrors"]] == [1, 3]
+        assert exc_info.value.details["nInserted"] == 3
+
+    def test_mysql_batches_and_transactions(self):
+        """测试execute_many按批提交，transaction内统一提交，嵌套事务使用SAVEPOINT"""
+        connection = FakeMySQLConnection()
+        mysql = MySQLHandler(MySQLConnectionPool({"pool_size": 1}, connect=lambda: connection))
+        insert = "INSERT INTO users (username) VALUES (%s)"
+
+        assert mysql.execute_many(insert, ((f"user_{i}",) for i in range(2500)), batch_size=1000) == 2500
+        assert connection.log == [f"{insert} x1000", "COMMIT", f"{insert} x1000", "COMMIT", f"{insert} x500", "COMMIT"]
+
+        connection.log.clear()
+        with mysql.transaction():
+            mysql.execute_update("DELETE FROM users")
+            with pytest.raises(ValueError), mysql.transaction():
+                mysql.execute_update("UPDATE users SET email = NULL")
+                raise ValueError("rollback inner")
+        assert connection.log == ["BEGIN", "DELETE FROM users", "SAVEPOINT sp_1", "UPDATE users SET email = NULL",
+                                  "ROLLBACK TO SAVEPOINT sp_1", "COMMIT"]
+        assert not mysql.in_transaction and mysql.pool.in_use == 0
+
+    async def test_async_mysql_overlaps_queries(self):
+        """测试异步handler在线程池中执行，并发查询互不阻塞，事务内的操作使用同一连接"""
+        connections = []
+
+        def _connect():
+            connections.append(FakeMySQLConnection(delay=0.1))
+            return connections[-1]
+
+        executor = DBExecutor(max_workers=4)
+        mysql = AsyncMySQLHandler(MySQLHandler(MySQLConnectionPool({"pool_size": 4}, connect=_connect)), executor)
+        try:
+            start = time.perf_counter()
+            results = await asyncio.gather(*(mysql.execute_query("SELECT 1") for _ in range(4)))
+            assert results == [[{"id": 1}]] * 4
+            assert time.perf_counter() - start < 0.3
+
+            async with mysql.transaction():
+                assert mysql.in_transaction
+                await mysql.execute_update("DELETE FROM users")
+                await mysql.execute_update("DELETE FROM orders")
+            assert not mysql.in_transaction
+            assert [c.log[1:] for c in connections if "BEGIN" in c.log] == \
+                [["BEGIN", "DELETE FROM users", "DELETE FROM orders", "COMMIT"]]
+        finally:
+            executor.shutdown()
+
+    def test_db_isolation_rolls_back(self):
+        """测试用例隔离：共享的预置数据事务内每个用例使用SAVEPOINT回滚，MongoDB插入的文档按标记删除"""
+        connection = FakeMySQLConnection()
+        pool = MySQLConnectionPool({"pool_size": 1}, connect=lambda: connection)
+        with MySQLHandler(pool).transaction(rollback=True):
+            MySQLHandler(pool).execute_many("INSERT INTO users (username) VALUES (%s)", [("seed",)])
+            for case in ("a", "b"):
+                with MySQLHandler(pool).transaction(rollback=True):
+                    MySQLHandler(pool).execute_update(f"DELETE FROM users WHERE username = '{case}'")
+        assert connection.log == [
+            "BEGIN", "INSERT INTO users (username) VALUES (%s) x1",
+            "SAVEPOINT sp_1", "DELETE FROM users WHERE username = 'a'", "ROLLBACK TO SAVEPOINT sp_1",
+            "SAVEPOINT sp_1", "DELETE FROM users WHERE username = 'b'", "ROLLBACK TO SAVEPOINT sp_1",
+            "ROLLBACK",
+        ]
+
+        collection = FakeMongoCollection()
+        mongo = fake_mongo(users=collection)
+        user = {"username": "a"}
+        with mongo_isolation("case_1", field="_test_case"):
+            user_id = mongo.insert_one("users", user)
+            mongo.insert_many("users", [{"username": "b"}])
+        mongo.insert_one("users", {"username": "c"})
+        assert [document.get("_test_case") for document in collection.documents] == ["case_1", "case_1", None]
+        assert collection.deletes == [{"_test_case": "case_1"}]
+        # 标记加在副本上，调用方的文档只写回_id
+        assert user == {"username": "a", "_id": collection.documents[0]["_id"]} and user_id == str(user["_id"])
+        assert collection.indexes == [("_test_case", {"sparse": True})]
+
+    def test_mongodb_isolation_tags_bulk_inserts(self):
+        """测试用例隔离时insert_many按批插入的文档（包括生成器产生的）在包装前带上标记"""
+        collection = FakeMongoCollection()
+        mongo = fake_mongo(orders=collection)
+        documents = [{"order": i} for i in range(5)]
+        with mongo_isolation("case_2", field="_test_case"):
+            assert mongo.insert_many("orders", (document for document in documents), chunk_size=2) == 5
+        assert all(document["_test_case"] == "case_2" for document in collection.documents)
+        assert [document["_id"] for document in documents] == [document["_id"] for document in collection.documents]
+        assert all("_test_case" not in document for document in documents)
+        assert collection.deletes == [{"_test_case": "case_2"}]
+
+    async def test_async_mysql_serializes_transaction_connection(self):
+        """测试事务中（如db_isolation用例）并发的异步调用依次使用事务连接"""
+        connection = FakeMySQLConnection(delay=0.02)
+        executor = DBExecutor(max_workers=4)
+        mysql = AsyncMySQLHandler(MySQLHandler(MySQLConnectionPool({"pool_size": 1}, connect=lambda: connection)),
+                                  executor)
+        try:
+            async with mysql.transaction(rollback=True):
+                results = await asyncio.gather(*(mysql.execute_query("SELECT 1") for _ in range(4)))
+            assert results == [[{"id": 1}]] * 4
+            assert connection.max_active == 1
+            assert connection.log == ["BEGIN"] + ["SELECT 1"] * 4 + ["ROLLBACK"]
+        finally:
+            executor.shutdown()
+
+class TestDBIsolationMarker(BaseTest):
+    """db_isolation标记经由BaseTest开启的隔离，使用不连接数据库的连接池"""
+    connection = FakeMySQLConnection(delay=0.01)
+    mysql_pool = MySQLConnectionPool({"pool_size": 1}, connect=lambda: TestDBIsolationMarker.connection)
+
+    @pytest.mark.db_isolation("mysql")
+    def test_mysql_marker(self):
+        """测试标记的同步用例在事务中执行，不提交"""
+        assert self.mysql.in_transaction and self.connection.log[-1] == "BEGIN"
+        assert self.mysql.execute_update("DELETE FROM users") == 1
+        assert self.connection.log[-2:] == ["BEGIN", "DELETE FROM users"]
+
+    @pytest.mark.db_isolation("mysql")
+    async def test_mysql_marker_async(self):
+        """测试fixture开启的事务传入异步用例，线程池中并发的查询依次使用事务连接"""
+        assert self.async_mysql.in_transaction
+        results = await asyncio.gather(*(self.async_mysql.execute_query("SELECT 1") for _ in range(3)))
+        assert results == [[{"id": 1}]] * 3
+        assert self.connection.log[-4:] == ["BEGIN"] + ["SELECT 1"] * 3 and self.connection.max_active == 1
+
+    def test_without_marker(self):
+        """测试未标记的用例自动提交，之前标记的用例均已回滚"""
+        assert not self.mysql.in_transaction
+        assert self.connection.log.count("BEGIN") == self.connection.log.count("ROLLBACK")
+        self.mysql.execute_update("DELETE FROM orders")
+        assert self.connection.log[-2:] == ["DELETE FROM orders", "COMMIT"]
+
+    @pytest.mark.db_isolation("mongodb")
+    def test_mongodb_marker(self):
+        """测试标记的用例插入的文档带当前用例的case_id"""
+        collection = FakeMongoCollection()
+        fake_mongo(users=collection).insert_one("users", {"username": "a"})
+        assert collection.documents[0]["_test_case"] == self.logger.case_id
+        assert not self.mysql.in_transaction
@@ -0,0 +1,157 @@
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from itertools import islice
+from typing import Dict, List, Any, AsyncIterator, Callable, Iterable, Iterator, Optional, TypeVar
+from config.settings import settings
+from utils.db_handler import MySQLHandler, MongoHandler
+
+T = TypeVar("T")
+
+class DBExecutor:
+    """数据库操作使用的线程池，线程数为database.async_workers
+
+    异步handler把阻塞的驱动调用提交到该线程池执行，事件循环在等待数据库期间继续处理其他请求。
+    线程数即同时进行的数据库操作数上限；调用方的contextvars（用例日志上下文、链路追踪span、
+    MySQL事务）随调用传入工作线程。
+    """
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = int(settings.db_config.get("async_workers", 8) if max_workers is None else max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        """首次使用时创建线程池"""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="db")
+        return self._executor
+
+    async def run(self, func: Callable[..., T], *args: Any, context: Optional[contextvars.Context] = None,
+                  **kwargs: Any) -> T:
+        """在线程池中执行func，context为None时使用当前上下文的副本"""
+        context = context or contextvars.copy_context()
+        call = functools.partial(context.run, func, *args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def iterate(self, factory: Callable[[], Iterator[T]], batch_size: int) -> AsyncIterator[T]:
+        """在线程池中逐批推进同步迭代器，每批batch_size个，提前结束时在线程池中关闭迭代器"""
+        context = contextvars.copy_context()
+        iterator = await self.run(factory, context=context)
+        try:
+            while True:
+                batch = await self.run(lambda: list(islice(iterator, batch_size)), context=context)
+                if not batch:
+                    return
+                for item in batch:
+                    yield item
+        finally:
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                await self.run(close, context=context)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+class AsyncMySQLHandler:
+    """MySQLHandler的异步版本，方法与MySQLHandler相同，在线程池中执行并共用其连接池
+
+    transaction()中（包括db_isolation用例）的操作共用一个连接，并发的调用依次执行。
+    """
+    def __init__(self, handler: Optional[MySQLHandler] = None, executor: Optional[DBExecutor] = None):
+        self.handler = handler or MySQLHandler()
+        self.executor = executor or db_executor
+
+    @property
+    def in_transaction(self) -> bool:
+        return self.handler.in_transaction
+
+    async def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict]:
+        """执行查询操作"""
+        return await self.executor.run(self.handler.execute_query, query, params)
+
+    async def iter_query(self, query: str, params: Optional[tuple] = None,
+                         fetch_size: Optional[int] = None) -> AsyncIterator[Dict]:
+        """服务端游标逐行返回查询结果，每次在线程池中读取fetch_size行"""
+        fetch_size = fetch_size or self.handler.fetch_size
+        async for row in self.executor.iterate(
+                lambda: self.handler.iter_query(query, params, fetch_size), fetch_size):
+            yield row
+
+    async def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
+        """执行更新操作"""
+        return await self.executor.run(self.handler.execute_update, query, params)
+
+    async def execute_many(self, query: str, params_seq: Iterable[tuple], batch_size: Optional[int] = None) -> int:
+        """批量执行同一语句，返回影响行数"""
+        return await self.executor.run(self.handler.execute_many, query, params_seq, batch_size)
+
+    @asynccontextmanager
+    async def transaction(self, rollback: bool = False) -> AsyncIterator[Any]:
+        """事务作用域，与MySQLHandler.transaction()相同；事务状态设置在调用方的上下文中，
+        事务内的操作在线程池中执行时使用同一连接"""
+        state = await self.executor.run(self.handler._begin)
+        token = self.handler._transaction.set(state)
+        try:
+            yield state.connection
+        except BaseException as e:
+            self.handler._transaction.reset(token)
+            await self.executor.run(self.handler._end, state, e)
+            raise
+        self.handler._transaction.reset(token)
+        await self.executor.run(self.handler._end, state, rollback=rollback)
+
+class AsyncMongoHandler:
+    """MongoHandler的异步版本，方法与MongoHandler相同，在线程池中执行并共用其MongoClient"""
+    def __init__(self, handler: Optional[MongoHandler] = None, executor: Optional[DBExecutor] = None):
+        self.handler = handler or MongoHandler()
+        self.executor = executor or db_executor
+
+    async def find(self, collection: str, query: Dict = None, projection: Dict = None) -> List[Dict]:
+        """查询文档"""
+        return await self.executor.run(self.handler.find, collection, query, projection)
+
+    async def iter_find(self, collection: str, query: Dict = None, projection: Dict = None,
+                        batch_size: Optional[int] = None) -> AsyncIterator[Dict]:
+        """逐个返回匹配的文档，每次在线程池中取回batch_size个"""
+        batch_size = batch_size or self.handler.batch_size
+        async for document in self.executor.iterate(
+                lambda: self.handler.iter_find(collection, query, projection, batch_size), batch_size):
+            yield document
+
+    async def insert_one(self, collection: str, document: Dict) -> str:
+        """插入单个文档"""
+        return await self.executor.run(self.handler.insert_one, collection, document)
+
+    async def insert_many(self, collection: str, documents: Iterable[Dict], ordered: bool = True,
+                          chunk_size: Optional[int] = None) -> int:
+        """批量插入文档，返回插入数"""
+        return await self.executor.run(self.handler.insert_many, collection, documents, ordered, chunk_size)
+
+    async def bulk_write(self, collection: str, requests: Iterable[Any], ordered: bool = True,
+                         chunk_size: Optional[int] = None) -> Dict[str, int]:
+        """批量执行写操作，返回各类操作的文档数"""
+        return await self.executor.run(self.handler.bulk_write, collection, requests, ordered, chunk_size)
+
+    async def update_many(self, collection: str, filter_query: Dict, update_data: Dict) -> int:
+        """更新多个文档"""
+        return await self.executor.run(self.handler.update_many, collection, filter_query, update_data)
+
+    async def delete_many(self, collection: str, filter_query: Dict) -> int:
+        """删除多个文档"""
+        return await self.executor.run(self.handler.delete_many, collection, filter_query)
+
+    async def close(self) -> None:
+        """关闭MongoClient及其连接池"""
+        await self.executor.run(self.handler.close)
+
+# 创建全局数据库线程池实例，首次使用时启动线程
+db_executor = DBExecutor()
@@ -1,87 +1,411 @@
-from typing import Dict, List, Any, Optional
+import contextvars
+import threading
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+from typing import Dict, List, Any, ContextManager, Iterable, Iterator, Optional, Set, Tuple
 import pymysql
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import InsertOne, MongoClient
+from pymongo.errors import BulkWriteError
 from config.settings import settings
 from core.logger import logger
+from core.tracing import tracing
+from utils.mysql_pool import MySQLConnectionPool, PoolTransaction, mysql_pool
+
+def _sql_operation(query: str) -> str:
+    """SQL语句的操作类型，如SELECT/UPDATE"""
+    return query.lstrip().split(None, 1)[0].upper() if query.strip() else ""
+
+def _chunks(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """按size分批，不预先展开items"""
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
 
 class MySQLHandler:
-    def __init__(self):
+    """MySQL操作，每次操作从共享连接池借出连接，并发用例共用数量有限的已建立连接
+
+    transaction()内的操作在同一连接上执行，由事务统一提交或回滚；嵌套的transaction()使用SAVEPOINT。
+    """
+    def __init__(self, pool: Optional[MySQLConnectionPool] = None):
         self.config = settings.db_config["mysql"]
-        self.connection = None
-        self._connect()
+        self.pool = pool or mysql_pool
+        # execute_many每批的行数
+        self.batch_size = int(self.config.get("batch_size", 1000))
+        # iter_query每次从服务端读取的行数
+        self.fetch_size = int(self.config.get("fetch_size", 1000))
+        self._transaction = self.pool.transaction
 
-    def _connect(self):
+    def connection(self) -> ContextManager[pymysql.connections.Connection]:
+        """借出连接，退出时归还连接池"""
+        return self.pool.connection()
+
+    @property
+    def in_transaction(self) -> bool:
+        return self._transaction.get() is not None
+
+    @contextmanager
+    def _borrow(self) -> Iterator[pymysql.connections.Connection]:
+        """事务中使用事务的连接，否则从连接池借出"""
+        current = self._transaction.get()
+        if current is not None:
+            with current.use() as connection:
+                yield connection
+        else:
+            with self.pool.connection() as connection:
+                yield connection
+
+    def _commit(self, connection: pymysql.connections.Connection) -> None:
+        """不在事务中时提交，事务中由transaction()统一提交"""
+        if self._transaction.get() is None:
+            connection.commit()
+
+    def _begin(self) -> PoolTransaction:
+        """开始事务或在当前事务中创建SAVEPOINT"""
+        current = self._transaction.get()
+        if current is not None:
+            with current.use() as connection, connection.cursor() as cursor:
+                cursor.execute(f"SAVEPOINT sp_{current.depth}")
+            return PoolTransaction(current.connection, current.depth + 1, current.lock, current.timeout)
+        connection = self.pool.acquire()
         try:
-            self.connection = pymysql.connect(
-                host=self.config["host"],
-                user=self.config["user"],
-                password=self.config["password"],
-                database=self.config["database"],
-                port=self.config["port"],
-                charset='utf8mb4',
-                cursorclass=pymysql.cursors.DictCursor
-            )
-        except Exception as e:
-            logger.error(f"MySQL connection failed: {str(e)}")
+            connection.begin()
+        except Exception:
+            self.pool.release(connection, discard=True)
             raise
+        return PoolTransaction(connection, 1, threading.Lock(), self.pool.timeout)
+
+    def _end(self, state: PoolTransaction, error: Optional[BaseException] = None, rollback: bool = False) -> None:
+        """提交或回滚_begin开始的事务（或SAVEPOINT），rollback为True时总是回滚"""
+        rollback = rollback or error is not None
+        if state.depth > 1:
+            savepoint = f"sp_{state.depth - 1}"
+            with state.use() as connection, connection.cursor() as cursor:
+                cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint}" if rollback else f"RELEASE SAVEPOINT {savepoint}")
+            return
+        discard = isinstance(error, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+        try:
+            with state.use() as connection:
+                if rollback:
+                    if not discard:
+                        connection.rollback()
+                else:
+                    connection.commit()
+        except Exception:
+            discard = True
+            raise
+        finally:
+            self.pool.release(state.connection, discard)
+
+    @contextmanager
+    def transaction(self, rollback: bool = False) -> Iterator[pymysql.connections.Connection]:
+        """事务作用域，正常退出时提交，异常时回滚；嵌套调用时创建SAVEPOINT，只回滚内层的修改
+
+        rollback为True时退出时总是回滚，用于用例隔离：用例内的修改不需要逐条清理
+        """
+        state = self._begin()
+        token = self._transaction.set(state)
+        try:
+            yield state.connection
+        except BaseException as e:
+            self._transaction.reset(token)
+            self._end(state, e)
+            raise
+        self._transaction.reset(token)
+        self._end(state, rollback=rollback)
 
     def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict]:
         """执行查询操作"""
         try:
-            with self.connection.cursor() as cursor:
+            with tracing.db_span("mysql", _sql_operation(query), query, database=self.config["database"]), \
+                    self._borrow() as connection, connection.cursor() as cursor:
                 cursor.execute(query, params or ())
                 return cursor.fetchall()
         except Exception as e:
             logger.error(f"Query execution failed: {str(e)}")
             raise
-        
+
+    def iter_query(self, query: str, params: Optional[tuple] = None,
+                   fetch_size: Optional[int] = None) -> Iterator[Dict]:
+        """使用服务端游标(SSDictCursor)逐行返回查询结果，内存占用与结果集大小无关
+
+        迭代期间占用一个连接，结果未读完时不能在该连接上执行其他语句，因此不在事务中时单独借出连接，
+        在事务中时迭代期间独占事务连接；提前结束迭代时关闭该连接，不读取剩余的结果
+        """
+        fetch_size = fetch_size or self.fetch_size
+        current = self._transaction.get()
+        # 事务连接的独占在迭代结束时释放（异步handler中可能在另一个线程）
+        stack = ExitStack()
+        connection = stack.enter_context(current.use()) if current is not None else self.pool.acquire()
+        discard = False
+        try:
+            with tracing.db_span("mysql", _sql_operation(query), query, database=self.config["database"]):
+                cursor = connection.cursor(pymysql.cursors.SSDictCursor)
+                cursor.execute(query, params or ())
+            while True:
+                rows = cursor.fetchmany(fetch_size)
+                if not rows:
+                    break
+                yield from rows
+            cursor.close()
+        except GeneratorExit:
+            if current is None:
+                discard = True
+            else:
+                # 事务中的连接需要读完剩余结果才能继续使用
+                cursor.close()
+            raise
+        except Exception as e:
+            discard = current is None and isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+            logger.error(f"Query execution failed: {str(e)}")
+            raise
+        finally:
+            if current is None:
+                self.pool.release(connection, discard)
+            stack.close()
+
     def execute_update(self, query: str, params: Optional[tuple] = None) -> int:
         """执行更新操作"""
         try:
-            with self.connection.cursor() as cursor:
-                affected_rows = cursor.execute(query, params or ())
-                self.connection.commit()
+            with tracing.db_span("mysql", _sql_operation(query), query, database=self.config["database"]), \
+                    self._borrow() as connection:
+                # 失败时未提交的事务在连接归还时回滚
+                with connection.cursor() as cursor:
+                    affected_rows = cursor.execute(query, params or ())
+                self._commit(connection)
                 return affected_rows
         except Exception as e:
-            self.connection.rollback()
             logger.error(f"Update execution failed: {str(e)}")
             raise
 
+    def execute_many(self, query: str, params_seq: Iterable[tuple], batch_size: Optional[int] = None) -> int:
+        """批量执行同一语句，返回影响行数
+
+        每batch_size行调用一次executemany（INSERT ... VALUES会被合并为一条多行INSERT）并提交，
+        失败时已提交的批次保留；在transaction()中时不单独提交。params_seq可以是生成器。
+        """
+        affected_rows = 0
+        try:
+            with tracing.db_span("mysql", _sql_operation(query), query, database=self.config["database"]), \
+                    self._borrow() as connection:
+                for batch in _chunks(params_seq, batch_size or self.batch_size):
+                    with connection.cursor() as cursor:
+                        affected_rows += cursor.executemany(query, batch)
+                    self._commit(connection)
+            return affected_rows
+        except Exception as e:
+            logger.error(f"Batch execution failed after {affected_rows} rows: {str(e)}")
+            raise
+
+# 已按清理标记字段建立索引的(数据库, 集合, 字段)，每个进程只建立一次
+_cleanup_indexes: Set[Tuple[str, str, str]] = set()
+_cleanup_index_lock = threading.Lock()
+
+def _ensure_cleanup_index(db: Any, collection: str, field: str) -> None:
+    """按标记字段建立稀疏索引，用例结束时的delete_many不需要扫描整个集合；没有建索引权限时只输出警告"""
+    key = (db.name, collection, field)
+    with _cleanup_index_lock:
+        if key in _cleanup_indexes:
+            return
+        _cleanup_indexes.add(key)
+    try:
+        db[collection].create_index(field, sparse=True)
+    except Exception as e:
+        logger.warning(f"Failed to create cleanup index on {collection}.{field}: {str(e)}")
+
+class MongoCleanup:
+    """用例隔离：用例内插入的文档加上标记字段，结束时每个集合一次delete_many删除
+
+    标记加在文档的副本上，调用方的文档（如用例中复用的测试数据）不带标记字段
+    """
+    def __init__(self, tag: str, field: str):
+        self.tag = tag
+        self.field = field
+        # (数据库, 集合名)，数据库对象不可哈希，按id去重
+        self._collections: Dict[Tuple[int, str], Tuple[Any, str]] = {}
+        self._lock = threading.Lock()
+
+    def tag_document(self, db: Any, collection: str, document: Dict) -> Dict:
+        """返回带标记的文档副本，_id预先生成并写回调用方的文档（与pymongo插入时的行为相同）"""
+        with self._lock:
+            new = (id(db), collection) not in self._collections
+            self._collections.setdefault((id(db), collection), (db, collection))
+        if new:
+            _ensure_cleanup_index(db, collection, self.field)
+        document.setdefault("_id", ObjectId())
+        tagged = dict(document)
+        tagged.setdefault(self.field, self.tag)
+        return tagged
+
+    def delete_tagged(self) -> int:
+        """删除带标记的文档，返回删除数"""
+        deleted = 0
+        for db, collection in self._collections.values():
+            with tracing.db_span("mongodb", "delete_many", collection=collection, database=db.name):
+                deleted += db[collection].delete_many({self.field: self.tag}).deleted_count
+        return deleted
+
+_mongo_cleanup: contextvars.ContextVar[Optional[MongoCleanup]] = contextvars.ContextVar("mongo_cleanup", default=None)
+
+@contextmanager
+def mongo_isolation(tag: str, field: Optional[str] = None) -> Iterator[MongoCleanup]:
+    """作用域内通过MongoHandler插入的文档标记为tag（字段名为database.mongodb.cleanup_field），退出时删除
+
+    只清理insert_one/insert_many插入的文档，bulk_write中的操作和对已有文档的修改不会恢复；
+    首次在集合中插入时按标记字段建立稀疏索引
+    """
+    field = field or settings.db_config.get("mongodb", {}).get("cleanup_field", "_test_case")
+    cleanup = MongoCleanup(tag, field)
+    token = _mongo_cleanup.set(cleanup)
+    try:
+        yield cleanup
+    finally:
+        _mongo_cleanup.reset(token)
+        try:
+            cleanup.delete_tagged()
+        except Exception as e:
+            logger.error(f"MongoDB cleanup of '{tag}' failed: {str(e)}")
+            raise
+
 class MongoHandler:
-    def __init__(self):
+    """MongoDB操作
+
+    iter_find按batch_size分批从服务端取回文档，大数据量校验时内存占用有上限；
+    insert_many/bulk_write按bulk_chunk_size分批发送，每批一次往返；
+    database.mongodb.projections配置各集合的默认投影，未指定projection的查询只取需要的字段。
+    """
+    def __init__(self, client: Optional[MongoClient] = None):
         self.config = settings.db_config["mongodb"]
-        self.client = None
+        self.batch_size = int(self.config.get("batch_size", 1000))
+        self.bulk_chunk_size = int(self.config.get("bulk_chunk_size", 1000))
+        # 集合 -> 默认投影
+        self.projections: Dict[str, Dict] = self.config.get("projections") or {}
+        self.client = client
         self.db = None
         self._connect()
 
     def _connect(self):
         try:
-            self.client = MongoClient(
-                host=self.config["host"],
-                port=self.config["port"],
-                username=self.config.get("username"),
-                password=self.config.get("password")
-            )
+            if self.client is None:
+                self.client = MongoClient(
+                    host=self.config["host"],
+                    port=self.config["port"],
+                    username=self.config.get("username"),
+                    password=self.config.get("password"),
+                    maxPoolSize=self.config.get("max_pool_size", 100)
+                )
             self.db = self.client[self.config["database"]]
         except Exception as e:
             logger.error(f"MongoDB connection failed: {str(e)}")
             raise
 
+    def _projection(self, collection: str, projection: Optional[Dict]) -> Optional[Dict]:
+        """projection为None时使用集合的默认投影，为{}时返回完整文档"""
+        if projection is None:
+            return self.projections.get(collection)
+        return projection or None
+
     def find(self, collection: str, query: Dict = None, projection: Dict = None) -> List[Dict]:
         """查询文档"""
-        return list(self.db[collection].find(query or {}, projection or {}))
+        with tracing.db_span("mongodb", "find", collection=collection, database=self.db.name):
+            return list(self.db[collection].find(query or {}, self._projection(collection, projection),
+                                                 batch_size=self.batch_size))
+
+    def iter_find(self, collection: str, query: Dict = None, projection: Dict = None,
+                  batch_size: Optional[int] = None) -> Iterator[Dict]:
+        """逐个返回匹配的文档，每次从服务端取回batch_size个"""
+        cursor = self.db[collection].find(query or {}, self._projection(collection, projection),
+                                          batch_size=batch_size or self.batch_size)
+        try:
+            # span只覆盖首批查询，后续getMore在调用方迭代时进行
+            with tracing.db_span("mongodb", "find", collection=collection, database=self.db.name):
+                first = next(cursor, None)
+            if first is None:
+                return
+            yield first
+            yield from cursor
+        finally:
+            cursor.close()
 
     def insert_one(self, collection: str, document: Dict) -> str:
         """插入单个文档"""
-        result = self.db[collection].insert_one(document)
+        cleanup = _mongo_cleanup.get()
+        if cleanup is not None:
+            document = cleanup.tag_document(self.db, collection, document)
+        with tracing.db_span("mongodb", "insert_one", collection=collection, database=self.db.name):
+            result = self.db[collection].insert_one(document)
         return str(result.inserted_id)
 
+    def insert_many(self, collection: str, documents: Iterable[Dict], ordered: bool = True,
+                    chunk_size: Optional[int] = None) -> int:
+        """批量插入文档，返回插入数；documents可以是生成器，生成的_id写回各文档"""
+        cleanup = _mongo_cleanup.get()
+        if cleanup is not None:
+            # 用例隔离时在包装为InsertOne之前标记
+            documents = (cleanup.tag_document(self.db, collection, document) for document in documents)
+        result = self._bulk(collection, "insert_many", (InsertOne(document) for document in documents),
+                            ordered, chunk_size)
+        return result["inserted"]
+
+    def bulk_write(self, collection: str, requests: Iterable[Any], ordered: bool = True,
+                   chunk_size: Optional[int] = None) -> Dict[str, int]:
+        """批量执行InsertOne/UpdateOne/UpdateMany/ReplaceOne/DeleteOne/DeleteMany，返回各类操作的文档数
+
+        用例隔离时不标记其中InsertOne插入的文档，需要在用例结束时删除的文档请使用insert_many
+        """
+        return self._bulk(collection, "bulk_write", requests, ordered, chunk_size)
+
+    def _bulk(self, collection: str, operation: str, requests: Iterable[Any], ordered: bool,
+              chunk_size: Optional[int]) -> Dict[str, int]:
+        """按chunk_size分批执行
+
+        ordered为True时遇到写入错误即停止；为False时继续执行后续批次，结束后抛出合并了所有批次
+        写入错误的BulkWriteError，错误的index为在requests中的位置
+        """
+        merged = {"nInserted": 0, "nUpserted": 0, "nMatched": 0, "nModified": 0, "nRemoved": 0,
+                  "upserted": [], "writeErrors": [], "writeConcernErrors": []}
+        offset = 0
+        with tracing.db_span("mongodb", operation, collection=collection, database=self.db.name):
+            for chunk in _chunks(requests, chunk_size or self.bulk_chunk_size):
+                try:
+                    details = self.db[collection].bulk_write(chunk, ordered=ordered).bulk_api_result
+                except BulkWriteError as e:
+                    details = e.details
+                for key in ("nInserted", "nUpserted", "nMatched", "nModified", "nRemoved"):
+                    merged[key] += details.get(key, 0)
+                for key in ("upserted", "writeErrors"):
+                    merged[key].extend({**item, "index": item["index"] + offset} for item in details.get(key, []))
+                merged["writeConcernErrors"].extend(details.get("writeConcernErrors", []))
+                offset += len(chunk)
+                if ordered and details.get("writeErrors"):
+                    break
+        if merged["writeErrors"] or merged["writeConcernErrors"]:
+            logger.error(f"Bulk {operation} on {collection} failed: {len(merged['writeErrors'])} write errors, "
+                         f"{len(merged['writeConcernErrors'])} write concern errors")
+            raise BulkWriteError(merged)
+        return {
+            "inserted": merged["nInserted"],
+            "upserted": merged["nUpserted"],
+            "matched": merged["nMatched"],
+            "modified": merged["nModified"],
+            "deleted": merged["nRemoved"],
+        }
+
     def update_many(self, collection: str, filter_query: Dict, update_data: Dict) -> int:
         """更新多个文档"""
-        result = self.db[collection].update_many(filter_query, {"$set": update_data})
+        with tracing.db_span("mongodb", "update_many", collection=collection, database=self.db.name):
+            result = self.db[collection].update_many(filter_query, {"$set": update_data})
         return result.modified_count
 
     def delete_many(self, collection: str, filter_query: Dict) -> int:
         """删除多个文档"""
-        result = self.db[collection].delete_many(filter_query)
-        return result.deleted_count 
\ No newline at end of file
+        with tracing.db_span("mongodb", "delete_many", collection=collection, database=self.db.name):
+            result = self.db[collection].delete_many(filter_query)
+        return result.deleted_count
+
+    def close(self) -> None:
+        """关闭MongoClient及其连接池"""
+        self.client.close()
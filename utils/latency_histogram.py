@@ -0,0 +1,126 @@
+import math
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+class LatencyHistogram:
+    """HDR风格的对数-线性延迟直方图
+
+    以微秒为单位记录，按significant_digits位有效数字分桶，
+    内存占用与记录次数无关，可合并、可序列化。对外接口单位为毫秒。
+    """
+    def __init__(self, significant_digits: int = 2):
+        if not 1 <= significant_digits <= 4:
+            raise ValueError("significant_digits must be between 1 and 4")
+        self.significant_digits = significant_digits
+        # 每个数量级内的子桶数量，保证相对误差不超过 10^-digits
+        self._sub_bucket_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._sub_bucket_half = self._sub_bucket_count >> 1
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total_us = 0
+        self.min_us: Optional[int] = None
+        self.max_us: Optional[int] = None
+
+    def _bucket_index(self, value: int) -> int:
+        if value < self._sub_bucket_count:
+            return value
+        shift = value.bit_length() - self._sub_bucket_bits
+        return self._sub_bucket_count + (shift - 1) * self._sub_bucket_half \
+            + (value >> shift) - self._sub_bucket_half
+
+    def _bucket_range(self, index: int) -> Tuple[int, int]:
+        """返回桶对应的取值区间[low, high]（微秒）"""
+        if index < self._sub_bucket_count:
+            return index, index
+        offset = index - self._sub_bucket_count
+        shift = offset // self._sub_bucket_half + 1
+        low = (offset % self._sub_bucket_half + self._sub_bucket_half) << shift
+        return low, low + (1 << shift) - 1
+
+    def record(self, value_ms: float, count: int = 1) -> None:
+        """记录一个延迟值（毫秒）"""
+        value = max(0, int(round(value_ms * 1000)))
+        index = self._bucket_index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total_us += value * count
+        self.min_us = value if self.min_us is None else min(self.min_us, value)
+        self.max_us = value if self.max_us is None else max(self.max_us, value)
+
+    def record_many(self, values_ms: Iterable[float]) -> None:
+        """批量记录延迟值（毫秒）"""
+        for value in values_ms:
+            self.record(value)
+
+    def merge(self, other: "LatencyHistogram") -> "LatencyHistogram":
+        """合并另一个直方图（有效数字必须一致）"""
+        if other.significant_digits != self.significant_digits:
+            raise ValueError("Cannot merge histograms with different precision")
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total_us += other.total_us
+        if other.min_us is not None:
+            self.min_us = other.min_us if self.min_us is None else min(self.min_us, other.min_us)
+        if other.max_us is not None:
+            self.max_us = other.max_us if self.max_us is None else max(self.max_us, other.max_us)
+        return self
+
+    def percentile(self, percentile: float) -> float:
+        """获取百分位值（毫秒），返回所在桶的上界，不超过实际最大值"""
+        if self.count == 0:
+            return 0.0
+        target = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._bucket_range(index)[1], self.max_us) / 1000
+        return self.max_us / 1000
+
+    @property
+    def mean(self) -> float:
+        """平均值（毫秒）"""
+        return self.total_us / self.count / 1000 if self.count else 0.0
+
+    def buckets(self) -> Iterable[Tuple[float, float, int]]:
+        """按升序返回(下界ms, 上界ms, 次数)"""
+        for index in sorted(self.counts):
+            low, high = self._bucket_range(index)
+            yield low / 1000, high / 1000, self.counts[index]
+
+    def summary(self) -> Dict[str, float]:
+        """常用统计指标（毫秒）"""
+        return {
+            "count": self.count,
+            "min": (self.min_us or 0) / 1000,
+            "mean": round(self.mean, 3),
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "p999": self.percentile(99.9),
+            "max": (self.max_us or 0) / 1000
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为紧凑的字典格式"""
+        return {
+            "significant_digits": self.significant_digits,
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "counts": {str(index): count for index, count in sorted(self.counts.items())}
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencyHistogram":
+        """从to_dict的结果恢复直方图"""
+        histogram = cls(data.get("significant_digits", 2))
+        histogram.counts = {int(index): count for index, count in data["counts"].items()}
+        histogram.count = data["count"]
+        histogram.total_us = data["total_us"]
+        histogram.min_us = data["min_us"]
+        histogram.max_us = data["max_us"]
+        return histogram
@@ -0,0 +1,479 @@
+import argparse
+import asyncio
+import inspect
+import math
+import os
+import random
+import re
+import time
+import zlib
+from collections import deque
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from typing import Dict, Any, Callable, Deque, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+from multidict import CIMultiDict
+from core.json_codec import codec
+
+# 延迟分布：无参可调用对象，返回秒数
+LatencyFunc = Callable[[], float]
+
+class Latency:
+    """常用延迟分布，参数单位为毫秒"""
+    @staticmethod
+    def fixed(ms: float) -> LatencyFunc:
+        return lambda: ms / 1000
+
+    @staticmethod
+    def uniform(low_ms: float, high_ms: float) -> LatencyFunc:
+        return lambda: random.uniform(low_ms, high_ms) / 1000
+
+    @staticmethod
+    def normal(mean_ms: float, stddev_ms: float) -> LatencyFunc:
+        return lambda: max(0.0, random.gauss(mean_ms, stddev_ms)) / 1000
+
+    @staticmethod
+    def lognormal(median_ms: float, sigma: float = 0.5) -> LatencyFunc:
+        """长尾分布，median_ms为中位数"""
+        mu = math.log(median_ms)
+        return lambda: random.lognormvariate(mu, sigma) / 1000
+
+    @staticmethod
+    def exponential(mean_ms: float) -> LatencyFunc:
+        return lambda: random.expovariate(1000 / mean_ms)
+
+    @staticmethod
+    def bimodal(fast_ms: float, slow_ms: float, slow_ratio: float = 0.05) -> LatencyFunc:
+        """大部分请求为fast_ms，slow_ratio比例的请求为slow_ms"""
+        return lambda: (slow_ms if random.random() < slow_ratio else fast_ms) / 1000
+
+class MockRequest:
+    """Mock服务收到的请求"""
+    __slots__ = ("method", "target", "path", "query_string", "version", "headers", "body", "match_info")
+
+    def __init__(self, method: str, target: str, version: str, headers: CIMultiDict, body: bytes):
+        self.method = method
+        self.target = target
+        self.path, _, self.query_string = target.partition("?")
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.match_info: Dict[str, str] = {}
+
+    @property
+    def query(self) -> Dict[str, str]:
+        return dict(parse_qsl(self.query_string, keep_blank_values=True))
+
+    def json(self) -> Any:
+        return codec.loads(self.body) if self.body else None
+
+@dataclass
+class MockResponse:
+    """Mock响应
+
+    chunked为True时使用分块传输；compress可选gzip/deflate；delay为额外延迟(秒)
+    """
+    status: int = 200
+    body: Union[bytes, str, Dict, List, None] = b""
+    headers: Dict[str, str] = field(default_factory=dict)
+    content_type: Optional[str] = None
+    chunked: bool = False
+    chunk_size: int = 16 * 1024
+    compress: Optional[str] = None
+    delay: float = 0.0
+
+    def encode(self, keep_alive: bool, head: bool = False) -> bytes:
+        """序列化为完整的HTTP/1.1响应报文"""
+        body = self.body
+        content_type = self.content_type
+        if isinstance(body, (dict, list)):
+            body = codec.dumps(body)
+            content_type = content_type or "application/json"
+        elif isinstance(body, str):
+            body = body.encode("utf-8")
+            content_type = content_type or "text/plain; charset=utf-8"
+        elif body is None:
+            body = b""
+        content_type = content_type or "application/octet-stream"
+
+        headers = [f"Content-Type: {content_type}", "Server: mock-server"]
+        if self.compress == "gzip":
+            compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            body = compressor.compress(body) + compressor.flush()
+            headers.append("Content-Encoding: gzip")
+        elif self.compress == "deflate":
+            body = zlib.compress(body)
+            headers.append("Content-Encoding: deflate")
+        elif self.compress is not None:
+            raise ValueError(f"Unsupported compression: {self.compress}")
+
+        if self.chunked:
+            headers.append("Transfer-Encoding: chunked")
+            chunks = [
+                b"%x\r\n%s\r\n" % (len(body[i:i + self.chunk_size]), body[i:i + self.chunk_size])
+                for i in range(0, len(body), self.chunk_size)
+            ]
+            payload = b"".join(chunks) + b"0\r\n\r\n"
+        else:
+            headers.append(f"Content-Length: {len(body)}")
+            payload = body
+        headers.extend(f"{name}: {value}" for name, value in self.headers.items())
+        headers.append("Connection: keep-alive" if keep_alive else "Connection: close")
+
+        try:
+            reason = HTTPStatus(self.status).phrase
+        except ValueError:
+            reason = "Unknown"
+        head_bytes = "".join([f"HTTP/1.1 {self.status} {reason}\r\n"] + [h + "\r\n" for h in headers] + ["\r\n"])
+        return head_bytes.encode("latin-1") + (b"" if head else payload)
+
+# 路由处理函数：接收MockRequest，返回MockResponse/dict/list/str/bytes，可以是协程
+Handler = Callable[[MockRequest], Any]
+
+class Route:
+    """路由存根"""
+    _PARAM = re.compile(r"\{(\w+)\}")
+
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        response: Optional[MockResponse] = None,
+        handler: Optional[Handler] = None,
+        latency: Optional[LatencyFunc] = None,
+        error_rate: float = 0.0,
+        error: Union[int, str] = 500
+    ):
+        self.method = method.upper()
+        self.path = path
+        self.response = response or MockResponse()
+        self.handler = handler
+        self.latency = latency
+        self.error_rate = error_rate
+        # error为状态码，或"reset"(直接断开连接)、"timeout"(不返回响应)
+        self.error = error
+        self.calls = 0
+        # 注册顺序，匹配多个路由时后注册的优先
+        self.order = 0
+        self.pattern = None
+        if self._PARAM.search(path):
+            parts = self._PARAM.split(path)
+            # split结果中奇数位置为参数名
+            regex = "".join(f"(?P<{part}>[^/]+)" if i % 2 else re.escape(part) for i, part in enumerate(parts))
+            self.pattern = re.compile(f"^{regex}$")
+        # 静态响应预先序列化，按keep-alive缓存
+        self._encoded: Dict[bool, bytes] = {}
+
+    def match(self, path: str) -> Optional[Dict[str, str]]:
+        if self.pattern is None:
+            return {} if path == self.path else None
+        matched = self.pattern.match(path)
+        return matched.groupdict() if matched else None
+
+    def encoded(self, keep_alive: bool) -> bytes:
+        data = self._encoded.get(keep_alive)
+        if data is None:
+            data = self._encoded[keep_alive] = self.response.encode(keep_alive)
+        return data
+
+def _as_response(result: Any) -> MockResponse:
+    if isinstance(result, MockResponse):
+        return result
+    if isinstance(result, tuple):
+        status, body = result
+        return MockResponse(status=status, body=body)
+    return MockResponse(body=result)
+
+class _HTTPProtocol(asyncio.Protocol):
+    """最小化的HTTP/1.1协议实现，支持keep-alive和pipelining"""
+    MAX_HEADER_SIZE = 64 * 1024
+
+    def __init__(self, server: "MockServer"):
+        self.server = server
+        self.transport = None
+        self.buffer = bytearray()
+        self.busy = False
+        self._timer = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+        self.server._connections.add(self)
+
+    def connection_lost(self, exc):
+        self.server._connections.discard(self)
+        if self._timer is not None:
+            self._timer.cancel()
+
+    def data_received(self, data: bytes):
+        self.buffer += data
+        if not self.busy:
+            self._process()
+
+    def _process(self):
+        # 同一连接上的请求按顺序响应
+        while not self.busy and self.buffer:
+            end = self.buffer.find(b"\r\n\r\n")
+            if end < 0:
+                if len(self.buffer) > self.MAX_HEADER_SIZE:
+                    self.send(MockResponse(status=431).encode(False), False)
+                return
+            lines = self.buffer[:end].decode("latin-1").split("\r\n")
+            try:
+                method, target, version = lines[0].split(" ", 2)
+            except ValueError:
+                self.send(MockResponse(status=400).encode(False), False)
+                return
+            headers = CIMultiDict()
+            for line in lines[1:]:
+                name, _, value = line.partition(":")
+                headers.add(name.strip(), value.strip())
+            if "chunked" in headers.get("Transfer-Encoding", "").lower():
+                # 不支持分块传输的请求体
+                self.send(MockResponse(status=411).encode(False), False)
+                return
+            try:
+                content_length = int(headers.get("Content-Length", 0))
+            except ValueError:
+                content_length = -1
+            if content_length < 0:
+                self.send(MockResponse(status=400, body={"error": "invalid Content-Length"}).encode(False), False)
+                return
+            total = end + 4 + content_length
+            if len(self.buffer) < total:
+                return
+            body = bytes(self.buffer[end + 4:total])
+            del self.buffer[:total]
+            connection = headers.get("Connection", "").lower()
+            keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+            self.server._dispatch(self, MockRequest(method, target, version, headers, body), keep_alive)
+
+    def _write(self, data: bytes, keep_alive: bool):
+        if self.transport is None or self.transport.is_closing():
+            return
+        self.transport.write(data)
+        if not keep_alive:
+            self.busy = True
+            self.transport.close()
+
+    def _resume(self, data: bytes, keep_alive: bool):
+        self._timer = None
+        self._write(data, keep_alive)
+        if keep_alive:
+            self.busy = False
+            self._process()
+
+    def send(self, data: bytes, keep_alive: bool, delay: float = 0.0):
+        """发送响应；有延迟时暂停解析后续请求，保证同一连接上的响应顺序"""
+        if delay <= 0 and not self.busy:
+            self._write(data, keep_alive)
+            return
+        self.busy = True
+        self._timer = asyncio.get_running_loop().call_later(max(delay, 0.0), self._resume, data, keep_alive)
+
+class MockServer:
+    """进程内异步Mock服务
+
+    server = MockServer()
+    server.add_route("GET", "/users/{id}", json={"id": 1}, latency=Latency.lognormal(20))
+    await server.start()
+    client = HTTPClient(server.url)
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, history_size: int = 1000):
+        self.host = host
+        self.port = port
+        self.routes: List[Route] = []
+        self._static_routes: Dict[Tuple[str, str], Route] = {}
+        self._server = None
+        self._connections = set()
+        self.requests_total = 0
+        # 最近收到的请求，便于断言
+        self.history: Deque[MockRequest] = deque(maxlen=history_size)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def add_route(
+        self,
+        method: str,
+        path: str,
+        status: int = 200,
+        body: Union[bytes, str, Dict, List, None] = None,
+        json: Union[Dict, List, None] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content_type: Optional[str] = None,
+        handler: Optional[Handler] = None,
+        latency: Optional[LatencyFunc] = None,
+        error_rate: float = 0.0,
+        error: Union[int, str] = 500,
+        chunked: bool = False,
+        chunk_size: int = 16 * 1024,
+        compress: Optional[str] = None,
+        body_size: Optional[int] = None
+    ) -> Route:
+        """添加路由存根，path支持{name}占位符，method为*时匹配所有方法
+
+        body_size指定时生成对应大小的响应体；handler指定时按请求动态生成响应
+        """
+        if body_size is not None:
+            body = (b"0123456789abcdef" * (body_size // 16 + 1))[:body_size]
+        response = MockResponse(
+            status=status,
+            body=json if json is not None else body,
+            headers=headers or {},
+            content_type=content_type,
+            chunked=chunked,
+            chunk_size=chunk_size,
+            compress=compress
+        )
+        route = Route(method, path, response, handler, latency, error_rate, error)
+        route.order = len(self.routes)
+        self.routes.append(route)
+        # 后注册的路由优先（不论是否为*或带占位符），用例可以覆盖add_httpbin_routes注册的路由
+        if route.pattern is None:
+            self._static_routes[(route.method, path)] = route
+        return route
+
+    def _match(self, method: str, path: str) -> Tuple[Optional[Route], Dict[str, str]]:
+        """按注册顺序取最后注册的匹配路由：静态路由查表，带占位符的路由从后向前扫描到该静态路由为止"""
+        static = [route for route in (self._static_routes.get((method, path)), self._static_routes.get(("*", path)))
+                  if route is not None]
+        best = max(static, key=lambda route: route.order, default=None)
+        for route in reversed(self.routes):
+            if best is not None and route.order < best.order:
+                break
+            if route.pattern is not None and route.method in (method, "*"):
+                params = route.match(path)
+                if params is not None:
+                    return route, params
+        return best, {}
+
+    def _dispatch(self, protocol: _HTTPProtocol, request: MockRequest, keep_alive: bool):
+        self.requests_total += 1
+        self.history.append(request)
+        route, request.match_info = self._match(request.method, request.path)
+        if route is None:
+            protocol.send(MockResponse(status=404, body={"error": "no route"}).encode(keep_alive), keep_alive)
+            return
+        route.calls += 1
+
+        if route.error_rate and random.random() < route.error_rate:
+            if route.error == "reset":
+                protocol.transport.abort()
+            elif route.error == "timeout":
+                # 不再处理该连接上的请求，模拟服务端无响应
+                protocol.busy = True
+            else:
+                protocol.send(MockResponse(status=int(route.error)).encode(keep_alive), keep_alive)
+            return
+
+        delay = route.latency() if route.latency is not None else 0.0
+        head = request.method == "HEAD"
+        if route.handler is None:
+            data = route.response.encode(keep_alive, head=True) if head else route.encoded(keep_alive)
+            protocol.send(data, keep_alive, delay)
+            return
+
+        try:
+            result = route.handler(request)
+        except Exception as e:
+            # 与异步handler相同，handler出错时返回500而不是断开连接
+            protocol.send(MockResponse(status=500, body=str(e)).encode(keep_alive, head), keep_alive, delay)
+            return
+        if inspect.isawaitable(result):
+            protocol.busy = True
+            task = asyncio.ensure_future(result)
+            start = time.perf_counter()
+
+            def _done(done_task: asyncio.Future):
+                if done_task.cancelled():
+                    return
+                if done_task.exception() is not None:
+                    response = MockResponse(status=500, body=str(done_task.exception()))
+                else:
+                    response = _as_response(done_task.result())
+                remaining = max(delay, response.delay) - (time.perf_counter() - start)
+                protocol.send(response.encode(keep_alive, head), keep_alive, remaining)
+            task.add_done_callback(_done)
+            return
+        response = _as_response(result)
+        protocol.send(response.encode(keep_alive, head), keep_alive, max(delay, response.delay))
+
+    def reset(self):
+        """清空请求记录和计数"""
+        self.history.clear()
+        self.requests_total = 0
+        for route in self.routes:
+            route.calls = 0
+
+    def add_httpbin_routes(self) -> "MockServer":
+        """注册httpbin风格的常用路由，便于离线运行示例用例"""
+        def _echo(request: MockRequest) -> Dict[str, Any]:
+            data = {"args": request.query, "headers": dict(request.headers), "url": request.target}
+            if request.method not in ("GET", "HEAD"):
+                data["data"] = request.body.decode("utf-8", errors="replace")
+                try:
+                    data["json"] = request.json()
+                except ValueError:
+                    data["json"] = None
+            return data
+
+        for method in ("GET", "POST", "PUT", "PATCH", "DELETE"):
+            self.add_route(method, f"/{method.lower()}", handler=_echo)
+        self.add_route("*", "/anything", handler=_echo)
+        self.add_route("*", "/status/{code}", handler=lambda r: MockResponse(status=int(r.match_info["code"])))
+        self.add_route("*", "/delay/{seconds}", handler=lambda r: MockResponse(
+            body=_echo(r), delay=min(float(r.match_info["seconds"]), 10)))
+        self.add_route("GET", "/headers", handler=lambda r: {"headers": dict(r.headers)})
+        self.add_route("GET", "/gzip", json={"gzipped": True}, compress="gzip")
+        self.add_route("GET", "/deflate", json={"deflated": True}, compress="deflate")
+        self.add_route("GET", "/bytes/{n}", handler=lambda r: MockResponse(
+            body=os.urandom(min(int(r.match_info["n"]), 100 * 1024 * 1024))))
+        self.add_route("GET", "/stream/{n}", handler=lambda r: MockResponse(
+            body=b"".join(codec.dumps({"id": i}) + b"\n" for i in range(int(r.match_info["n"]))),
+            content_type="application/x-ndjson", chunked=True, chunk_size=256))
+        return self
+
+    async def start(self) -> "MockServer":
+        loop = asyncio.get_running_loop()
+        self._server = await loop.create_server(
+            lambda: _HTTPProtocol(self), self.host, self.port, backlog=1024, reuse_address=True
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        if self._server is None:
+            return
+        self._server.close()
+        for protocol in list(self._connections):
+            if protocol.transport is not None:
+                protocol.transport.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def __aenter__(self) -> "MockServer":
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the mock server with httpbin-style routes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    async def _serve():
+        server = MockServer(args.host, args.port).add_httpbin_routes()
+        await server.start()
+        print(f"Mock server listening on {server.url}")
+        await asyncio.Event().wait()
+
+    try:
+        asyncio.run(_serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
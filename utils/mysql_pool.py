@@ -0,0 +1,255 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Any, Callable, Deque, Iterator, Optional
+import pymysql
+from pymysql.constants import SERVER_STATUS
+from config.settings import settings
+from core.logger import logger
+
+class PoolTimeout(TimeoutError):
+    """在pool_timeout内没有可用连接"""
+
+@dataclass
+class MySQLPoolStats:
+    """MySQL连接池统计"""
+    checkouts: int = 0
+    created: int = 0
+    closed: int = 0
+    # 健康检查失败、超过pool_recycle或空闲超过idle_timeout而重建的连接数
+    recycled: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    wait_time: float = 0.0
+    max_wait: float = 0.0
+    peak_in_use: int = 0
+    # 借出连接数对时间的积分，用于计算平均利用率
+    busy_time: float = 0.0
+
+    def to_dict(self, size: int, elapsed: float) -> Dict[str, float]:
+        """转换为字典格式，耗时单位为毫秒"""
+        return {
+            "checkouts": self.checkouts,
+            "created": self.created,
+            "closed": self.closed,
+            "recycled": self.recycled,
+            "waits": self.waits,
+            "timeouts": self.timeouts,
+            "avg_wait": round(self.wait_time / self.checkouts * 1000, 2) if self.checkouts else 0.0,
+            "max_wait": round(self.max_wait * 1000, 2),
+            "peak_in_use": self.peak_in_use,
+            "utilization": round(self.busy_time / (size * elapsed), 4) if size and elapsed > 0 else 0.0,
+        }
+
+@dataclass
+class PoolTransaction:
+    """当前上下文中的事务，嵌套的SAVEPOINT共用同一连接和锁
+
+    用例隔离时用例内的所有语句都在该连接上执行，异步handler会在多个线程中并发调用，
+    lock保证同一时刻只有一个线程使用该连接（PyMySQL连接不能并发使用）
+    """
+    connection: Any
+    depth: int
+    lock: threading.Lock
+    timeout: float
+
+    @contextmanager
+    def use(self) -> Iterator[Any]:
+        """独占事务连接，等待超过timeout秒抛出PoolTimeout（如在iter_query迭代中执行其他语句）"""
+        if not self.lock.acquire(timeout=self.timeout):
+            raise PoolTimeout(f"Transaction connection still busy after {self.timeout}s")
+        try:
+            yield self.connection
+        finally:
+            self.lock.release()
+
+class _PooledConnection:
+    """空闲连接及其创建、归还时间"""
+    __slots__ = ("connection", "created_at", "returned_at")
+
+    def __init__(self, connection: Any):
+        self.connection = connection
+        self.created_at = self.returned_at = time.monotonic()
+
+class MySQLConnectionPool:
+    """线程安全的MySQL连接池，大小为database.mysql.pool_size
+
+    连接在首次借出时建立；归还时回滚未结束的事务，下一个用例不会读到旧的一致性快照。
+    借出时按以下顺序检查空闲连接：
+      超过pool_recycle秒的连接关闭重建（避免被服务端wait_timeout断开）
+      空闲超过idle_timeout秒的连接关闭重建
+      空闲超过health_check_interval秒的连接先ping，失败则重建
+    连接数已达上限时等待其他线程归还，超过pool_timeout秒抛出PoolTimeout。
+    """
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 connect: Optional[Callable[[], Any]] = None):
+        self.config = settings.db_config.get("mysql", {}) if config is None else config
+        self.size = int(self.config.get("pool_size", 5))
+        self.timeout = float(self.config.get("pool_timeout", 30))
+        self.recycle = float(self.config.get("pool_recycle", 3600))
+        self.idle_timeout = float(self.config.get("idle_timeout", 300))
+        self.health_check_interval = float(self.config.get("health_check_interval", 30))
+        self._connect = connect or self._create_connection
+        self.stats = MySQLPoolStats()
+        self._idle: Deque[_PooledConnection] = deque()
+        self._in_use: Dict[int, _PooledConnection] = {}
+        self._condition = threading.Condition()
+        self._opened_at = self._changed_at = time.monotonic()
+        # 当前上下文中的事务，使用同一连接池的handler共用，用例fixture开启的事务对用例中新建的handler同样生效
+        self.transaction: contextvars.ContextVar[Optional[PoolTransaction]] = \
+            contextvars.ContextVar("mysql_transaction", default=None)
+
+    def _create_connection(self) -> pymysql.connections.Connection:
+        try:
+            return pymysql.connect(
+                host=self.config["host"],
+                user=self.config["user"],
+                password=self.config["password"],
+                database=self.config["database"],
+                port=self.config["port"],
+                charset='utf8mb4',
+                cursorclass=pymysql.cursors.DictCursor,
+                connect_timeout=self.config.get("connect_timeout", 10)
+            )
+        except Exception as e:
+            logger.error(f"MySQL connection failed: {str(e)}")
+            raise
+
+    @property
+    def in_use(self) -> int:
+        return len(self._in_use)
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _track_busy(self) -> None:
+        """累计借出连接数对时间的积分，调用方持有锁"""
+        now = time.monotonic()
+        self.stats.busy_time += len(self._in_use) * (now - self._changed_at)
+        self._changed_at = now
+
+    @staticmethod
+    def _close(connection: Any) -> None:
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, pooled: _PooledConnection) -> bool:
+        """检查空闲连接是否可以继续使用，在锁外调用（ping需要网络往返）"""
+        now = time.monotonic()
+        if now - pooled.created_at > self.recycle or now - pooled.returned_at > self.idle_timeout:
+            return False
+        if now - pooled.returned_at > self.health_check_interval:
+            try:
+                pooled.connection.ping(reconnect=False)
+            except Exception as e:
+                logger.warning(f"MySQL pooled connection failed health check: {str(e)}")
+                return False
+        return True
+
+    def acquire(self, timeout: Optional[float] = None) -> Any:
+        """借出连接，必须由release归还，通常使用connection()"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+        with self._condition:
+            while not self._idle and len(self._in_use) >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.stats.timeouts += 1
+                    raise PoolTimeout(f"No MySQL connection available within {timeout}s "
+                                      f"(pool_size={self.size}, in_use={len(self._in_use)})")
+                waited = True
+                self._condition.wait(remaining)
+            pooled = self._idle.pop() if self._idle else None
+            # 先占位，建立连接和健康检查在锁外进行
+            placeholder = object()
+            self._track_busy()
+            self._in_use[id(placeholder)] = placeholder
+
+        recycled = created = False
+        try:
+            if pooled is not None and not self._is_usable(pooled):
+                self._close(pooled.connection)
+                pooled, recycled = None, True
+            if pooled is None:
+                pooled, created = _PooledConnection(self._connect()), True
+        except Exception:
+            with self._condition:
+                self._track_busy()
+                del self._in_use[id(placeholder)]
+                self.stats.recycled += recycled
+                self.stats.closed += recycled
+                self._condition.notify()
+            raise
+
+        wait = time.monotonic() - start
+        with self._condition:
+            del self._in_use[id(placeholder)]
+            self._in_use[id(pooled.connection)] = pooled
+            self.stats.recycled += recycled
+            self.stats.closed += recycled
+            self.stats.created += created
+            self.stats.checkouts += 1
+            self.stats.wait_time += wait
+            self.stats.max_wait = max(self.stats.max_wait, wait)
+            self.stats.waits += waited
+            self.stats.peak_in_use = max(self.stats.peak_in_use, len(self._in_use))
+        return pooled.connection
+
+    def release(self, connection: Any, discard: bool = False) -> None:
+        """归还连接，discard为True或回滚失败时关闭连接"""
+        if not discard and getattr(connection, "server_status", 0) & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+        with self._condition:
+            if id(connection) not in self._in_use:
+                return
+            self._track_busy()
+            pooled = self._in_use.pop(id(connection))
+            if discard:
+                self.stats.closed += 1
+            else:
+                pooled.returned_at = time.monotonic()
+                self._idle.append(pooled)
+            self._condition.notify()
+        if discard:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """借出连接，退出时归还；连接错误时关闭该连接而不放回连接池"""
+        connection = self.acquire(timeout)
+        discard = False
+        try:
+            yield connection
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            discard = True
+            raise
+        finally:
+            self.release(connection, discard)
+
+    def stats_dict(self) -> Dict[str, float]:
+        with self._condition:
+            self._track_busy()
+            return {"pool_size": self.size, "in_use": len(self._in_use), "idle": len(self._idle),
+                    **self.stats.to_dict(self.size, time.monotonic() - self._opened_at)}
+
+    def close(self) -> None:
+        """关闭所有空闲连接（用于pytest会话结束），借出中的连接在归还后放回"""
+        with self._condition:
+            idle, self._idle = list(self._idle), deque()
+            self.stats.closed += len(idle)
+        for pooled in idle:
+            self._close(pooled.connection)
+
+# 创建全局MySQL连接池实例，连接在首次使用时建立
+mysql_pool = MySQLConnectionPool()